@@ -2,15 +2,14 @@ from __future__ import annotations
 
 from pathlib import Path
 import time
-from typing import List, Tuple
+from typing import Callable, List, Tuple
 from uuid import uuid4
 import logging
 
 from openai.types.responses import Response
 from openai.types.chat import ChatCompletion
 
-from src.csource import CSource
-from src.design_construct.code_editor import span_replace_many
+from src.csource import CSource, RepoSymbolIndex
 from src.design_construct.code_placeholder import (
     CodePlaceholder, ReplRange, Token, 
     placeholder_composition_type, 
@@ -26,9 +25,17 @@ from src.utils.code_extract import extract_fenced_code_blocks
 from src.design_construct.symbol_reference import (
     SymbolImplReference, prepare_symbol_reference, ReferenceItem
 )
+from src.design_construct.reference_cache import ReferenceCache
+from src.design_construct.include_dependency import include_scope
+from src.design_construct.include_graph import IncludeGraph
+from src.design_construct.dependency_closure import dependency_closure
+from src.design_construct.deterministic_splice import (
+    partition_references, splice_definitions,
+)
 from src.design_construct.extract_unresolved import (
     parse_gcc_unresolved_symbol, gcc_compile,
 )
+from src.include_resolve import IncludeResolver, header_of_symbol, link_flags_for
 
 from dependency_resolve_agentic import (
     dependency_resolve_deepseek,
@@ -44,46 +51,99 @@ DESIGN_C_FNAME = 'design.c'
 DESIGN_H_FNAME = 'design.h'
 
 
+def reparse(prev: CSource | None, source: str | bytes) -> CSource:
+    """Parse ``source``, incrementally from ``prev`` when given."""
+    return CSource(source) if prev is None else prev.with_source(source)
+
+
+def _include_targets(*sources: CSource) -> List[str]:
+    """Include targets of ``sources`` as written, e.g. ``<stdio.h>``."""
+    return [inc.include_target.strip() for cs in sources for inc in cs.includes]
+
+
 def diagnose(
         src: SourceBundle,
         *,
         design_c_fn: str = DESIGN_C_FNAME,
         design_h_fn: str = DESIGN_H_FNAME,
-) -> Diagnostics:
-    csrc_c = CSource(src.c)
-    csrc_h = CSource(src.header)
+        prev_c: CSource | None = None,
+        prev_h: CSource | None = None,
+        member_owners: Callable[[str], List[str]] | None = None,
+) -> Tuple[Diagnostics, SourceBundle]:
+    """
+    Compile ``src`` and collect the symbols it misses. Standard headers
+    declaring some of them are included in the design header first, so
+    that they are not looked up in the repo; returns the diagnostics along
+    with the design, amended if so. ``member_owners`` names the types
+    declaring a member, for gcc's "request for member" errors; the type is
+    looked up only if a single one does.
+    """
+    csrc_c = reparse(prev_c, src.c)
+    csrc_h = reparse(prev_h, src.header)
     removed_symbols, new_designs = remove_forward_decls(
         [csrc_c, csrc_h]
     )
     # design_c, design_h = new_designs
 
-    # Detect if `<math.h>` is needed
-    use_math_h = False
-    for inc in (csrc_c.includes + csrc_h.includes):
-        target = inc.include_target.strip()
-        if target in ('math.h', '<math.h>', '"math.h"'):
-            use_math_h = True
-
+    targets = _include_targets(csrc_c, csrc_h)
+    included = {t.strip('<>"').strip() for t in targets}
     compile_rlt = gcc_compile(
         design_c_fn, csrc_c.as_str, 
         design_h_fn, csrc_h.as_str,
-        use_math_h=use_math_h,
+        link_flags=link_flags_for(targets),
     )
-    
-    gcc_unresolved_symbols = [
-        sym.symbol
-        for sym in parse_gcc_unresolved_symbol(compile_rlt.stderr)
-    ]
+    unresolved = parse_gcc_unresolved_symbol(compile_rlt.stderr)
+
+    # Names a standard header declares, unless the design defines them
+    std_headers = {
+        sym.symbol: header for sym in unresolved
+        if (header := header_of_symbol(sym.symbol)) is not None
+        and not any(csrc_c.search_by_name(sym.symbol))
+        and not any(csrc_h.search_by_name(sym.symbol))
+    }
+    missing_headers = sorted(set(std_headers.values()) - included)
+    if missing_headers:
+        csrc_h = csrc_h.with_source(
+            ''.join(f'#include <{h}>\n' for h in missing_headers) + csrc_h.as_str
+        )
+        src = SourceBundle(c=src.c, header=csrc_h.as_str, main=src.main)
+        targets.extend(f'<{h}>' for h in missing_headers)
+        compile_rlt = gcc_compile(
+            design_c_fn, csrc_c.as_str,
+            design_h_fn, csrc_h.as_str,
+            link_flags=link_flags_for(targets),
+        )
+        unresolved = parse_gcc_unresolved_symbol(compile_rlt.stderr)
+
+    # Only the names the included headers actually declared are dropped;
+    # those gcc still reports (a wrong table entry, a declaration behind a
+    # feature-test macro, a repo symbol with a libc name) stay unresolved.
+    still_reported = {sym.symbol for sym in unresolved}
+    std_resolved = tuple(s for s in std_headers if s not in still_reported)
+
+    gcc_unresolved_symbols: List[str] = []
+    for sym in unresolved:
+        if sym.type != 'member_request':
+            gcc_unresolved_symbols.append(sym.symbol)
+            continue
+        # gcc does not name the type lacking the member: look up the
+        # structs/unions declaring it. Only a single one is taken as the
+        # owner, several are left for the LLM to tell apart from the error.
+        owners = member_owners(sym.member) if member_owners is not None else []
+        if len(owners) == 1 and owners[0] not in gcc_unresolved_symbols:
+            gcc_unresolved_symbols.append(owners[0])
 
     gcc_lns = [line for line in compile_rlt.stderr.splitlines() if line.strip()]
     gcc_imcomplete_types = extract_incomplete_types(gcc_lns)
 
-    return Diagnostics(
+    diagnostics = Diagnostics(
         gcc_result=compile_rlt,
         removed_forward_symbols=tuple(removed_symbols),
         unresolved_symbols=tuple(gcc_unresolved_symbols),
         gcc_extra_incomplete_types=tuple(gcc_imcomplete_types),
+        std_resolved_symbols=std_resolved,
     )
+    return diagnostics, src
 
 
 def design_compress(
@@ -119,11 +179,7 @@ def design_compress(
             ph = placeholder_global_variable(glob_var)
             _add_ph(ph)
     
-    replaced_bytes = span_replace_many(
-        csource.as_bytes,
-        replacements
-    )
-    compressed_csource = CSource(replaced_bytes)
+    compressed_csource = csource.edit(replacements)
     return compressed_csource, placeholders
 
 def search(
@@ -131,6 +187,12 @@ def search(
         all_steps: List[TraceStep],
         *,
         csource_dict: dict[Path, CSource],
+        symbol_index: RepoSymbolIndex | None = None,
+        include_resolver: IncludeResolver | None = None,
+        include_graph: IncludeGraph | None = None,
+        reference_cache: ReferenceCache | None = None,
+        prefetch_closure: int = 0,
+        splice_deterministic: bool = False,
         max_iter: int = 10,
         immed_dump_c_to: Path | None = None,
         immed_dump_h_to: Path | None = None,
@@ -147,9 +209,78 @@ def search(
         immed_dump_h_to = Path(immed_dump_h_to)
         immed_dump_h_to.parent.mkdir(parents=True, exist_ok=True)
 
+    entry_sources = {
+        design_meta.function_location:
+        csource_dict[design_meta.function_location]
+    }
+    include_sources = include_scope(
+        design_meta.function_location, csource_dict,
+        resolver=include_resolver, graph=include_graph,
+    )
+    # The whole repo, still ranked by include distance
+    ranked_sources = {**include_sources, **csource_dict}
+    # What the entry file itself sees: its include closure, without the
+    # implementation files `include_scope` adds
+    visible_sources = include_sources
+    if include_graph is not None and design_meta.function_location in include_graph:
+        visible_sources = {
+            path: csource_dict[path]
+            for path in include_graph.reachable(design_meta.function_location)
+            if path in csource_dict
+        }
+
+    def lookup(sym: str, sources: dict[Path, CSource], scope: str) -> SymbolImplReference:
+        index = symbol_index if len(sources) > 1 else None
+        if reference_cache is None:
+            return prepare_symbol_reference(
+                sym,
+                sources,
+                use_code_placeholder=enable_placeholder,
+                index=index,
+            )
+        # Locations are relative to the repos base, led by the repo name
+        return reference_cache.prepare(
+            sym,
+            sources,
+            repo=design_meta.function_location.parts[0],
+            scope=(scope, design_meta.function_location),
+            use_code_placeholder=enable_placeholder,
+            index=index,
+        )
+
+    def member_owners(member: str) -> List[str]:
+        # Types the entry file can see, not any of the repo declaring it
+        if symbol_index is None:
+            return []
+        return symbol_index.member_owners(member, within=visible_sources)
+
+    # Up to `prefetch_closure` statically found dependencies are looked up
+    # along with the function itself, instead of waiting for gcc to report
+    # them missing one round after another.
+    prefetched: List[str] = []
+    if prefetch_closure > 0:
+        closure = dependency_closure(
+            design_meta.function_name,
+            ranked_sources,
+            symbol_index or RepoSymbolIndex(csource_dict),
+            max_symbols=prefetch_closure + 1,
+        )
+        prefetched = closure.dependencies()
+        verbose and logger.info(
+            f" Prefetching {len(prefetched)} symbols of the dependency closure"
+            + (" (truncated)" if closure.truncated else "")
+        )
+
+    # Latest parsed design.c/design.h, successive designs are reparsed
+    # incrementally from them.
+    last_c: CSource | None = None
+    last_h: CSource | None = None
+
     iteration = 0
+    # Only rounds asking the LLM count against `max_iter`
+    llm_rounds = 0
     while True:
-        if iteration >= max_iter:
+        if llm_rounds >= max_iter:
             break
         iteration += 1
         verbose and logger.info(f"=== Iteration {iteration} ===")
@@ -163,7 +294,10 @@ def search(
             parent_step = all_steps[-1]
             curr_design = parent_step.attempt.extracted_design
             llm_reported_missing_symbols = parent_step.attempt.llm_reported_missing_symbols
-            curr_diagnostic = diagnose(curr_design)
+            curr_diagnostic, curr_design = diagnose(
+                curr_design, prev_c=last_c, prev_h=last_h,
+                member_owners=member_owners,
+            )
         else:
             # If no valid step exists, start from an empty design
             verbose and logger.info(" Starting from an empty design.")
@@ -175,7 +309,7 @@ def search(
             curr_diagnostic = Diagnostics(
                 gcc_result=None,
                 removed_forward_symbols=(),
-                unresolved_symbols=tuple([design_meta.function_name, ])
+                unresolved_symbols=tuple([design_meta.function_name, *prefetched])
             )
         
         assert isinstance(curr_design, SourceBundle)
@@ -189,30 +323,76 @@ def search(
             verbose and logger.info(" All symbols have been resolved.")
             return
 
-        if len(syms) > 5:
-            keep_for_next_syms = syms[5:]
-            syms = syms[:5]
+        per_round = 5 if parent_step is not None else 1 + len(prefetched)
+        if len(syms) > per_round:
+            keep_for_next_syms = syms[per_round:]
+            syms = syms[:per_round]
         else:
             keep_for_next_syms = []
 
         sym_ref_map: dict[str, SymbolImplReference] = {}
         for sym in syms: # Always get all symbols afresh
-            sel_csrc_dict = csource_dict
-            if parent_step is None:
-                # For the first iteration, only use entry files
+            if parent_step is None and sym == design_meta.function_name:
+                # For the function itself, only use entry files
                 # to avoid picking up irrelevant functions
-                sel_csrc_dict = {
-                    design_meta.function_location: 
-                    csource_dict[design_meta.function_location] 
-                }
-                
-            sym_ref = prepare_symbol_reference(
-                sym,  
-                sel_csrc_dict,
-                use_code_placeholder=enable_placeholder,
-            )
+                sym_ref = lookup(sym, entry_sources, 'entry')
+            else:
+                # Files the entry file includes, nearest first, then the
+                # whole repo if none of them defines the symbol
+                sym_ref = lookup(sym, include_sources, 'include')
+                if sym_ref.is_empty() or (sym_ref.function_declarations
+                                          and not sym_ref.functions):
+                    sym_ref = lookup(sym, ranked_sources, 'ranked_repo')
             sym_ref_map[sym] = sym_ref
         
+        if splice_deterministic:
+            # Definitions with a single candidate are copied into the design
+            # as a step of their own; the other symbols wait for the next
+            # round, after gcc has rechecked the design.
+            candidates, _ = partition_references(sym_ref_map)
+            spliced_c, spliced_h, spliced_syms = splice_definitions(
+                reparse(last_c, curr_design.c),
+                reparse(last_h, curr_design.header),
+                candidates,
+            )
+            if spliced_syms:
+                verbose and logger.info(
+                    f" Spliced {len(spliced_syms)} symbols without the LLM: "
+                    f"{', '.join(spliced_syms)}"
+                )
+                deferred = [s for s in sym_ref_map if s not in spliced_syms]
+                attempt = IncrementalConstructAttemptV2(
+                    references={
+                        sym: sym_ref_map[sym].to_flattened_list()
+                        for sym in spliced_syms
+                    },
+                    llm_response_dumps=None,
+                    extracted_design=SourceBundle(
+                        c=spliced_c.as_str, header=spliced_h.as_str
+                    ),
+                    llm_reported_missing_symbols=tuple(deferred + list(keep_for_next_syms)),
+                )
+                trace_step = TraceStep(
+                    uid=uuid4().hex,
+                    initial_design=curr_design,
+                    diagnostic=curr_diagnostic,
+                    target_symbols=tuple(spliced_syms),
+                    attempt=attempt,
+                    placeholders=None if not enable_placeholder else tuple(),
+                )
+                if immed_dump_c_to:
+                    immed_dump_c_to.write_bytes(spliced_c.as_bytes)
+                if immed_dump_h_to:
+                    immed_dump_h_to.write_bytes(spliced_h.as_bytes)
+
+                all_steps.append(trace_step)
+                last_c, last_h = spliced_c, spliced_h
+                yield (
+                    parent_step.uid if parent_step else None,
+                    trace_step
+                )
+                continue
+
         symbols_this_iter: List[str] = list(sym_ref_map.keys())
 
         reference: dict[str, List[ReferenceItem]] = {}
@@ -235,8 +415,8 @@ def search(
                     if ref_item.placeholder is not None:
                         ref_placeholders.append(ref_item.placeholder)
 
-        cmp_design_c = CSource(curr_design.c)
-        cmp_design_h = CSource(curr_design.header)
+        cmp_design_c = last_c = reparse(last_c, curr_design.c)
+        cmp_design_h = last_h = reparse(last_h, curr_design.header)
         des_placeholder = []
 
         if enable_placeholder:
@@ -247,6 +427,7 @@ def search(
             des_placeholder.extend(h_phs)
         
         retry_count = 0
+        llm_rounds += 1
         try:
             stime = time.time()
             if llm_version.startswith('gpt'):
@@ -295,8 +476,8 @@ def search(
             verbose and logger.error(" Failed to extract code blocks.")
             continue
 
-        new_h = CSource(code_blocks[0]['code'])
-        new_c = CSource(code_blocks[1]['code'])
+        new_h = cmp_design_h.with_source(code_blocks[0]['code'])
+        new_c = cmp_design_c.with_source(code_blocks[1]['code'])
         
         if len(code_blocks) == 3:
             _llm_syms = code_blocks[2]['code'].splitlines()
@@ -321,8 +502,8 @@ def search(
             phs = ref_placeholders + des_placeholder
             new_h_bytes = replace_back_placeholder(new_h.as_bytes, phs)
             new_c_bytes = replace_back_placeholder(new_c.as_bytes, phs)
-            new_h = CSource(new_h_bytes)
-            new_c = CSource(new_c_bytes)
+            new_h = new_h.with_source(new_h_bytes)
+            new_c = new_c.with_source(new_c_bytes)
 
         # NOTE: For this search() function, only valid steps are appended
         # to the trace. Invalid steps are simply skipped.
@@ -355,6 +536,7 @@ def search(
             immed_dump_h_to.write_bytes(new_h.as_bytes)
 
         all_steps.append(trace_step)
+        last_c, last_h = new_c, new_h
 
         # NOTE: `all_steps` is separate from `trace.steps`.
         # `all_steps` exists only within search() 
@@ -6,6 +6,11 @@ from dependency_resolve_kernel import search
 from src.all_repos import REPO_ABSOLUTE_BASE, RepoPaths
 from src.crepo import CRepo
 from src.csource.csource import CSource
+from src.csource.loader import load_csources
+from src.csource.parse_cache import DEFAULT_CACHE_DIR, ParseCache
+from src.csource.symbol_index import RepoSymbolIndex
+from src.design_construct.include_graph import IncludeGraph
+from src.design_construct.reference_cache import ReferenceCache
 from src.design_construct.schema_config import DesignMetaV2
 from src.design_construct.schema_trace import DesignConstructTrace
 from src.utils.misc import dump_json, read_json, read_jsonl
@@ -29,6 +34,21 @@ if __name__ == "__main__":
                         choices=['primitive', 'routine', 'workflow', 'end_to_end_scenario'],
                         nargs='+', # Allow multiple values
                         required=True)
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Processes used to parse the repo (default: all cores).")
+    parser.add_argument('--parse-cache', type=str, default=str(DEFAULT_CACHE_DIR),
+                        help="Directory of cached components, reused across runs.")
+    parser.add_argument('--no-parse-cache', action='store_true',
+                        help="Parse every file, neither reading nor filling the cache.")
+    parser.add_argument('--parse-budget', type=float, default=30.0,
+                        help="Seconds to parse one file before falling back to "
+                             "regex extraction (<= 0 disables the budget).")
+    parser.add_argument('--prefetch-closure', type=int, default=0,
+                        help="Statically found dependencies of each function looked "
+                             "up in the first round (0 disables prefetching).")
+    parser.add_argument('--splice-deterministic', action='store_true',
+                        help="Copy symbols with a single definition into the design "
+                             "directly instead of through the LLM.")
     args = parser.parse_args()
 
     supported_repos = [name for name, _ in RepoPaths.iter_repos()]
@@ -57,10 +77,27 @@ if __name__ == "__main__":
 
     repo = CRepo(REPO_ROOT)
 
-    csource_dict: dict[Path, CSource] = {}
-    for fp in repo.files():
-        rel_fp = fp.relative_to(REPO_ABSOLUTE_BASE)
-        csource_dict[rel_fp] = CSource.from_file(fp)
+    MMAP_THRESHOLD = 1 << 20
+    parse_cache = None if args.no_parse_cache else ParseCache(args.parse_cache)
+
+    # Only spans and names are needed, trees are released after extraction;
+    # large translation units are memory-mapped rather than copied.
+    csource_dict: dict[Path, CSource]
+    csource_dict, load_report = load_csources(
+        repo.files(),
+        base=REPO_ABSOLUTE_BASE,
+        workers=args.workers,
+        mmap_threshold=MMAP_THRESHOLD,
+        cache=parse_cache,
+        time_budget=args.parse_budget if args.parse_budget > 0 else None,
+    )
+    logger.info(str(load_report))
+    # Symbol lookups of every design go through one index of the repo
+    symbol_index = RepoSymbolIndex(csource_dict)
+    # Include scopes of every design come from one include graph, kept
+    # next to the parse cache
+    include_graph = IncludeGraph.cached(csource_dict, parse_cache)
+    reference_cache = ReferenceCache()
 
     suitable_designs = [d for d in designs if d.get('suitable', False) is True]
 
@@ -109,6 +146,11 @@ if __name__ == "__main__":
                 design_meta,
                 list(trace.sequential_valid_step_iter()),
                 csource_dict=csource_dict,
+                symbol_index=symbol_index,
+                include_graph=include_graph,
+                reference_cache=reference_cache,
+                prefetch_closure=args.prefetch_closure,
+                splice_deterministic=args.splice_deterministic,
                 max_iter=8,
                 max_trace_steps=16,
                 immed_dump_c_to=design_loc / 'design.c',
@@ -126,3 +168,5 @@ if __name__ == "__main__":
             logger.error(f"Error processing design {design_meta.function_name} at "
                          f"{design_meta.function_location}: {e}")
             continue
+
+    logger.info(str(reference_cache))
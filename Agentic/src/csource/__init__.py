@@ -1,3 +1,6 @@
 
-from .w_components import SymbolSearchResult
+from .w_components import SymbolSearchResult, EXCLUSIVE_SYMBOLS, SEARCH_GROUPS
 from .csource import CSource
+from .loader import load_csources, LoadReport
+from .parse_cache import ParseCache
+from .symbol_index import RepoSymbolIndex
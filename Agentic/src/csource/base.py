@@ -1,61 +1,152 @@
-from functools import cached_property
-from typing import Optional, Union
+from mmap import mmap
+from typing import Optional, Tuple, Union
 
-from tree_sitter import Node
+from tree_sitter import Node, Tree
 
-from ..parser.tslang import C_LANGUAGE, get_parser
+from ..parser.tslang import parse_c_source
+from ..parser.source_span import SourceSpan
 from ..parser.utils import str_of
 
 
+SpanLike = Union[SourceSpan, Tuple[int, int]]
+
 
 class PureCSource:
-    def __init__(self, source: Union[str, bytes]) -> None:
-        if isinstance(source, bytes):
-            self._bytes: Optional[bytes] = source
-            self._str: Optional[str] = None
+    """
+    Source text held once: as UTF-8 bytes (possibly a read-only `mmap`), or
+    as the given ``str`` until bytes are first needed. Snippets are served through `view`/`text_of`,
+    which slice a zero-copy `memoryview` and decode only the requested
+    range; the full `as_str` is decoded on explicit request, not cached.
+
+    A mapped source holds its mapping until `close` (or the end of a
+    ``with`` block), and can't be pickled: pickle its `as_bytes` instead.
+    """
+
+    def __init__(self, source: Union[str, bytes, mmap]) -> None:
+        if isinstance(source, str):
+            self._str: Optional[str] = source
+            self._bytes: Optional[Union[bytes, mmap]] = None
         else:
-            self._str = source
-            self._bytes = None
+            self._bytes = source
+            self._str = None
+        self._copy: Optional[bytes] = None
 
-    @cached_property
-    def as_bytes(self) -> bytes:
+    def close(self) -> None:
+        """
+        Unmap a mapped source, which can't be read afterwards; views of it
+        must be released first. Does nothing for other sources.
+        """
+        if isinstance(self._bytes, mmap):
+            self._bytes.close()
+        self._copy = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __getstate__(self):
+        if self.is_mapped:
+            raise TypeError(f"a mapped {type(self).__name__} can't be pickled, "
+                            "pickle its `as_bytes` instead")
+        return self.__dict__
+
+    @property
+    def buffer(self) -> Union[bytes, mmap]:
+        """The source bytes without copying; a mapped file stays mapped."""
         cached = self._bytes
         if cached is None:
-            cached = self._str.encode("utf-8")
-            self._bytes = cached
+            # Keep a single copy of the text, bytes from now on
+            cached = self._bytes = self._str.encode("utf-8")
+            self._str = None
         return cached
 
-    @cached_property
+    @property
+    def is_mapped(self) -> bool:
+        return isinstance(self._bytes, mmap)
+
+    @property
+    def as_bytes(self) -> bytes:
+        buffer = self.buffer
+        if isinstance(buffer, bytes):
+            return buffer
+        # A mapped file is copied once, when first needed as bytes; prefer
+        # `buffer`/`view` for large sources.
+        copied = self._copy
+        if copied is None:
+            copied = self._copy = buffer[:]
+        return copied
+
+    @property
     def as_str(self) -> str:
-        cached = self._str
-        if cached is None:
-            cached = self._bytes.decode("utf-8", errors="replace")
-            self._str = cached
-        return cached
+        if self._str is not None:
+            return self._str
+        return str(self._bytes, "utf-8", "replace")
 
-    @cached_property
+    @property
     def lines(self) -> tuple[str]:
         return tuple(self.as_str.splitlines())
-        
+
+    def view(self, start: int, end: int) -> memoryview:
+        """Zero-copy view of the bytes ``[start, end)``."""
+        return memoryview(self.buffer)[start:end]
+
+    def text_of(self, span: SpanLike, errors: str = "replace") -> str:
+        """Decode only the bytes of ``span``, a `SourceSpan` or byte range."""
+        if isinstance(span, SourceSpan):
+            start, end = span.start_byte, span.end_byte
+        else:
+            start, end = span
+        return str(memoryview(self.buffer)[start:end], "utf-8", errors)
+
     def slice_bytes(self, start: int, end: int) -> bytes:
-        return self.as_bytes()[start:end]
+        return self.buffer[start:end]
 
     def slice_text(self, start: int, end: int) -> str:
-        return self.as_str()[start:end]
+        return self.as_str[start:end]
 
 
 class CSourceAST(PureCSource):
-    def __init__(self, source: Union[str, bytes]) -> None:
+    def __init__(
+            self, source: Union[str, bytes, mmap],
+            *,
+            old_tree: Optional[Tree] = None,
+            parse: bool = True,
+            timeout: Optional[float] = None,
+    ) -> None:
         super().__init__(source)
-        parser = get_parser(C_LANGUAGE)
-        self.tree = parser.parse(self.as_bytes)
-        self.root = self.tree.root_node
+        # Without ``parse`` the source starts detached. With ``timeout``,
+        # `ParseTimeout` is raised if parsing takes longer (in seconds).
+        self._tree: Optional[Tree] = None
+        if parse:
+            self._tree = parse_c_source(self.buffer, old_tree, timeout=timeout)
+
+    @property
+    def tree(self) -> Tree:
+        """The syntax tree, reparsed on demand if it was released by `detach`."""
+        tree = self._tree
+        if tree is None:
+            tree = self._tree = parse_c_source(self.buffer)
+        return tree
+
+    @property
+    def root(self) -> Node:
+        return self.tree.root_node
+
+    @property
+    def is_detached(self) -> bool:
+        return self._tree is None
+
+    def detach(self) -> None:
+        """Release the syntax tree; it is reparsed when next needed."""
+        self._tree = None
 
     def print_ast(self, node: Node = None, indent: int = 0):
         if node is None:
             node = self.tree.root_node
         indent_str = "  " * indent
-        node_text = str_of(node, self.as_bytes)
+        node_text = str_of(node, self.buffer)
         desp = f"{indent_str}{node.type} [{node.start_byte} - {node.end_byte}] : {node_text!r}"
         print(desp)
 
@@ -1,14 +1,31 @@
-from src.csource.w_components import CSourceComponents
-
-
+import mmap
+import os
 from pathlib import Path
+from typing import Optional
+
+from src.csource.w_components import CSourceComponents
 
 
 class CSource(CSourceComponents):
 
     @classmethod
-    def from_file(cls, filepath: str | bytes | Path) -> "CSource":
+    def from_file(
+            cls, filepath: str | bytes | Path,
+            *,
+            mmap_threshold: Optional[int] = None,
+            **kwargs,
+    ) -> "CSource":
+        """
+        Load a source file. Files of at least ``mmap_threshold`` bytes are
+        mapped read-only instead of read: parsing and snippets then read
+        the mapping, whose pages are shared through the page cache. Each
+        mapping holds a file descriptor until `close`, so keep the threshold
+        high enough that only large translation units are mapped.
+        """
         with open(filepath, 'rb') as f:
-            source_bytes = f.read()
-        return cls(source_bytes)
-    
\ No newline at end of file
+            size = os.fstat(f.fileno()).st_size
+            if mmap_threshold is not None and 0 < size and mmap_threshold <= size:
+                source = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                source = f.read()
+        return cls(source, **kwargs)
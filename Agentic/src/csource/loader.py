@@ -0,0 +1,212 @@
+import mmap
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+from .csource import CSource
+from .parse_cache import ParseCache, content_key
+from ..parser.components import ComponentTable
+
+
+class CSourceSummary(NamedTuple):
+    """
+    Everything a worker process sends back for one file: the raw bytes and
+    the extracted component tables. ``source`` is None when the parent maps
+    the file itself (see ``mmap_threshold`` of `load_csources`).
+    """
+    path: Path
+    source: Optional[bytes]
+    components: Dict[str, ComponentTable]
+    parse_seconds: float
+    degraded: bool = False
+
+
+class FileLoadTime(NamedTuple):
+    path: Path
+    size: int
+    parse_seconds: float
+    cached: bool = False
+    degraded: bool = False
+
+
+class LoadReport(NamedTuple):
+    """Per-file parse times of a `load_csources` call."""
+    files: Tuple[FileLoadTime, ...]
+    wall_seconds: float
+    workers: int
+
+    @property
+    def parse_seconds(self) -> float:
+        return sum(f.parse_seconds for f in self.files)
+
+    def slowest(self, n: int = 10) -> List[FileLoadTime]:
+        return sorted(self.files, key=lambda f: f.parse_seconds, reverse=True)[:n]
+
+    def degraded(self) -> List[FileLoadTime]:
+        """Files that exceeded the time budget, see `CSource.is_degraded`."""
+        return [f for f in self.files if f.degraded]
+
+    def __str__(self) -> str:
+        lines = [
+            f"Loaded {len(self.files)} files in {self.wall_seconds:.2f}s "
+            f"with {self.workers} worker(s), {self.parse_seconds:.2f}s of parsing, "
+            f"{sum(f.cached for f in self.files)} from the parse cache.",
+            "Slowest files:",
+        ]
+        for f in self.slowest():
+            lines.append(f"  {f.parse_seconds * 1e3:9.1f} ms  {f.size / 1024:9.0f} KiB  {f.path}")
+        degraded = self.degraded()
+        if degraded:
+            lines.append(f"Over the time budget, regex extraction only ({len(degraded)}):")
+            for f in degraded:
+                lines.append(f"  {f.size / 1024:9.0f} KiB  {f.path}")
+        return "\n".join(lines)
+
+
+def summarize_csource(
+        path: Path,
+        send_source: bool = True,
+        time_budget: Optional[float] = None,
+) -> CSourceSummary:
+    """Parse one file and extract all of its components."""
+    stime = time.perf_counter()
+    csource = CSource.from_file(path, detached=True, time_budget=time_budget)
+    elapsed = time.perf_counter() - stime
+    return CSourceSummary(
+        path=path,
+        source=csource.as_bytes if send_source else None,
+        components=csource.components(),
+        parse_seconds=elapsed,
+        degraded=csource.is_degraded,
+    )
+
+
+def _summarize(job: Tuple[Path, bool, Optional[float]]) -> CSourceSummary:
+    return summarize_csource(*job)
+
+
+def load_csources(
+        paths: Iterable[Path],
+        *,
+        base: Optional[Path] = None,
+        workers: Optional[int] = None,
+        mmap_threshold: Optional[int] = None,
+        cache: Optional[ParseCache] = None,
+        time_budget: Optional[float] = None,
+        chunksize: int = 8,
+) -> Tuple[Dict[Path, CSource], LoadReport]:
+    """
+    Parse ``paths`` across a process pool of ``workers`` processes (all
+    cores by default, in-process if 1) and reassemble the summaries into
+    detached `CSource` objects, keyed by path relative to ``base`` if given.
+    Files of at least ``mmap_threshold`` bytes are mapped by this process
+    instead of having their bytes sent back by the worker. With ``cache``,
+    files whose content is already cached are not parsed at all, and the
+    others are added to the cache. ``time_budget`` is the per-file budget
+    in seconds (see `CSource`); degraded files are listed by the report and
+    never cached.
+    """
+    paths = [Path(p) for p in paths]
+    sizes = [os.path.getsize(p) for p in paths]
+    mapped = [mmap_threshold is not None and 0 < size and mmap_threshold <= size
+              for size in sizes]
+    workers = workers or os.cpu_count() or 1
+
+    stime = time.perf_counter()
+    loaded: Dict[Path, Tuple[CSource, float, bool, bool]] = {}
+    cache_keys: Dict[Path, str] = {}
+    pending: List[int] = []
+    for i, p in enumerate(paths):
+        if cache is None:
+            pending.append(i)
+            continue
+        source = _read(p, mapped[i])
+        cache_keys[p] = key = content_key(source)
+        components = cache.get(key)
+        if components is None:
+            pending.append(i)
+            continue
+        csource = CSource(source, components=components, detached=True)
+        loaded[_key(p, base)] = (csource, 0.0, True, False)
+
+    jobs = [(paths[i], not mapped[i], time_budget) for i in pending]
+    if workers <= 1 or len(jobs) <= 1:
+        summaries = map(_summarize, jobs)
+        _assemble(summaries, base, loaded, cache, cache_keys)
+    else:
+        # Largest files first, so that none of them starts last.
+        jobs.sort(key=lambda job: os.path.getsize(job[0]), reverse=True)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            summaries = executor.map(_summarize, jobs, chunksize=chunksize)
+            _assemble(summaries, base, loaded, cache, cache_keys)
+    wall = time.perf_counter() - stime
+
+    # In the order of ``paths``
+    csources: Dict[Path, CSource] = {}
+    times: List[FileLoadTime] = []
+    for p, size in zip(paths, sizes):
+        csource, parse_seconds, cached, degraded = loaded[_key(p, base)]
+        csources[_key(p, base)] = csource
+        times.append(FileLoadTime(p, size, parse_seconds, cached, degraded))
+    return csources, LoadReport(tuple(times), wall, workers)
+
+
+def _key(path: Path, base: Optional[Path]) -> Path:
+    return path.relative_to(base) if base is not None else path
+
+
+def _read(path: Path, mapped: bool) -> Union[bytes, mmap.mmap]:
+    with open(path, 'rb') as f:
+        if mapped:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return f.read()
+
+
+def _assemble(
+        summaries: Iterable[CSourceSummary],
+        base: Optional[Path],
+        loaded: Dict[Path, Tuple[CSource, float, bool, bool]],
+        cache: Optional[ParseCache],
+        cache_keys: Dict[Path, str],
+) -> None:
+    for summary in summaries:
+        source = summary.source
+        if source is None:
+            source = _read(summary.path, mapped=True)
+        if cache is not None and not summary.degraded:
+            key = cache_keys.get(summary.path) or content_key(source)
+            cache.put(key, summary.components)
+        csource = CSource(source, components=summary.components, detached=True)
+        if summary.degraded:
+            csource.is_degraded = True
+        loaded[_key(summary.path, base)] = (
+            csource, summary.parse_seconds, False, summary.degraded)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from ..crepo import CRepo
+
+    parser = argparse.ArgumentParser(
+        description="Load a C repository serially and with a process pool."
+    )
+    parser.add_argument("repo", type=str, help="Repository root.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Pool size (default: all cores).")
+    args = parser.parse_args()
+
+    files = CRepo(args.repo).files()
+
+    stime = time.perf_counter()
+    serial = {fp: CSource.from_file(fp, detached=True) for fp in files}
+    t_serial = time.perf_counter() - stime
+    print(f"Serial CSource.from_file: {t_serial:.2f}s")
+
+    parallel, report = load_csources(files, workers=args.workers)
+    print(report)
+    same = all(parallel[fp].components() == serial[fp].components() for fp in files)
+    print(f"Speedup x{t_serial / report.wall_seconds:.1f}, "
+          f"identical components: {same}")
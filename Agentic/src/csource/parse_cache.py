@@ -0,0 +1,181 @@
+import hashlib
+import os
+import pickle
+import tempfile
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple, Union
+
+from ..parser.components import ComponentTable, EXTRACTOR_VERSION
+
+
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "benchstone-c" / "parse"
+
+
+def _grammar_version() -> str:
+    try:
+        return version("tree-sitter-c")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+# Mixed into every key, so a new extractor or grammar never hits old entries.
+_KEY_SALT = f"extractor={EXTRACTOR_VERSION};tree-sitter-c={_grammar_version()};".encode()
+
+
+def content_key(source: Union[bytes, memoryview]) -> str:
+    """Cache key of a source: hash of its content, extractor and grammar."""
+    digest = hashlib.sha256(_KEY_SALT)
+    digest.update(source)
+    return digest.hexdigest()
+
+
+class ParseCache:
+    """
+    On-disk, content-addressed store of extracted components. Each entry is
+    the pickled `ComponentTable` columns of one source, so a hit restores a
+    detached `CSource` without running tree-sitter.
+
+    With ``max_bytes``, least recently used entries (by modification time,
+    refreshed on every hit) are evicted once the cache grows past the limit.
+    """
+
+    SUFFIX = ".components"
+
+    def __init__(self, root: Union[str, Path] = DEFAULT_CACHE_DIR,
+                 *, max_bytes: Optional[int] = None) -> None:
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._size: Optional[int] = None  # scanned lazily
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / (key + self.SUFFIX)
+
+    def get(self, key: str) -> Optional[Dict[str, ComponentTable]]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                components = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # Unreadable or from an incompatible layout, treat as a miss.
+            self._discard(path)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return components
+
+    def put(self, key: str, components: Dict[str, ComponentTable]) -> None:
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        # Written to a temporary file and renamed, so readers never see
+        # partial entries and concurrent writers of one key do not clash.
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(components, f, protocol=pickle.HIGHEST_PROTOCOL)
+            size = os.path.getsize(tmp)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        if self._size is not None:
+            self._size += size
+        self._evict()
+
+    def _discard(self, path: Path) -> None:
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except OSError:
+            return
+        if self._size is not None:
+            self._size -= size
+
+    def entries(self) -> Iterator[Tuple[Path, os.stat_result]]:
+        for path in self.root.glob("*/*" + self.SUFFIX):
+            try:
+                yield path, path.stat()
+            except FileNotFoundError:
+                continue
+
+    @property
+    def size(self) -> int:
+        """Total bytes of all entries."""
+        if self._size is None:
+            self._size = sum(st.st_size for _, st in self.entries())
+        return self._size
+
+    def _evict(self) -> None:
+        if self.max_bytes is None or self.size <= self.max_bytes:
+            return
+        # Evict down to 90% of the limit, so puts do not rescan each time.
+        target = int(self.max_bytes * 0.9)
+        entries = sorted(self.entries(), key=lambda e: e[1].st_mtime)
+        total = sum(st.st_size for _, st in entries)
+        for path, st in entries:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= st.st_size
+        self._size = total
+
+    def clear(self) -> None:
+        for path, _ in list(self.entries()):
+            path.unlink(missing_ok=True)
+        self._size = 0
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from .loader import load_csources
+    from ..all_repos import RepoPaths
+    from ..crepo import CRepo
+
+    parser = argparse.ArgumentParser(description="Manage the repository parse cache.")
+    parser.add_argument("--cache-dir", type=str, default=str(DEFAULT_CACHE_DIR))
+    parser.add_argument("--max-size-mb", type=int, default=None,
+                        help="Evict least recently used entries above this size.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    prewarm = sub.add_parser("prewarm", help="Parse repos in `RepoPaths` into the cache.")
+    prewarm.add_argument("repos", type=str, nargs="*",
+                         help="`RepoPaths` names (default: all existing repos).")
+    prewarm.add_argument("--workers", type=int, default=None)
+    sub.add_parser("stats", help="Show the number and size of entries.")
+    sub.add_parser("clear", help="Remove all entries.")
+    args = parser.parse_args()
+
+    max_bytes = args.max_size_mb * 2**20 if args.max_size_mb is not None else None
+    cache = ParseCache(args.cache_dir, max_bytes=max_bytes)
+
+    if args.command == "stats":
+        count = sum(1 for _ in cache.entries())
+        print(f"{cache.root}: {count} entries, {cache.size / 2**20:.1f} MiB")
+
+    elif args.command == "clear":
+        cache.clear()
+        print(f"Cleared {cache.root}")
+
+    elif args.command == "prewarm":
+        repos = dict(RepoPaths.iter_repos())
+        names = args.repos or [name for name, path in repos.items() if path.exists()]
+        unknown = [name for name in names if name not in repos]
+        if unknown:
+            raise ValueError(f"Unknown repos {unknown}. Supported repos: {list(repos)}")
+        for name in names:
+            stime = time.perf_counter()
+            _, report = load_csources(CRepo(repos[name]).files(),
+                                      workers=args.workers, cache=cache)
+            hits = sum(f.cached for f in report.files)
+            print(f"{name}: {len(report.files)} files, {hits} already cached, "
+                  f"{time.perf_counter() - stime:.2f}s")
+        print(f"{cache.root}: {cache.size / 2**20:.1f} MiB")
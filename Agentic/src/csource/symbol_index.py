@@ -0,0 +1,205 @@
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from .csource import CSource
+from .w_components import SymbolSearchResult, EXCLUSIVE_SYMBOLS, SEARCH_GROUPS
+
+
+# `search_by_name` matches these groups against the name stripped of
+# ``struct``/``union``/``enum``, the others against the name as given.
+_NORMALIZED_GROUPS = frozenset(('composite_types', 'type_aliases'))
+_TAG_KEYWORDS = ('struct', 'union', 'enum')
+
+# Scopes (``within`` mappings) whose ranks are kept, see `_ranks`
+_MAX_SCOPES = 8
+
+
+def _normalized(name: str) -> str:
+    return ' '.join(p for p in name.split() if p not in _TAG_KEYWORDS)
+
+
+class RepoSymbolIndex:
+    """
+    Inverted index from symbol name to the components defining it across a
+    repository, built once from a ``{path: CSource}`` mapping. `search`
+    yields what calling `CSource.search_by_name` on every source would, in
+    the same order, but only touches the sources where the name occurs.
+
+    Postings are flat ``array('i')`` triples of (source, group, row), rows
+    indexing the `ComponentTable` of that group. Struct/union fields are
+    indexed apart, as (source, row) pairs, to find the types owning a
+    member (`member_owners`). The sources must not be replaced after the
+    index is built, nor the ``within`` mappings once searched: the rank of
+    every source in a scope is computed on its first search only.
+    """
+
+    def __init__(self, csource_dict: Mapping[Path, CSource]) -> None:
+        self._mapping = csource_dict
+        self._sources: Tuple[Tuple[Path, CSource], ...] = tuple(csource_dict.items())
+        postings: Dict[str, array] = {}
+        members: Dict[str, array] = {}
+        for si, (_, cs) in enumerate(self._sources):
+            cs.prewarm(*SEARCH_GROUPS, 'fields')
+            for gi, group in enumerate(SEARCH_GROUPS):
+                for row, name in enumerate(getattr(cs, group).values('name')):
+                    if name is None:
+                        continue
+                    posting = postings.get(name)
+                    if posting is None:
+                        posting = postings[name] = array('i')
+                    posting.extend((si, gi, row))
+            for row, name in enumerate(cs.fields.values('name')):
+                if name is None:
+                    continue
+                posting = members.get(name)
+                if posting is None:
+                    posting = members[name] = array('i')
+                posting.extend((si, row))
+        self._postings = postings
+        self._members = members
+        self._positions: Dict[Path, int] = {
+            path: si for si, (path, _) in enumerate(self._sources)}
+        # id(within) -> (within, rank of each source or -1)
+        self._scopes: Dict[int, Tuple[Mapping[Path, Any], array]] = {}
+
+    def _ranks(self, within: Optional[Mapping[Path, Any]]) -> Optional[array]:
+        """Position in ``within`` of each source, -1 if absent; None if all are."""
+        if within is None or within is self._mapping:
+            return None
+        cached = self._scopes.get(id(within))
+        if cached is not None and cached[0] is within:
+            return cached[1]
+        ranks = array('i', [-1]) * len(self._sources)
+        positions = self._positions
+        for r, path in enumerate(within):
+            si = positions.get(path)
+            if si is not None:
+                ranks[si] = r
+        if len(self._scopes) >= _MAX_SCOPES:
+            del self._scopes[next(iter(self._scopes))]
+        # Holding ``within`` keeps its id from being reused
+        self._scopes[id(within)] = (within, ranks)
+        return ranks
+
+    def __len__(self) -> int:
+        """Number of distinct names."""
+        return len(self._postings)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._postings or _normalized(name) in self._postings
+
+    def search(
+            self, name: str,
+            within: Optional[Mapping[Path, Any]] = None,
+    ) -> Iterator[Tuple[Path, CSource, SymbolSearchResult]]:
+        """
+        ``(path, source, search_by_name(name))`` of every source defining
+        ``name``. ``within`` restricts the search to its paths, yielded in
+        its order instead of the index's (e.g. a ranked subset).
+        """
+        if name in EXCLUSIVE_SYMBOLS:
+            return
+        normalized = _normalized(name)
+        # source -> rows of each group
+        hits: Dict[int, List[List[int]]] = {}
+        for key, normalized_groups in ((name, False), (normalized, True)):
+            posting = self._postings.get(key)
+            if posting is None:
+                continue
+            for i in range(0, len(posting), 3):
+                si, gi, row = posting[i], posting[i + 1], posting[i + 2]
+                if (SEARCH_GROUPS[gi] in _NORMALIZED_GROUPS) != normalized_groups:
+                    continue
+                rows = hits.get(si)
+                if rows is None:
+                    rows = hits[si] = [[] for _ in SEARCH_GROUPS]
+                rows[gi].append(row)
+
+        order: Iterable[int] = sorted(hits)
+        ranks = self._ranks(within)
+        if ranks is not None:
+            order = [si for _, si in sorted(
+                (ranks[si], si) for si in hits if ranks[si] >= 0)]
+
+        for si in order:
+            path, cs = self._sources[si]
+            rows = hits[si]
+            yield path, cs, SymbolSearchResult(**{
+                group: [getattr(cs, group)[row] for row in rows[gi]]
+                for gi, group in enumerate(SEARCH_GROUPS)
+            })
+
+    def member_owners(
+            self, member: str,
+            within: Optional[Mapping[Path, Any]] = None,
+    ) -> List[str]:
+        """
+        Names of the structs/unions declaring a field ``member``, e.g. to
+        find the type behind gcc's "request for member" error: their tag,
+        or their typedef name if anonymous, both found by `search`.
+        ``within`` restricts and orders the sources as in `search`.
+        """
+        posting = self._members.get(member)
+        if posting is None:
+            return []
+        pairs = [(posting[i], posting[i + 1]) for i in range(0, len(posting), 2)]
+        ranks = self._ranks(within)
+        if ranks is not None:
+            pairs = sorted(((si, row) for si, row in pairs if ranks[si] >= 0),
+                           key=lambda p: ranks[p[0]])
+        owners: Dict[str, None] = {}
+        for si, row in pairs:
+            info = self._sources[si][1].fields[row]
+            if info.owner is None:
+                continue
+            owners.setdefault(info.owner)
+        return list(owners)
+
+
+if __name__ == "__main__":
+    import argparse
+    import random
+    import time
+
+    from .loader import load_csources
+    from ..crepo import CRepo
+    from ..design_construct.symbol_reference import prepare_symbol_reference
+
+    parser = argparse.ArgumentParser(
+        description="Symbol lookups: scanning every source vs `RepoSymbolIndex`."
+    )
+    parser.add_argument("repo", type=str, help="Repository root.")
+    parser.add_argument("--symbols", type=int, default=200,
+                        help="Number of names looked up (sampled from the repo).")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    csource_dict, report = load_csources(CRepo(args.repo).files())
+    print(report.__str__().splitlines()[0])
+
+    stime = time.perf_counter()
+    index = RepoSymbolIndex(csource_dict)
+    t_build = time.perf_counter() - stime
+
+    names = sorted(index._postings)
+    random.Random(args.seed).shuffle(names)
+    # Sampled names plus a few that are absent or tag-qualified
+    names = names[:args.symbols] + ["__no_such_symbol__", "struct " + names[0]]
+
+    # Placeholder tokens are random, leave them out of the comparison
+    stime = time.perf_counter()
+    scanned = [prepare_symbol_reference(n, csource_dict, use_code_placeholder=False)
+               for n in names]
+    t_scan = time.perf_counter() - stime
+
+    stime = time.perf_counter()
+    indexed = [prepare_symbol_reference(n, csource_dict, use_code_placeholder=False,
+                                        index=index)
+               for n in names]
+    t_index = time.perf_counter() - stime
+
+    same = scanned == indexed
+    print(f"{len(csource_dict)} sources, {len(index)} names, index built in {t_build:.2f}s")
+    print(f"{len(names)} lookups  scan {t_scan * 1e3 / len(names):8.2f} ms/lookup  "
+          f"index {t_index * 1e3 / len(names):8.2f} ms/lookup  identical: {same}")
@@ -0,0 +1,77 @@
+import random
+from pathlib import Path
+
+import pytest
+
+from .csource import CSource
+from ..parser.components import COMPONENT_GROUPS
+
+
+FIXTURES = sorted((Path(__file__).resolve().parents[1] / 'parser' / 'tests').glob('*.c'))
+
+DESIGN = b"""\
+#include "design.h"
+#define LIMIT 16
+typedef struct point { int x; int y; } point_t;
+enum mode { MODE_A, MODE_B };
+static int counter = LIMIT;
+int helper(int a);
+int helper(int a) { return a + counter; }
+static point_t origin = { 0, 0 };
+"""
+
+# Insertions that leave the source malformed, as mid-search designs are
+BROKEN = [
+    b'}', b'{', b'int (', b'struct Q { int a;', b'#if X\n', b'/* open',
+    b'static int f(void) { return', b'typedef ;', b'"',
+]
+WELL_FORMED = [
+    b'', b'int zz;\n', b'/* c */', b'\nstruct Q { int a; };\n',
+    b'\nstatic int added_fn(int q) { return q; }\n#define ZZ 1\n',
+]
+
+
+def _assert_same_as_fresh(edited: CSource) -> None:
+    fresh = CSource(edited.as_bytes)
+    fresh.prewarm()
+    for group in COMPONENT_GROUPS:
+        assert list(getattr(edited, group)) == list(getattr(fresh, group)), group
+
+
+def _random_edits(source: bytes, seed: int, inserts: list, steps: int = 12):
+    rnd = random.Random(seed)
+    cs = CSource(source)
+    cs.prewarm()
+    for _ in range(steps):
+        b = cs.as_bytes
+        start = rnd.randrange(len(b) + 1)
+        end = min(len(b), start + rnd.randrange(60))
+        if rnd.random() < 0.5:
+            cs = cs.edit([((start, end), rnd.choice(inserts).decode())])
+        else:
+            cs = cs.with_source(b[:start] + rnd.choice(inserts) + b[end:])
+        yield cs
+
+
+@pytest.mark.parametrize('path', FIXTURES, ids=lambda p: p.name)
+def test_edits_match_fresh_parse(path):
+    for seed in range(3):
+        for edited in _random_edits(path.read_bytes(), seed, WELL_FORMED + BROKEN):
+            _assert_same_as_fresh(edited)
+
+
+def test_design_edits_match_fresh_parse():
+    for seed in range(20):
+        for edited in _random_edits(DESIGN, seed, WELL_FORMED + BROKEN):
+            _assert_same_as_fresh(edited)
+
+
+def test_broken_design_is_parsed_afresh():
+    cs = CSource(DESIGN)
+    cs.prewarm()
+    broken = cs.with_source(DESIGN.replace(b'int helper(int a) {', b'int helper(int a) {{'))
+    assert broken.root.has_error
+    _assert_same_as_fresh(broken)
+    repaired = broken.with_source(DESIGN + b'int extra;\n')
+    assert not repaired.root.has_error
+    _assert_same_as_fresh(repaired)
@@ -0,0 +1,33 @@
+import pickle
+
+import pytest
+
+from .csource import CSource
+from .parse_cache import content_key
+
+
+SOURCE = b'#include <stdio.h>\nint counter;\nint main(void) { return counter; }\n'
+
+
+def test_mapped_source_matches_read_source(tmp_path):
+    path = tmp_path / 'main.c'
+    path.write_bytes(SOURCE)
+    with CSource.from_file(path, mmap_threshold=1) as mapped:
+        assert mapped.is_mapped
+        assert mapped.as_bytes == SOURCE
+        assert mapped.as_bytes is mapped.as_bytes
+        assert content_key(mapped.buffer) == content_key(SOURCE)
+        edited = mapped.with_source(SOURCE + b'int extra;\n')
+        assert [g.name for g in edited.global_variables] == ['counter', 'extra']
+    with pytest.raises(ValueError):
+        mapped.buffer[:1]
+
+
+def test_mapped_source_is_not_pickled(tmp_path):
+    path = tmp_path / 'main.c'
+    path.write_bytes(SOURCE)
+    with CSource.from_file(path, mmap_threshold=1, detached=True) as mapped:
+        with pytest.raises(TypeError, match="pickle its `as_bytes`"):
+            pickle.dumps(mapped)
+    read = CSource.from_file(path, detached=True)
+    assert pickle.loads(pickle.dumps(read)).functions == read.functions
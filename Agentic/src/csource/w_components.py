@@ -1,34 +1,51 @@
-from typing import NamedTuple, Union
+import time
+from functools import cached_property
+from mmap import mmap
+from typing import Dict, Iterable, Mapping, NamedTuple, Optional, Union
+
+from tree_sitter import Tree
 
 from .base import CSourceAST
 from ..parser.components import (
     extract_comments,
     extract_conditionals,
-    extract_functions, FunctionInfo,
+    ConditionalIndex,
+    FunctionInfo,
     extract_includes,
-    extract_global_declerators, GlobalVariableInfo, FunctionDecleratorInfo,
-    extract_type_aliases, TypeAlias,
-    extract_composite_types, CompositeTypeInfo,
-    extract_preproc_defs, PreprocDefInfo,
+    GlobalVariableInfo, FunctionDecleratorInfo,
+    TypeAlias,
+    CompositeTypeInfo,
+    PreprocDefInfo,
+    EnumeratorInfo, FieldInfo,
+    ExtractedComponents, COMPONENT_GROUPS, COMPONENT_KINDS, EXTRACTION_BACKENDS,
+    ComponentTable, update_components,
 )
+from ..parser.components.fallback import extract_components_by_regex
+from ..parser.tslang import ParseTimeout
+from ..parser.source_edit import Replacement, SourceEdit, apply_replacements
 
 
 class CSourceComments(CSourceAST):
-    def __init__(self, source: Union[str, bytes]) -> None:
-        super().__init__(source)
-        self.comments = tuple(extract_comments(self.root, self.as_bytes))
+    @cached_property
+    def comments(self):
+        return tuple(extract_comments(self.root, self.buffer))
 
 
 class CSourceConditionals(CSourceAST):
-    def __init__(self, source: Union[str, bytes]) -> None:
-        super().__init__(source)
-        self.conditionals = tuple(extract_conditionals(self.root, self.as_bytes))
-        
+    @cached_property
+    def conditionals(self):
+        return tuple(extract_conditionals(self.root, self.buffer))
+
+    @cached_property
+    def conditional_index(self) -> ConditionalIndex:
+        """Index of the `conditionals` regions, see `ConditionalIndex`."""
+        return ConditionalIndex(self.conditionals)
+
 
 class CSourceIncludes(CSourceAST):
-    def __init__(self, source: Union[str, bytes]) -> None:
-        super().__init__(source)
-        self.includes = tuple(extract_includes(self.root, self.as_bytes))
+    @cached_property
+    def includes(self):
+        return tuple(extract_includes(self.root, self.buffer))
 
 
 class SymbolSearchResult(NamedTuple):
@@ -38,9 +55,11 @@ class SymbolSearchResult(NamedTuple):
     preproc_defs: list[PreprocDefInfo]
     composite_types: list[CompositeTypeInfo]
     type_aliases: list[TypeAlias]
+    enumerators: list[EnumeratorInfo]
 
 
-_EXCLUSIVE_SYMBOLS = (
+# Names never searched for, e.g. compiler extensions gcc reports as symbols
+EXCLUSIVE_SYMBOLS = (
     '__attribute__',
     '__declspec',
     '__cdecl',
@@ -50,59 +69,208 @@ _EXCLUSIVE_SYMBOLS = (
     '__vectorcall',
 )
 
+# Groups touched by `search_by_name`, warmed together in a single walk.
+SEARCH_GROUPS = (
+    'functions', 'function_declerators', 'global_variables',
+    'preproc_defs', 'composite_types', 'type_aliases', 'enumerators',
+)
+
+
+def _component_group(name: str) -> cached_property:
+    def getter(self: "CSourceComponents"):
+        self.prewarm(name)
+        return self.__dict__[name]
+    getter.__name__ = name
+    return cached_property(getter)
+
+
 class CSourceComponents(CSourceComments, CSourceConditionals, CSourceIncludes):
-    def __init__(self, source: Union[str, bytes]) -> None:
-        super().__init__(source)
+    """
+    A parsed C source whose component groups (`COMPONENT_GROUPS`) are
+    extracted on first access and cached. Use `prewarm` to extract several
+    groups with a single tree walk. ``backend`` picks the extraction
+    implementation from `EXTRACTION_BACKENDS`. With ``detached``, all groups
+    are extracted up front and the tree is released (see `detach`).
+    ``components`` seeds groups extracted elsewhere, e.g. by a worker
+    process; a detached source seeded with every group is never parsed.
+
+    ``time_budget`` (seconds) bounds parsing plus the extraction of every
+    group, done up front. A source that exceeds it is `is_degraded`: its
+    tree is dropped and the groups come from `extract_components_by_regex`,
+    i.e. only macro definitions, includes and function definitions. That
+    fallback gets the same budget again, past which it keeps what it found.
+    """
+
+    is_degraded: bool = False
+
+    def __init__(
+            self, source: Union[str, bytes, mmap],
+            *,
+            prewarm: Optional[Iterable[str]] = None,
+            backend: str = 'walk',
+            old_tree: Optional[Tree] = None,
+            detached: bool = False,
+            components: Optional[Mapping[str, Optional[Iterable]]] = None,
+            time_budget: Optional[float] = None,
+    ) -> None:
+        if backend not in EXTRACTION_BACKENDS:
+            raise ValueError(f"Unknown extraction backend: {backend!r}. "
+                             f"Expected any of {tuple(EXTRACTION_BACKENDS)}.")
+        self._backend = backend
+        self._extract = EXTRACTION_BACKENDS[backend]
+
+        seeded_all = components is not None and all(
+            components.get(group) is not None for group in COMPONENT_GROUPS)
+        deadline = None if time_budget is None else time.perf_counter() + time_budget
+        try:
+            super().__init__(source, old_tree=old_tree,
+                             parse=not (detached and seeded_all), timeout=time_budget)
+            if components is not None:
+                self._store_components(components)
+            if deadline is not None:
+                self.prewarm(deadline=deadline)
+        except ParseTimeout:
+            self._degrade(components, time.perf_counter() + time_budget)
+        if prewarm is not None:
+            self.prewarm(*prewarm)
+        if detached:
+            self.detach()
 
-        self.functions = tuple(
-            fd 
-            for fd in extract_functions(self.root, self.as_bytes)
-            if fd.compound_span is not None
+    comments = _component_group('comments')
+    conditionals = _component_group('conditionals')
+    includes = _component_group('includes')
+    functions = _component_group('functions')
+    function_declerators = _component_group('function_declerators')
+    global_variables = _component_group('global_variables')
+    type_aliases = _component_group('type_aliases')
+    composite_types = _component_group('composite_types')
+    preproc_defs = _component_group('preproc_defs')
+    enumerators = _component_group('enumerators')
+    fields = _component_group('fields')
+
+    def prewarm(self, *groups: str, deadline: Optional[float] = None) -> None:
+        """
+        Extract the given component groups (all of them if none is given)
+        in one walk, skipping the ones already cached. ``deadline`` is a
+        `time.perf_counter` value past which `ParseTimeout` is raised.
+        """
+        missing = [g for g in (groups or COMPONENT_GROUPS) if g not in self.__dict__]
+        if not missing:
+            return
+        self._store_components(
+            self._extract(self.root, self.buffer, groups=missing,
+                          deadline=deadline)._asdict()
+        )
+
+    def _degrade(self, components: Optional[Mapping[str, Optional[Iterable]]],
+                 deadline: float) -> None:
+        self._tree = None
+        self.is_degraded = True
+        if components is not None:
+            self._store_components(components)
+        self._store_components(
+            extract_components_by_regex(self.buffer, deadline=deadline)._asdict())
+
+    def detach(self) -> None:
+        """
+        Extract every component group, then release the syntax tree. Only
+        spans and names are kept; tree access reparses transparently.
+        """
+        self.prewarm()
+        super().detach()
+
+    def with_source(self, source: Union[str, bytes]) -> "CSourceComponents":
+        """
+        A new source object for ``source``, reparsed incrementally from this
+        one: the region between the common prefix and suffix is treated as a
+        single edit, and the cached component groups are carried over with
+        only the touched top-level nodes re-extracted. If either version
+        has syntax errors, the new one is parsed afresh instead.
+        """
+        new_bytes = source.encode("utf-8") if isinstance(source, str) else source
+        return self._edited(new_bytes, SourceEdit.between(self.as_bytes, new_bytes))
+
+    def edit(self, replacements: Iterable[Replacement]) -> "CSourceComponents":
+        """
+        Like `with_source`, with the new source given as non-overlapping
+        ``((start_byte, end_byte), text)`` replacements of this one.
+        """
+        new_bytes, edit = apply_replacements(self.as_bytes, replacements)
+        return self._edited(new_bytes, edit)
+
+    def _edited(self, new_bytes: bytes, edit: Optional[SourceEdit]) -> "CSourceComponents":
+        if edit is None:
+            return self
+        old_tree = edit.apply_to(self.tree)
+        edited = type(self)(new_bytes, backend=self._backend, old_tree=old_tree)
+        if old_tree.root_node.has_error or edited.root.has_error:
+            # Error recovery may place top-level boundaries differently than
+            # a fresh parse would, so broken code is parsed from scratch.
+            return type(self)(new_bytes, backend=self._backend)
+        cached = ExtractedComponents(
+            **{group: self.__dict__.get(group) for group in COMPONENT_GROUPS}
         )
-        self.type_aliases = tuple(extract_type_aliases(self.root, self.as_bytes))
-        self.composite_types = tuple(extract_composite_types(
-            self.root, self.as_bytes,
-            ignore_anonymous=False,
-            ignore_forward_declarations=False,
-        ))
-        _func_decl, _glob_var = extract_global_declerators(self.root, self.as_bytes)
-        self.function_declerators = tuple(_func_decl)
-        self.global_variables = tuple(_glob_var)
-        self.preproc_defs = tuple(extract_preproc_defs(self.root, self.as_bytes))
+        edited._store_components(update_components(
+            cached, edit, edited.root, edited.buffer,
+            old_tree.changed_ranges(edited.tree),
+            extract=self._extract,
+        )._asdict())
+        return edited
+
+    def components(self) -> Dict[str, ComponentTable]:
+        """The component groups extracted so far."""
+        return {group: self.__dict__[group]
+                for group in COMPONENT_GROUPS if group in self.__dict__}
+
+    def _store_components(self, components: Mapping[str, Optional[Iterable]]) -> None:
+        for group, items in components.items():
+            if items is None or group in self.__dict__:
+                continue
+            if isinstance(items, ComponentTable):
+                # Already stored by a `CSourceComponents`
+                self.__dict__[group] = items
+                continue
+            if group == 'functions':
+                # Only definitions, declarations are `function_declerators`
+                items = (fd for fd in items if fd.compound_span is not None)
+            self.__dict__[group] = ComponentTable(COMPONENT_KINDS[group], items)
 
     def search_by_name(
             self, name: str,
     ):
-        if name in _EXCLUSIVE_SYMBOLS:
+        if name in EXCLUSIVE_SYMBOLS:
             return SymbolSearchResult(
                 functions=[],
                 function_declerators=[],
                 global_variables=[],
                 preproc_defs=[],
                 composite_types=[],
-                type_aliases=[]
+                type_aliases=[],
+                enumerators=[],
             )
         
+        self.prewarm(*SEARCH_GROUPS)
+
         # Functions
-        funcs = [func for func in self.functions if func.name == name]
-        func_decls = [decl for decl in self.function_declerators 
-                      if decl.name == name]
+        funcs = self.functions.where('name', name)
+        func_decls = self.function_declerators.where('name', name)
         
         # Variables
-        vars_ = [var for var in self.global_variables if var.name == name]
+        vars_ = self.global_variables.where('name', name)
 
         # Preproc defines
-        defines = [define for define in self.preproc_defs 
-                   if define.name == name]
+        defines = self.preproc_defs.where('name', name)
+
+        # Enum constants
+        enumerators = self.enumerators.where('name', name)
         
         # Composite types
         name_parts = name.split()
         name = ' '.join(p for p in name_parts if p not in ('struct', 'union', 'enum'))
-        composites = [comp for comp in self.composite_types if comp.name == name]
+        composites = self.composite_types.where('name', name)
         
         # Type aliases
-        aliases = [alias for alias in self.type_aliases 
-                   if alias.name == name]
+        aliases = self.type_aliases.where('name', name)
         
         return SymbolSearchResult(
             functions=funcs,
@@ -110,5 +278,10 @@ class CSourceComponents(CSourceComments, CSourceConditionals, CSourceIncludes):
             global_variables=vars_,
             preproc_defs=defines,
             composite_types=composites,
-            type_aliases=aliases
+            type_aliases=aliases,
+            enumerators=enumerators,
         )
+
+    def search_by_member(self, name: str) -> list[FieldInfo]:
+        """Fields named ``name``, each with the struct/union declaring it."""
+        return self.fields.where('name', name)
@@ -54,6 +54,13 @@ _DES_C_PH = r'{{__DESIGN_C__}}'
 _REF_PH = r'{{__REFERENCE_CODE_CONTEXT__}}'
 
 def _ref_format(ref: ReferenceItem):
+    guards = ref.metadata.get('guards')
+    if guards:
+        conditions = "; ".join(" / ".join(lines) for lines in guards)
+        return (
+            f"/* {ref.location} (under {conditions}) */\n"
+            + ref.source_snippet.strip()
+        )
     return (
         f"/* {ref.location} */\n"
         + ref.source_snippet.strip()
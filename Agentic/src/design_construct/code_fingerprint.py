@@ -1,11 +1,11 @@
 from __future__ import annotations
 
 import hashlib
-from tree_sitter import Node
+from functools import lru_cache
 
-from ..parser.tslang import get_parser, C_LANGUAGE
+from tree_sitter import Node
 
-_parser = get_parser(C_LANGUAGE)
+from ..parser.tslang import parse_c_source
 
 
 def _leaf_tokens(node: Node, buf: bytes):
@@ -30,7 +30,7 @@ def normalize_c_to_tokens(source: str | bytes) -> list[str]:
     - line continuations are spliced (ignored)
     """
     b = source.encode("utf-8") if isinstance(source, str) else source
-    tree = _parser.parse(b)
+    tree = parse_c_source(b)
     return list(_leaf_tokens(tree.root_node, b))
 
 
@@ -42,9 +42,11 @@ def normalize_c(source: str | bytes) -> str:
     return " ".join(normalize_c_to_tokens(source))
 
 
+@lru_cache(maxsize=8192)
 def fingerprint_c(source: str | bytes) -> str:
     """
     Stable hash of the canonical form (for quick equality checks).
+    Memoized, as the same snippets are fingerprinted on every lookup.
     """
     canon = normalize_c(source).encode("utf-8")
     return hashlib.sha256(canon).hexdigest()
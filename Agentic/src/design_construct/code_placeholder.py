@@ -78,6 +78,11 @@ def placeholder_preproc_def(
     return repl_range, replacement
 
 
+def global_variable_token(name: str) -> Token:
+    """A fresh placeholder token for the initializer of global ``name``."""
+    return f"_PH_{name.upper()}_INIT_{_r()}_"
+
+
 def placeholder_global_variable(
         gvti: GlobalVariableInfo
 ) -> Optional[Tuple[ReplRange, Token]]:
@@ -92,7 +97,7 @@ def placeholder_global_variable(
     if (init_end_row - init_start_row) < 3:
         return None
 
-    replacement = f"_PH_{gvti.name.upper()}_INIT_{_r()}_"
+    replacement = global_variable_token(gvti.name)
 
     # TODO: The init_list_span should start from the opening brace '{'
     # and end at the closing brace '}',
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import re
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Mapping, NamedTuple, Optional, Tuple
+
+from ..csource import CSource, RepoSymbolIndex, SymbolSearchResult
+from ..parser.components import HasSourceSpan
+
+
+# Comments and literals are matched so that they can be skipped; members
+# after ``.``/``->`` are not symbols of their own.
+_IDENTIFIER_RE = re.compile(
+    rb'//[^\n]*'
+    rb'|/\*.*?\*/'
+    rb'|"(?:\\.|[^"\\\n])*"'
+    rb"|'(?:\\.|[^'\\\n])*'"
+    rb'|(?<!\.)(?<!->)\b([A-Za-z_]\w*)',
+    flags=re.S,
+)
+
+_C_KEYWORDS = frozenset((
+    'auto', 'break', 'case', 'char', 'const', 'continue', 'default', 'define',
+    'defined', 'do', 'double', 'elif', 'else', 'endif', 'enum', 'error',
+    'extern', 'float', 'for', 'goto', 'if', 'ifdef', 'ifndef', 'include',
+    'inline', 'int', 'long', 'pragma', 'register', 'restrict', 'return',
+    'short', 'signed', 'sizeof', 'static', 'struct', 'switch', 'typedef',
+    'undef', 'union', 'unsigned', 'void', 'volatile', 'while', '_Bool',
+    '_Alignas', '_Alignof', '_Atomic', '_Generic', '_Noreturn',
+    '_Static_assert', '_Thread_local', '__inline', '__inline__', '__restrict',
+))
+
+
+def referenced_identifiers(text: bytes | memoryview) -> List[str]:
+    """Distinct identifiers of C ``text`` in order of appearance, keywords excluded."""
+    seen: Dict[str, None] = {}
+    for m in _IDENTIFIER_RE.finditer(text):
+        ident = m.group(1)
+        if ident is None:
+            continue
+        name = ident.decode('ascii')
+        if name not in _C_KEYWORDS:
+            seen.setdefault(name, None)
+    return list(seen)
+
+
+def _definitions(sr: SymbolSearchResult) -> List[HasSourceSpan]:
+    """The components of ``sr`` that define a symbol, as `prepare_symbol_reference` keeps them."""
+    found: List[HasSourceSpan] = []
+    found.extend(sr.functions or sr.function_declerators)
+    found.extend(sr.global_variables)
+    found.extend(sr.preproc_defs)
+    composites = [c for c in sr.composite_types if not c.is_forward_declaration()]
+    found.extend(composites or sr.type_aliases)
+    found.extend(sr.enumerators)
+    return found
+
+
+class DependencyClosure(NamedTuple):
+    """
+    Symbols a root symbol depends on, transitively. ``depths`` is in
+    breadth-first order, the root first at depth 0; ``edges`` gives the
+    symbols each one references directly; ``locations`` the source each one
+    was resolved in. ``truncated`` is set if a limit cut the walk short.
+    """
+    root: str
+    depths: Dict[str, int]
+    edges: Dict[str, Tuple[str, ...]]
+    locations: Dict[str, Path]
+    truncated: bool
+
+    def dependencies(self) -> List[str]:
+        """All symbols but the root, nearest first."""
+        return [name for name in self.depths if name != self.root]
+
+
+def dependency_closure(
+    root: str,
+    sources: Mapping[Path, CSource],
+    index: RepoSymbolIndex,
+    *,
+    max_symbols: int = 200,
+    max_depth: Optional[int] = None,
+) -> DependencyClosure:
+    """
+    Statically collect what ``root`` needs: the identifiers referenced by
+    its definitions (function bodies, initializers, macro bodies, struct
+    fields) that are defined in the repo, then theirs, and so on.
+
+    Each name is resolved in the first of ``sources`` defining it (pass
+    them ranked, e.g. by include distance) through ``index``. Identifiers
+    are matched textually, so a local variable sharing the name of a global
+    symbol is counted as a reference to it.
+    """
+    depths: Dict[str, int] = {root: 0}
+    edges: Dict[str, Tuple[str, ...]] = {}
+    locations: Dict[str, Path] = {}
+    truncated = False
+
+    queue = deque([root])
+    while queue:
+        name = queue.popleft()
+        depth = depths[name]
+        found = next(index.search(name, within=sources), None)
+        if found is None:
+            edges[name] = ()
+            continue
+        path, cs, sr = found
+        locations[name] = path
+
+        referenced: Dict[str, None] = {}
+        for item in _definitions(sr):
+            span = item.span
+            for ident in referenced_identifiers(cs.view(span.start_byte, span.end_byte)):
+                if ident != name and ident in index:
+                    referenced.setdefault(ident, None)
+        edges[name] = tuple(referenced)
+
+        if max_depth is not None and depth >= max_depth:
+            truncated = truncated or bool(referenced)
+            continue
+        for ident in referenced:
+            if ident in depths:
+                continue
+            if len(depths) >= max_symbols:
+                truncated = True
+                break
+            depths[ident] = depth + 1
+            queue.append(ident)
+
+    return DependencyClosure(root, depths, edges, locations, truncated)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from ..crepo import CRepo
+    from ..csource import load_csources
+    from .include_dependency import include_scope
+
+    parser = argparse.ArgumentParser(
+        description="Dependency closure of a function, resolved nearest first."
+    )
+    parser.add_argument("repo", type=str, help="Repository root.")
+    parser.add_argument("entry", type=str, help="File defining the function, relative to the repo.")
+    parser.add_argument("function", type=str)
+    parser.add_argument("--max-symbols", type=int, default=200)
+    args = parser.parse_args()
+
+    repo_root = Path(args.repo).resolve()
+    csource_dict, _ = load_csources(CRepo(repo_root).files(), base=repo_root)
+    index = RepoSymbolIndex(csource_dict)
+
+    stime = time.perf_counter()
+    ranked = {**include_scope(Path(args.entry), csource_dict), **csource_dict}
+    closure = dependency_closure(args.function, ranked, index,
+                                 max_symbols=args.max_symbols)
+    elapsed = time.perf_counter() - stime
+
+    by_depth: Dict[int, List[str]] = {}
+    for name, depth in closure.depths.items():
+        by_depth.setdefault(depth, []).append(name)
+    for depth, names in by_depth.items():
+        print(f"depth {depth}: {len(names):4d}  {' '.join(names[:12])}"
+              + (" ..." if len(names) > 12 else ""))
+    print(f"{len(closure.depths)} symbols in {elapsed * 1e3:.1f} ms"
+          + (" (truncated)" if closure.truncated else ""))
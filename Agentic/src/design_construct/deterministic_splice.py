@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Mapping, NamedTuple, Optional, Tuple
+
+from ..csource import CSource
+from .code_placeholder import replace_back_placeholder
+from .dependency_closure import referenced_identifiers
+from .symbol_reference import SymbolImplReference
+
+
+# Definitions holding conditional code are left to the LLM, which keeps
+# the branch that applies.
+_CONDITIONAL_RE = re.compile(
+    r'^[ \t]*#[ \t]*(?:if|ifdef|ifndef|elif|else|endif)\b', flags=re.M
+)
+
+# Categories of `SymbolImplReference.deterministic_resolve` going to the
+# header; functions and global variables go to the C file.
+_HEADER_CATEGORIES = frozenset(('preproc_def', 'composite_type', 'type_alias'))
+
+# Categories whose definition may bring names other than the symbol's
+# along: the constants and typedef names of an enum or struct, the other
+# declarators of a variable.
+_MULTI_NAME_CATEGORIES = frozenset(('composite_type', 'type_alias', 'global_variable'))
+
+# Groups of a design whose items may use a spliced symbol.
+_TOP_LEVEL_GROUPS = (
+    'functions', 'function_declerators', 'global_variables',
+    'preproc_defs', 'composite_types', 'type_aliases',
+)
+
+
+class SpliceCandidate(NamedTuple):
+    category: str
+    code: str
+
+
+def splice_candidate(ref: SymbolImplReference) -> Optional[SpliceCandidate]:
+    """
+    The definition of a symbol that can be copied into the design as is:
+    the single one `SymbolImplReference.deterministic_resolve` accepts,
+    with its placeholder restored, if it holds no conditional code.
+    """
+    resolved = ref.deterministic_resolve()
+    if resolved is None:
+        return None
+    category, item = resolved
+    code = item.source_snippet
+    if item.placeholder is not None:
+        code = replace_back_placeholder(
+            code.encode('utf-8'), [item.placeholder]
+        ).decode('utf-8', errors='ignore')
+    if _CONDITIONAL_RE.search(code):
+        return None
+    if category == 'composite_type' and not code.rstrip().endswith(';'):
+        # The span of a struct/union/enum specifier ends at its brace
+        code = code.rstrip() + ';'
+    return SpliceCandidate(category, code.strip())
+
+
+def _defines(cs: CSource, symbol: str) -> bool:
+    """
+    Whether ``cs`` defines ``symbol``; a prototype or a forward ``struct``
+    (e.g. the one of ``typedef struct S S;``) is no definition.
+    """
+    sr = cs.search_by_name(symbol)
+    return bool(
+        sr.functions or sr.global_variables or sr.preproc_defs
+        or sr.type_aliases or sr.enumerators
+        or any(not c.is_forward_declaration() for c in sr.composite_types)
+    )
+
+
+@lru_cache(maxsize=256)
+def _defined_names(category: str, code: str) -> FrozenSet[str]:
+    """
+    Names ``code`` defines besides the symbol it was found for, e.g. the
+    typedef name and constants of an enum. Only the categories that can
+    define several names are parsed, each snippet once.
+    """
+    if category not in _MULTI_NAME_CATEGORIES:
+        return frozenset()
+    cs = CSource(code, prewarm=('global_variables', 'type_aliases',
+                                'enumerators', 'composite_types'), detached=True)
+    names = {item.name for group in ('global_variables', 'type_aliases', 'enumerators')
+             for item in getattr(cs, group) if item.name}
+    names.update(c.name for c in cs.composite_types
+                 if c.name and not c.is_forward_declaration())
+    return frozenset(names)
+
+
+def _insertion_point(cs: CSource, symbol: str, candidate: SpliceCandidate) -> Optional[int]:
+    """
+    Start of the line of the first top-level item using ``symbol`` or
+    another name its ``candidate`` definition brings along, None if unused.
+    """
+    names = {symbol.split()[-1], *_defined_names(*candidate)}
+    first: Optional[int] = None
+    for group in _TOP_LEVEL_GROUPS:
+        for item in getattr(cs, group):
+            start = item.span.start_byte
+            if first is not None and start >= first:
+                continue
+            used = referenced_identifiers(cs.view(start, item.span.end_byte))
+            if not names.isdisjoint(used):
+                first = start
+    if first is None:
+        return None
+    return cs.buffer.rfind(b'\n', 0, first) + 1
+
+
+def _insert(cs: CSource, symbol: str, candidate: SpliceCandidate) -> CSource:
+    code = candidate.code
+    pos = _insertion_point(cs, symbol, candidate)
+    if pos is not None:
+        return cs.edit([((pos, pos), code + '\n\n')])
+    end = len(cs.buffer)
+    if end == 0:
+        return cs.edit([((0, 0), code + '\n')])
+    lead = '\n' if cs.buffer[end - 1:] == b'\n' else '\n\n'
+    return cs.edit([((end, end), lead + code + '\n')])
+
+
+def splice_definitions(
+    design_c: CSource,
+    design_h: CSource,
+    candidates: Mapping[str, SpliceCandidate],
+) -> Tuple[CSource, CSource, List[str]]:
+    """
+    Insert the ``candidates`` into the design without asking the LLM:
+    macros and types into the header, functions and global variables into
+    the C file. Each one goes right before the first item using it, or at
+    the end if nothing does, so that inserting one symbol after another
+    puts every definition ahead of its users. Symbols the design already
+    defines (e.g. as a stub to be replaced) are left out.
+
+    Returns the new C file and header and the symbols spliced.
+    """
+    spliced: List[str] = []
+    for symbol, candidate in candidates.items():
+        if _defines(design_c, symbol) or _defines(design_h, symbol):
+            continue
+        if candidate.category in _HEADER_CATEGORIES:
+            design_h = _insert(design_h, symbol, candidate)
+        else:
+            design_c = _insert(design_c, symbol, candidate)
+        spliced.append(symbol)
+    return design_c, design_h, spliced
+
+
+def partition_references(
+    refs: Mapping[str, SymbolImplReference],
+) -> Tuple[Dict[str, SpliceCandidate], List[str]]:
+    """Split ``refs`` into splice candidates and the symbols left to the LLM."""
+    candidates: Dict[str, SpliceCandidate] = {}
+    rest: List[str] = []
+    for symbol, ref in refs.items():
+        candidate = splice_candidate(ref)
+        if candidate is None:
+            rest.append(symbol)
+        else:
+            candidates[symbol] = candidate
+    return candidates, rest
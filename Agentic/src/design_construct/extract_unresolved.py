@@ -1,11 +1,9 @@
 from dataclasses import dataclass
 import re
-from typing import List, Pattern
+from typing import List, Optional, Pattern, Sequence
 from pathlib import Path
 import tempfile
 
-from requests_cache import Optional
-
 from ..utils.run_cmd import CommandRunner
 
 
@@ -16,6 +14,10 @@ class _SymbolType:
     UNDEFINED_REFERENCE = 'undefined_reference'
     INVALID_INCOMPLETE_TYPEDEF = 'invalid_incomplete_typedef'
     INVALID_USE_UNDEF_TYPE = 'invalid_use_undef_type'
+    # The symbol is the struct/union lacking the member
+    NO_MEMBER = 'no_member'
+    # The symbol is the member, its owner is unknown to gcc
+    MEMBER_REQUEST = 'member_request'
 
 
 _MappingTypeToErrorLog = {
@@ -25,6 +27,8 @@ _MappingTypeToErrorLog = {
     _SymbolType.UNDEFINED_REFERENCE: 'undefined reference',
     _SymbolType.INVALID_INCOMPLETE_TYPEDEF: 'invalid use of incomplete typedef',
     _SymbolType.INVALID_USE_UNDEF_TYPE: 'invalid use of undefined type',
+    _SymbolType.NO_MEMBER: 'has no member named',
+    _SymbolType.MEMBER_REQUEST: 'request for member in something not a structure or union',
 }
 
 
@@ -35,6 +39,7 @@ class UnresolvedSymbol:
     filename: str = ''
     line: int = -1
     column: int = -1
+    member: str = ''
 
     def title(self) -> str:
         return f"{self.symbol}: {_MappingTypeToErrorLog.get(self.type, 'unknown error')}"
@@ -44,6 +49,7 @@ def gcc_compile(
         c_file_name: str, c_contents: str, 
         h_file_name: str, h_contents: str,
         use_math_h: bool = False,
+        link_flags: Sequence[str] = (),
 ):
     with tempfile.TemporaryDirectory() as tmpdir:
         tmpdir = Path(tmpdir)
@@ -51,8 +57,9 @@ def gcc_compile(
         (tmpdir / h_file_name).write_text(h_contents)
 
         command = ['gcc', c_file_name]
-        if use_math_h:
+        if use_math_h and '-lm' not in link_flags:
             command.append('-lm')
+        command.extend(link_flags)
 
         rlt = CommandRunner.run(
             command=command,
@@ -111,8 +118,26 @@ _PATTERN_SPECS: List[_PatternSpec] = [
             re.MULTILINE,
         ),
     ),
+    _PatternSpec(
+        symbol_type=_SymbolType.NO_MEMBER,
+        # e.g. 'S' {aka 'const struct S_s'} has no member named 'x'
+        regex=re.compile(
+            r"^(?P<filename>.*?):(?P<line>\d+):(?P<column>\d+):\s*error\s*:\s*[`'‘’](?P<symbol>[^`'‘’]+)[`'‘’]"
+            r"(?:\s*\{aka\s*[`'‘’](?P<aka>[^`'‘’]+)[`'‘’]\})?\s*has no member named\s*[`'‘’](?P<member>[^`'‘’]+)[`'‘’]",
+            re.MULTILINE,
+        ),
+    ),
+    _PatternSpec(
+        symbol_type=_SymbolType.MEMBER_REQUEST,
+        regex=re.compile(
+            r"^(?P<filename>.*?):(?P<line>\d+):(?P<column>\d+):\s*error\s*:\s*request for member\s*[`'‘’](?P<symbol>[^`'‘’]+)[`'‘’]\s*in something not a structure or union",
+            re.MULTILINE,
+        ),
+    ),
 ]
 
+_QUALIFIER_RE = re.compile(r'\b(?:const|volatile|restrict)\s+')
+
 
 def _to_int(value: Optional[str]) -> Optional[int]:
     return int(value) if value is not None else None
@@ -124,7 +149,13 @@ def parse_gcc_unresolved_symbol(error_log: str) -> List[UnresolvedSymbol]:
 
     for spec in _PATTERN_SPECS:
         for match in spec.regex.finditer(error_log):
-            symbol = match.group("symbol")
+            groups = match.groupdict()
+            # The struct/union behind a typedef, qualifiers dropped; an
+            # anonymous one is only named by the typedef itself.
+            aka = groups.get("aka")
+            if aka is not None and '<anonymous>' in aka:
+                aka = None
+            symbol = _QUALIFIER_RE.sub('', aka or match.group("symbol")).strip()
             key = (spec.symbol_type, symbol)
             if key in seen:
                 continue
@@ -137,6 +168,8 @@ def parse_gcc_unresolved_symbol(error_log: str) -> List[UnresolvedSymbol]:
                     line=_to_int(match.groupdict().get("line")),
                     column=_to_int(match.groupdict().get("column")),
                     symbol=symbol,
+                    member=groups.get("member") or (
+                        symbol if spec.symbol_type == _SymbolType.MEMBER_REQUEST else ''),
                 )
             )
 
@@ -30,6 +30,8 @@ class ForwardDeclFinder:
 
     def __init__(self, labeled_csources: Iterable[LabeledCSource]):
         self._labeled_csources: List[LabeledCSource] = list(labeled_csources)
+        for _, csource in self._labeled_csources:
+            csource.prewarm('functions', 'function_declerators', 'composite_types')
 
     def find(self) -> ForwardDeclMap:
         """
@@ -31,7 +31,7 @@ def remove_forward_decls(
             merged_spans
         )
         new_source = remove_excessive_newlines(new_source)
-        new_sources.append(CSource(new_source))
+        new_sources.append(csource.with_source(new_source))
 
     return removed_symbols, new_sources
 
@@ -1,15 +1,24 @@
 from collections import deque
 from pathlib import Path
-from typing import Dict, Sequence, Set, Tuple
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Set, Tuple
 
-from ..include_resolve import determine_include_sources
+from ..include_resolve import IncludeResolver, is_standard_header, _strip_include
 from ..csource import CSource
+from .include_graph import IncludeGraph
+
+
+def _resolver_of(all_repo_files: Sequence[Path] | IncludeResolver) -> IncludeResolver:
+    if isinstance(all_repo_files, IncludeResolver):
+        return all_repo_files
+    return IncludeResolver(all_repo_files)
 
 
 def collect_include_dependencies(
     root: Path,
-    all_repo_files: Sequence[Path],
+    all_repo_files: Sequence[Path] | IncludeResolver,
     sources: Dict[Path, CSource],
+    *,
+    graph: Optional[IncludeGraph] = None,
 ) -> Tuple[Set[str], Dict[Path, CSource]]:
     """
     Walk the include graph starting at ``root`` and collect:
@@ -22,9 +31,14 @@ def collect_include_dependencies(
     root:
         Entry translation unit for the traversal.
     all_repo_files:
-        Repository files that can satisfy non-standard include directives.
+        Repository files that can satisfy non-standard include directives,
+        or an `IncludeResolver` built from them to reuse across calls.
     sources:
         Mapping from translation unit paths to parsed ``CSource`` objects.
+    graph:
+        The `IncludeGraph` of the repo. The reachable files are then read
+        off its precomputed closure instead of walking the includes, and
+        come in the order of `IncludeGraph.files`.
 
     Returns
     -------
@@ -37,6 +51,16 @@ def collect_include_dependencies(
     KeyError
         If ``root`` or any reachable file is not present in ``sources``.
     """
+    if graph is not None and root in graph:
+        reached = {path: sources[path] for path in graph.reachable(root)}
+        std_targets = {
+            include_info.include_target
+            for cs in reached.values() for include_info in cs.includes
+            if is_standard_header(_strip_include(include_info.include_target))
+        }
+        return std_targets, reached
+
+    resolver = _resolver_of(all_repo_files)
     queue = deque([root])
     discovered: Set[Path] = {root}
     visited: Set[Path] = set()
@@ -54,10 +78,9 @@ def collect_include_dependencies(
         resolved_sources[current_path] = current_csource
 
         for include_info in current_csource.includes:
-            is_std, local, candidates = determine_include_sources(
+            is_std, local, candidates = resolver.determine(
                 include_info.include_target,
                 current_path,
-                all_repo_files,
             )
 
             if is_std:
@@ -71,3 +94,91 @@ def collect_include_dependencies(
                     discovered.add(next_path)
 
     return std_includes, resolved_sources
+
+
+def include_distances(
+    root: Path,
+    all_repo_files: Sequence[Path] | IncludeResolver,
+    sources: Mapping[Path, CSource],
+    *,
+    with_implementations: bool = True,
+    graph: Optional[IncludeGraph] = None,
+) -> Dict[Path, int]:
+    """
+    Breadth-first counterpart of `collect_include_dependencies`: the number
+    of include hops from ``root`` to every repository file it reaches, in
+    order of distance. With ``with_implementations``, the ``.c`` files
+    sharing the stem of a reached header (``foo.h`` -> ``foo.c``) are added
+    at the header's distance, those in the header's directory first; their
+    own includes are not followed. ``graph``, the `IncludeGraph` of the
+    repo, spares resolving the includes again.
+    """
+    if graph is not None and root in graph:
+        distances = graph.distances(root)
+        if not with_implementations:
+            return distances
+        return _with_implementations(distances, graph.files)
+
+    resolver = _resolver_of(all_repo_files)
+    distances: Dict[Path, int] = {root: 0}
+    queue = deque([root])
+    while queue:
+        current_path = queue.popleft()
+        current_csource = sources.get(current_path)
+        if current_csource is None:
+            continue
+        for include_info in current_csource.includes:
+            is_std, local, candidates = resolver.determine(
+                include_info.include_target,
+                current_path,
+            )
+            if is_std:
+                continue
+            next_paths = (local,) if local is not None else candidates
+            for next_path in next_paths:
+                if next_path not in distances:
+                    distances[next_path] = distances[current_path] + 1
+                    queue.append(next_path)
+
+    if not with_implementations:
+        return distances
+    return _with_implementations(distances, resolver)
+
+
+def _with_implementations(
+    distances: Dict[Path, int],
+    all_repo_files: Iterable[Path],
+) -> Dict[Path, int]:
+    implementations: Dict[str, List[Path]] = {}
+    for path in all_repo_files:
+        if path.suffix == '.c':
+            implementations.setdefault(path.stem, []).append(path)
+    ranked: Dict[Path, int] = {}
+    for path, distance in distances.items():
+        ranked.setdefault(path, distance)
+        if path.suffix != '.h':
+            continue
+        for impl in sorted(implementations.get(path.stem, ()),
+                           key=lambda p: p.parent != path.parent):
+            ranked.setdefault(impl, distance)
+    # Stable: equally distant files keep their discovery order
+    return dict(sorted(ranked.items(), key=lambda item: item[1]))
+
+
+def include_scope(
+    root: Path,
+    sources: Mapping[Path, CSource],
+    resolver: Optional[IncludeResolver] = None,
+    graph: Optional[IncludeGraph] = None,
+) -> Dict[Path, CSource]:
+    """
+    The sources reachable from ``root`` (see `include_distances`), nearest
+    first, for symbol lookups that prefer what ``root`` can actually see.
+    ``resolver``, built from the paths of ``sources``, or their ``graph``
+    save indexing them again for every root of the same repo.
+    """
+    distances = include_distances(
+        root, resolver if resolver is not None else list(sources), sources,
+        graph=graph,
+    )
+    return {path: sources[path] for path in distances if path in sources}
@@ -0,0 +1,319 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+import tempfile
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+from ..csource import CSource, ParseCache
+from ..include_resolve import C17_HEADERS, UNIX_SYS_HEADERS, IncludeResolver
+
+
+GRAPH_VERSION = 1
+
+# What a graph depends on besides the files and their includes: its layout
+# and the headers left out as standard.
+_KEY_SALT = (
+    f"graph={GRAPH_VERSION};"
+    f"std={','.join(sorted(C17_HEADERS | UNIX_SYS_HEADERS))};"
+).encode()
+
+
+def graph_key(sources: Mapping[Path, CSource]) -> str:
+    """
+    Cache key of the include graph of ``sources``: hash of their paths and
+    include targets, and of the working directory if any path is relative,
+    as `IncludeResolver.in_current_dir` resolves against it.
+    """
+    digest = hashlib.sha256(_KEY_SALT)
+    if not all(Path(path).is_absolute() for path in sources):
+        digest.update(f"cwd={Path.cwd().as_posix()}\n".encode())
+    for path, cs in sources.items():
+        digest.update(Path(path).as_posix().encode())
+        for inc in cs.includes:
+            digest.update(b"\0")
+            digest.update(inc.include_target.encode())
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+def _strongly_connected(edges: Sequence[Sequence[int]]) -> Tuple[List[int], List[List[int]]]:
+    """
+    Tarjan's algorithm without recursion, include chains being deep. Returns
+    the component of every node and the members of every component; the
+    components come in reverse topological order, each one after all the
+    components it reaches.
+    """
+    n = len(edges)
+    index = [-1] * n
+    low = [0] * n
+    on_stack = [False] * n
+    stack: List[int] = []
+    component = [-1] * n
+    components: List[List[int]] = []
+    counter = 0
+
+    for start in range(n):
+        if index[start] != -1:
+            continue
+        index[start] = low[start] = counter
+        counter += 1
+        stack.append(start)
+        on_stack[start] = True
+        # (node, position of the next successor to visit)
+        work: List[Tuple[int, int]] = [(start, 0)]
+        while work:
+            v, i = work[-1]
+            successors = edges[v]
+            if i < len(successors):
+                work[-1] = (v, i + 1)
+                w = successors[i]
+                if index[w] == -1:
+                    index[w] = low[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    on_stack[w] = True
+                    work.append((w, 0))
+                elif on_stack[w] and index[w] < low[v]:
+                    low[v] = index[w]
+                continue
+            work.pop()
+            if work:
+                u = work[-1][0]
+                if low[v] < low[u]:
+                    low[u] = low[v]
+            if low[v] == index[v]:
+                members: List[int] = []
+                while True:
+                    w = stack.pop()
+                    on_stack[w] = False
+                    component[w] = len(components)
+                    members.append(w)
+                    if w == v:
+                        break
+                components.append(members)
+    return component, components
+
+
+class IncludeGraph:
+    """
+    Include graph of a whole repository, built once from every file's
+    includes (resolved as `include_distances` does) and condensed into
+    strongly connected components. The files reachable from each component
+    are precomputed as a bitset (an int, bit ``i`` for ``files[i]``), so
+    `reaches` is a constant-time test and `reachable` costs only its output.
+    A file reaches itself.
+
+    `cached` persists graphs next to a `ParseCache`, keyed by `graph_key`.
+    """
+
+    def __init__(
+            self,
+            files: Sequence[Path],
+            edges: Sequence[Sequence[int]],
+            *,
+            _condensed: Optional[Tuple[List[int], List[int]]] = None,
+    ) -> None:
+        self.files: Tuple[Path, ...] = tuple(files)
+        self._index: Dict[Path, int] = {path: i for i, path in enumerate(self.files)}
+        self._edges: Tuple[Tuple[int, ...], ...] = tuple(tuple(e) for e in edges)
+        if _condensed is None:
+            _condensed = self._condense()
+        self._component, self._closures = _condensed
+
+    def _condense(self) -> Tuple[List[int], List[int]]:
+        component, components = _strongly_connected(self._edges)
+        closures: List[int] = []
+        # Reverse topological order: the closures of successors are ready
+        for c, members in enumerate(components):
+            mask = 0
+            for v in members:
+                mask |= 1 << v
+            for v in members:
+                for w in self._edges[v]:
+                    cw = component[w]
+                    if cw != c:
+                        mask |= closures[cw]
+            closures.append(mask)
+        return component, closures
+
+    @classmethod
+    def build(
+            cls,
+            sources: Mapping[Path, CSource],
+            resolver: Optional[IncludeResolver] = None,
+    ) -> 'IncludeGraph':
+        """The include graph of ``sources``; ``resolver`` must be built from their paths."""
+        files = list(sources)
+        if resolver is None:
+            resolver = IncludeResolver(files)
+        index = {path: i for i, path in enumerate(files)}
+        edges: List[List[int]] = []
+        for path, cs in sources.items():
+            targets: Dict[int, None] = {}
+            for include_info in cs.includes:
+                is_std, local, candidates = resolver.determine(
+                    include_info.include_target, path,
+                )
+                if is_std:
+                    continue
+                for next_path in ((local,) if local is not None else candidates):
+                    target = index.get(next_path)
+                    if target is not None:
+                        targets.setdefault(target)
+            edges.append(list(targets))
+        return cls(files, edges)
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    def __contains__(self, path: object) -> bool:
+        return path in self._index
+
+    def includes(self, path: Path) -> List[Path]:
+        """Files ``path`` includes directly, in include order."""
+        return [self.files[w] for w in self._edges[self._index[path]]]
+
+    def component(self, path: Path) -> List[Path]:
+        """Files on an include cycle with ``path``, itself included."""
+        c = self._component[self._index[path]]
+        return [self.files[v] for v, cv in enumerate(self._component) if cv == c]
+
+    def reachable_mask(self, path: Path) -> int:
+        """Bitset of the files reachable from ``path``, bit ``i`` for ``files[i]``."""
+        return self._closures[self._component[self._index[path]]]
+
+    def reaches(self, source: Path, target: Path) -> bool:
+        """Whether ``source`` includes ``target``, directly or not."""
+        return bool(self.reachable_mask(source) >> self._index[target] & 1)
+
+    def reachable(self, path: Path) -> List[Path]:
+        """Files reachable from ``path``, in the order of `files`."""
+        mask = self.reachable_mask(path)
+        out: List[Path] = []
+        while mask:
+            low = mask & -mask
+            out.append(self.files[low.bit_length() - 1])
+            mask ^= low
+        return out
+
+    def distances(self, root: Path) -> Dict[Path, int]:
+        """Include hops from ``root`` to every file it reaches, breadth-first."""
+        start = self._index[root]
+        depth = {start: 0}
+        queue = deque([start])
+        while queue:
+            v = queue.popleft()
+            for w in self._edges[v]:
+                if w not in depth:
+                    depth[w] = depth[v] + 1
+                    queue.append(w)
+        return {self.files[v]: d for v, d in depth.items()}
+
+    # Persistence
+
+    def save(self, path: Path | str) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        state = {
+            "version": GRAPH_VERSION,
+            "files": [p.as_posix() for p in self.files],
+            "edges": self._edges,
+            "component": self._component,
+            "closures": self._closures,
+        }
+        # Written to a temporary file and renamed, as `ParseCache` entries are
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+    @classmethod
+    def load(cls, path: Path | str) -> Optional['IncludeGraph']:
+        """The graph saved at ``path``, None if missing or unreadable."""
+        try:
+            with open(path, "rb") as f:
+                state = pickle.load(f)
+            if state["version"] != GRAPH_VERSION:
+                return None
+            return cls(
+                [Path(p) for p in state["files"]],
+                state["edges"],
+                _condensed=(state["component"], state["closures"]),
+            )
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # From an incompatible layout, treat as a miss
+            return None
+
+    @classmethod
+    def cached(
+            cls,
+            sources: Mapping[Path, CSource],
+            cache: Optional[ParseCache] = None,
+            resolver: Optional[IncludeResolver] = None,
+    ) -> 'IncludeGraph':
+        """`build`, reusing the graph ``cache`` keeps for the same files and includes."""
+        if cache is None:
+            return cls.build(sources, resolver)
+        path = cache.root / "include_graph" / (graph_key(sources) + ".graph")
+        graph = cls.load(path)
+        if graph is None:
+            graph = cls.build(sources, resolver)
+            graph.save(path)
+        return graph
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from ..crepo import CRepo
+    from ..csource import load_csources
+    from .include_dependency import include_distances
+
+    parser = argparse.ArgumentParser(
+        description="Build the include graph of a repo and time reachability queries."
+    )
+    parser.add_argument("repo", type=str, help="Repository root.")
+    parser.add_argument("--cache", type=str, default=None,
+                        help="Parse cache directory to persist the graph in.")
+    args = parser.parse_args()
+
+    repo_root = Path(args.repo).resolve()
+    cache = ParseCache(args.cache) if args.cache else None
+    csource_dict, _ = load_csources(CRepo(repo_root).files(), base=repo_root, cache=cache)
+
+    stime = time.perf_counter()
+    graph = IncludeGraph.build(csource_dict)
+    build = time.perf_counter() - stime
+    sizes = [len(graph.component(p)) for p in graph.files]
+    print(f"{len(graph)} files, {sum(len(e) for e in graph._edges)} edges, "
+          f"{len(set(graph._component))} components (largest {max(sizes, default=0)}); "
+          f"built in {build * 1e3:.1f} ms")
+
+    if cache is not None:
+        stime = time.perf_counter()
+        IncludeGraph.cached(csource_dict, cache)
+        IncludeGraph.cached(csource_dict, cache)
+        print(f"  cached load: {(time.perf_counter() - stime) * 1e3:.1f} ms (incl. first save)")
+
+    stime = time.perf_counter()
+    for path in graph.files:
+        graph.reachable(path)
+    closures = time.perf_counter() - stime
+    resolver = IncludeResolver(csource_dict)
+    stime = time.perf_counter()
+    for path in graph.files:
+        include_distances(path, resolver, csource_dict, with_implementations=False)
+    walks = time.perf_counter() - stime
+    print(f"  reachable sets of every file: {closures * 1e3:.1f} ms "
+          f"(include walks: {walks * 1e3:.1f} ms)")
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING, Hashable, Mapping, NamedTuple, Optional
+
+from ..csource import CSource, RepoSymbolIndex
+from .symbol_reference import ReferenceItem, SymbolImplReference, prepare_symbol_reference
+
+if TYPE_CHECKING:
+    from .symbol_db import SymbolDatabase
+
+
+class ReferenceKey(NamedTuple):
+    repo: str
+    symbol: str
+    scope: Hashable             # which sources were searched, named by the caller
+    use_fingerprint: bool
+    use_code_placeholder: bool
+    with_guards: bool
+
+
+def _item_nbytes(item: ReferenceItem) -> int:
+    size = len(item.source_snippet)
+    if item.placeholder is not None:
+        size += len(item.placeholder.original_code)
+    return size
+
+
+def _copy(ref: SymbolImplReference) -> SymbolImplReference:
+    # Fresh lists, so that callers cannot alter the cached ones
+    return SymbolImplReference(*(list(items) for items in ref))
+
+
+class ReferenceCache:
+    """
+    LRU cache of `prepare_symbol_reference` results, shared across the
+    iterations of `search` and across the designs of one run. Entries are
+    keyed by `ReferenceKey`; the sources behind a (repo, scope) pair must
+    not change while cached.
+
+    Memory is bounded by ``max_entries`` and by ``max_bytes``, approximated
+    by the length of the snippets held.
+    """
+
+    def __init__(self, max_entries: int = 4096, max_bytes: int = 64 << 20) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[ReferenceKey, SymbolImplReference] = OrderedDict()
+        self._sizes: dict[ReferenceKey, int] = {}
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def prepare(
+        self,
+        symbol_name: str,
+        csource_dict: Optional[Mapping[Path, CSource]],
+        *,
+        repo: str,
+        scope: Hashable,
+        use_fingerprint: bool = True,
+        use_code_placeholder: bool = True,
+        with_guards: bool = False,
+        index: Optional[RepoSymbolIndex] = None,
+        database: Optional[SymbolDatabase] = None,
+    ) -> SymbolImplReference:
+        """
+        `prepare_symbol_reference`, reusing the result of an equal call.
+        ``repo`` both keys the entry and limits a ``database`` lookup.
+        """
+        key = ReferenceKey(repo, symbol_name, scope,
+                           use_fingerprint, use_code_placeholder, with_guards)
+        cached = self._entries.get(key)
+        if cached is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return _copy(cached)
+
+        self.misses += 1
+        ref = prepare_symbol_reference(
+            symbol_name, csource_dict,
+            use_fingerprint=use_fingerprint,
+            use_code_placeholder=use_code_placeholder,
+            with_guards=with_guards,
+            index=index,
+            database=database,
+            repo=repo,
+        )
+        size = sum(_item_nbytes(item) for item in ref.to_flattened_list())
+        self._entries[key] = ref
+        self._sizes[key] = size
+        self.nbytes += size
+        self._evict()
+        return _copy(ref)
+
+    def _evict(self) -> None:
+        while self._entries and (len(self._entries) > self.max_entries
+                                 or self.nbytes > self.max_bytes):
+            key, _ = self._entries.popitem(last=False)
+            self.nbytes -= self._sizes.pop(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._sizes.clear()
+        self.nbytes = 0
+
+    def __str__(self) -> str:
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0.0
+        return (f"ReferenceCache({len(self)} entries, {self.nbytes / 2**20:.1f} MiB, "
+                f"{self.hits}/{total} hits ({rate:.0%}))")
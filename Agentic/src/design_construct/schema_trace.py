@@ -61,6 +61,9 @@ class Diagnostics:
     unresolved_symbols: Tuple[str, ...]
     llm_indicated_missing_symbols: Tuple[str, ...] = ()
     gcc_extra_incomplete_types: Tuple[str, ...] = ()
+    # Names gcc stopped reporting once their standard header was included,
+    # see `diagnose`
+    std_resolved_symbols: Tuple[str, ...] = ()
 
     @property
     def all_unresolved_symbols(self) -> Tuple[str, ...]:
@@ -70,6 +73,9 @@ class Diagnostics:
                    set(self.llm_indicated_missing_symbols))
         # Filter out exclusive symbols
         symbols = [s for s in symbols if s not in _EXCLUSIVE_SYMBOLS]
+        # and the ones a standard header declares
+        if self.std_resolved_symbols:
+            symbols = [s for s in symbols if s not in self.std_resolved_symbols]
         return tuple(symbols)
 
     def to_json(self) -> dict:
@@ -79,6 +85,7 @@ class Diagnostics:
             'unresolved_symbols': self.unresolved_symbols,
             'gcc_extra_incomplete_types': self.gcc_extra_incomplete_types,
             'llm_indicated_missing_symbols': self.llm_indicated_missing_symbols,
+            'std_resolved_symbols': self.std_resolved_symbols,
         }
     
     @classmethod
@@ -90,6 +97,7 @@ class Diagnostics:
             unresolved_symbols=tuple(data['unresolved_symbols']),
             gcc_extra_incomplete_types=tuple(data.get('gcc_extra_incomplete_types', ())),
             llm_indicated_missing_symbols=tuple(data.get('llm_indicated_missing_symbols', ())),
+            std_resolved_symbols=tuple(data.get('std_resolved_symbols', ())),
         )
 
 
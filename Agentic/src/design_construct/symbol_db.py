@@ -0,0 +1,359 @@
+from __future__ import annotations
+
+import json
+import re
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Tuple, Union
+
+from ..csource import CSource, EXCLUSIVE_SYMBOLS, SEARCH_GROUPS
+from ..csource.parse_cache import DEFAULT_CACHE_DIR, content_key
+from ..parser.components import EXTRACTOR_VERSION
+from .code_fingerprint import fingerprint_c
+from .code_placeholder import placeholder_global_variable
+from .symbol_reference import guard_context
+
+
+DEFAULT_DB_PATH = DEFAULT_CACHE_DIR.parent / "symbols.sqlite"
+
+# Bumped whenever the tables below change; older databases are rebuilt.
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    repo TEXT NOT NULL,
+    path TEXT NOT NULL UNIQUE,
+    content_key TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS symbols (
+    name TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    row INTEGER NOT NULL,
+    start_byte INTEGER NOT NULL,
+    end_byte INTEGER NOT NULL,
+    start_row INTEGER NOT NULL,
+    end_row INTEGER NOT NULL,
+    snippet TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    is_static INTEGER NOT NULL,
+    is_extern INTEGER NOT NULL,
+    has_initialize INTEGER NOT NULL,
+    is_forward INTEGER NOT NULL,
+    init_start INTEGER,
+    init_end INTEGER,
+    guards TEXT
+);
+CREATE INDEX IF NOT EXISTS symbols_by_name ON symbols (name);
+CREATE INDEX IF NOT EXISTS symbols_by_file ON symbols (file_id);
+"""
+
+# As in `RepoSymbolIndex`: these groups match the name without its tag.
+_NORMALIZED_GROUPS = frozenset(('composite_types', 'type_aliases'))
+_TAG_KEYWORDS = ('struct', 'union', 'enum')
+
+_STATIC_RE = re.compile(r'\bstatic\b')
+_EXTERN_RE = re.compile(r'\bextern\b')
+
+
+def _normalized(name: str) -> str:
+    return ' '.join(p for p in name.split() if p not in _TAG_KEYWORDS)
+
+
+class SymbolRecord(NamedTuple):
+    """One definition of a symbol as stored in a `SymbolDatabase`."""
+    path: Path
+    kind: str                   # the `CSource` component group
+    name: str
+    snippet: str                # text of the span, not stripped
+    fingerprint: str            # `fingerprint_c` of the stripped snippet
+    start_byte: int
+    end_byte: int
+    start_row: int
+    end_row: int
+    is_static: bool
+    is_extern: bool
+    has_initialize: bool
+    is_forward: bool
+    # Characters of ``snippet`` replaced by a placeholder, if any
+    init_range: Optional[Tuple[int, int]]
+    guards: List[List[str]]     # `guard_context` of the span
+
+
+def _declaration_head(snippet: str, kind: str) -> str:
+    # Storage classes are read from the text ahead of the parameters
+    return snippet.split('(', 1)[0] if kind in ('functions', 'function_declerators') else ''
+
+
+def _records_of(path: Path, cs: CSource) -> Iterator[SymbolRecord]:
+    cs.prewarm(*SEARCH_GROUPS)
+    for kind in SEARCH_GROUPS:
+        for row, item in enumerate(getattr(cs, kind)):
+            if item.name is None:
+                continue
+            span = item.span
+            # Enumerators are referenced by the enum defining them
+            shown = item.definition_span if kind == 'enumerators' else span
+            snippet = cs.text_of(shown, errors="ignore")
+            head = _declaration_head(snippet, kind)
+            is_static = bool(_STATIC_RE.search(head))
+            is_extern = bool(_EXTERN_RE.search(head))
+            has_initialize = False
+            init_range = None
+            if kind == 'global_variables':
+                is_static, is_extern = item.is_static, item.is_extern
+                has_initialize = item.has_initialize
+                ph_info = placeholder_global_variable(item)
+                if ph_info is not None:
+                    (s, e), _ = ph_info
+                    start = len(cs.text_of((span.start_byte, s), errors="ignore"))
+                    init_range = (start, start + len(cs.text_of((s, e), errors="ignore")))
+            yield SymbolRecord(
+                path=path,
+                kind=kind,
+                name=item.name,
+                snippet=snippet,
+                fingerprint=fingerprint_c(snippet.strip()),
+                start_byte=span.start_byte,
+                end_byte=span.end_byte,
+                start_row=span.start_point.row,
+                end_row=span.end_point.row,
+                is_static=is_static,
+                is_extern=is_extern,
+                has_initialize=has_initialize,
+                is_forward=kind == 'composite_types' and item.is_forward_declaration(),
+                init_range=init_range,
+                guards=guard_context(cs, shown),
+            )
+
+
+class SymbolDatabase:
+    """
+    Persistent SQLite store of the symbol definitions of many repos, built
+    from their extracted components. Each definition is kept with its
+    snippet and fingerprint, so `prepare_symbol_reference` can run against
+    the database (``database=``) without any `CSource` loaded.
+
+    Paths are stored as given to `add_repo`, i.e. relative to the repos
+    base like the keys of ``load_csources(..., base=REPO_ABSOLUTE_BASE)``.
+    Databases from another schema or extractor version are emptied on open.
+    """
+
+    def __init__(self, path: Union[str, Path] = DEFAULT_DB_PATH) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.executescript(_SCHEMA)
+        version = f"schema={SCHEMA_VERSION};extractor={EXTRACTOR_VERSION}"
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if row is None or row[0] != version:
+            with self._conn:
+                self._conn.execute("DELETE FROM files")
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)",
+                    (version,))
+        self._paths: Optional[Dict[int, Path]] = None
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "SymbolDatabase":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def add_repo(self, repo: str, csource_dict: Mapping[Path, CSource]) -> Tuple[int, int]:
+        """
+        Replace the definitions of ``repo`` by those of ``csource_dict``.
+        Files whose content did not change are kept as they are. Returns the
+        number of files (re)indexed and removed.
+        """
+        known = {path: (file_id, key) for file_id, path, key in self._conn.execute(
+            "SELECT id, path, content_key FROM files WHERE repo = ?", (repo,))}
+        indexed = 0
+        with self._conn:
+            for path, cs in csource_dict.items():
+                name = Path(path).as_posix()
+                key = content_key(cs.buffer)
+                previous = known.pop(name, None)
+                if previous is not None:
+                    if previous[1] == key:
+                        continue
+                    self._conn.execute("DELETE FROM files WHERE id = ?", (previous[0],))
+                file_id = self._conn.execute(
+                    "INSERT INTO files (repo, path, content_key) VALUES (?, ?, ?)",
+                    (repo, name, key)).lastrowid
+                self._conn.executemany(
+                    "INSERT INTO symbols VALUES "
+                    "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    ((r.name, r.kind, file_id, row, r.start_byte, r.end_byte,
+                      r.start_row, r.end_row, r.snippet, r.fingerprint,
+                      r.is_static, r.is_extern, r.has_initialize, r.is_forward,
+                      *(r.init_range or (None, None)),
+                      json.dumps(r.guards) if r.guards else None)
+                     for row, r in enumerate(_records_of(Path(path), cs))))
+                indexed += 1
+            for file_id, _ in known.values():
+                self._conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+        self._paths = None
+        return indexed, len(known)
+
+    def repos(self) -> Dict[str, int]:
+        """Number of files of every repo in the database."""
+        return dict(self._conn.execute(
+            "SELECT repo, COUNT(*) FROM files GROUP BY repo ORDER BY repo"))
+
+    def paths(self, repo: Optional[str] = None) -> List[Path]:
+        """Stored files, of ``repo`` only if given, in the order they were added."""
+        if repo is None:
+            rows = self._conn.execute("SELECT path FROM files ORDER BY id")
+        else:
+            rows = self._conn.execute(
+                "SELECT path FROM files WHERE repo = ? ORDER BY id", (repo,))
+        return [Path(p) for p, in rows]
+
+    def _path_of(self, file_id: int) -> Path:
+        if self._paths is None:
+            self._paths = {i: Path(p) for i, p in self._conn.execute("SELECT id, path FROM files")}
+        return self._paths[file_id]
+
+    def lookup(self, name: str, repo: Optional[str] = None) -> List[SymbolRecord]:
+        """Every definition of ``name``, matched as `CSource.search_by_name` does."""
+        if name in EXCLUSIVE_SYMBOLS:
+            return []
+        normalized = _normalized(name)
+        query = ("SELECT s.name, s.kind, s.file_id, s.start_byte, s.end_byte, "
+                 "s.start_row, s.end_row, s.snippet, s.fingerprint, s.is_static, "
+                 "s.is_extern, s.has_initialize, s.is_forward, s.init_start, "
+                 "s.init_end, s.guards FROM symbols s JOIN files f ON f.id = s.file_id "
+                 "WHERE s.name IN (?, ?)")
+        params: List[object] = [name, normalized]
+        if repo is not None:
+            query += " AND f.repo = ?"
+            params.append(repo)
+        query += " ORDER BY s.file_id, s.row"
+
+        records: List[SymbolRecord] = []
+        for (rname, kind, file_id, start_byte, end_byte, start_row, end_row, snippet,
+             fingerprint, is_static, is_extern, has_initialize, is_forward,
+             init_start, init_end, guards) in self._conn.execute(query, params):
+            if rname != (normalized if kind in _NORMALIZED_GROUPS else name):
+                continue
+            records.append(SymbolRecord(
+                path=self._path_of(file_id),
+                kind=kind,
+                name=rname,
+                snippet=snippet,
+                fingerprint=fingerprint,
+                start_byte=start_byte,
+                end_byte=end_byte,
+                start_row=start_row,
+                end_row=end_row,
+                is_static=bool(is_static),
+                is_extern=bool(is_extern),
+                has_initialize=bool(has_initialize),
+                is_forward=bool(is_forward),
+                init_range=None if init_start is None else (init_start, init_end),
+                guards=json.loads(guards) if guards else [],
+            ))
+        return records
+
+    def search(
+            self, name: str,
+            within: Optional[Iterable[Path]] = None,
+            repo: Optional[str] = None,
+    ) -> Iterator[Tuple[Path, Dict[str, List[SymbolRecord]]]]:
+        """
+        ``(path, records by group)`` of every file defining ``name``, in the
+        order of `RepoSymbolIndex.search`: the order files were added, or
+        that of ``within`` if given, which also restricts the files.
+        """
+        by_path: Dict[Path, Dict[str, List[SymbolRecord]]] = {}
+        for record in self.lookup(name, repo):
+            groups = by_path.get(record.path)
+            if groups is None:
+                groups = by_path[record.path] = {group: [] for group in SEARCH_GROUPS}
+            groups[record.kind].append(record)
+        order: Iterable[Path] = by_path
+        if within is not None:
+            order = [p for p in within if p in by_path]
+        for path in order:
+            yield path, by_path[path]
+
+    def lookup_many(
+            self, names: Iterable[str], repo: Optional[str] = None,
+    ) -> Dict[str, List[SymbolRecord]]:
+        """`lookup` of several names at once, e.g. for a whole dependency closure."""
+        return {name: self.lookup(name, repo) for name in dict.fromkeys(names)}
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from ..all_repos import REPO_ABSOLUTE_BASE, RepoPaths
+    from ..crepo import CRepo
+    from ..csource import ParseCache, load_csources
+
+    parser = argparse.ArgumentParser(description="Build and query the cross-repo symbol database.")
+    parser.add_argument("--db", type=str, default=str(DEFAULT_DB_PATH))
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Index repos in `RepoPaths` (unchanged files are skipped).")
+    build.add_argument("repos", type=str, nargs="*",
+                       help="`RepoPaths` names (default: all existing repos).")
+    build.add_argument("--base", type=str, default=str(REPO_ABSOLUTE_BASE),
+                       help="Directory holding the repos.")
+    build.add_argument("--workers", type=int, default=None)
+    build.add_argument("--parse-cache", type=str, default=str(DEFAULT_CACHE_DIR))
+    build.add_argument("--no-parse-cache", action="store_true")
+    find = sub.add_parser("find", help="Where symbols are defined.")
+    find.add_argument("names", type=str, nargs="+")
+    find.add_argument("--repo", type=str, default=None, help="Directory name of one repo.")
+    find.add_argument("--code", action="store_true", help="Print the definitions.")
+    sub.add_parser("stats", help="Number of indexed files of each repo.")
+    args = parser.parse_args()
+
+    db = SymbolDatabase(args.db)
+
+    if args.command == "build":
+        base = Path(args.base)
+        repos = {name: base / dirname for name, dirname in vars(RepoPaths).items()
+                 if not name.startswith('_') and isinstance(dirname, str)}
+        names = args.repos or [name for name, path in repos.items() if path.exists()]
+        unknown = [name for name in names if name not in repos]
+        if unknown:
+            raise ValueError(f"Unknown repos {unknown}. Supported repos: {list(repos)}")
+        cache = None if args.no_parse_cache else ParseCache(args.parse_cache)
+        for name in names:
+            stime = time.perf_counter()
+            csource_dict, _ = load_csources(CRepo(repos[name]).files(), base=base,
+                                            workers=args.workers, cache=cache)
+            indexed, removed = db.add_repo(repos[name].name, csource_dict)
+            print(f"{name}: {len(csource_dict)} files, {indexed} indexed, {removed} removed, "
+                  f"{time.perf_counter() - stime:.2f}s")
+
+    elif args.command == "stats":
+        for repo, count in db.repos().items():
+            print(f"{repo:20s} {count:6d} files")
+
+    elif args.command == "find":
+        for name, records in db.lookup_many(args.names, args.repo).items():
+            print(f"{name}: {len(records)} definitions")
+            for r in records:
+                flags = " ".join(flag for flag, on in (
+                    ("static", r.is_static), ("extern", r.is_extern),
+                    ("forward", r.is_forward)) if on)
+                print(f"  {r.path}:{r.start_row + 1}-{r.end_row + 1}  {r.kind}"
+                      + (f"  [{flags}]" if flags else ""))
+                if args.code:
+                    print("    " + r.snippet.strip().replace("\n", "\n    "))
+
+    db.close()
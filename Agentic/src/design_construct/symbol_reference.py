@@ -2,13 +2,16 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, Iterable, Mapping, Optional, Tuple, NamedTuple
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, Mapping, Optional, Tuple, NamedTuple
 
-from ..parser.components import HasSourceSpan, GlobalVariableInfo
-from ..csource import CSource
+from ..parser.components import HasSourceSpan, EnumeratorInfo, GlobalVariableInfo, describe_guard
+from ..parser.source_span import SourceSpan
+from ..csource import CSource, RepoSymbolIndex
 from .code_fingerprint import fingerprint_c
-from .code_placeholder import CodePlaceholder, placeholder_global_variable
-from .code_editor import span_replace
+from .code_placeholder import CodePlaceholder, global_variable_token, placeholder_global_variable
+
+if TYPE_CHECKING:
+    from .symbol_db import SymbolDatabase, SymbolRecord
 
 
 @dataclass(slots=True)
@@ -98,13 +101,48 @@ class SymbolImplReference(NamedTuple):
         return None
 
 
+def guard_context(cs: CSource, span: SourceSpan) -> list[list[str]]:
+    """
+    Directive lines of the conditionals ``span`` is compiled under, outermost
+    first, e.g. ``[["#ifdef A", "#else"]]``. An ``#ifndef X`` whose region
+    defines ``X`` itself (include guards, default values) is left out.
+    """
+    guards: list[list[str]] = []
+    for branches in cs.conditional_index.guards(span):
+        opening = branches[0]
+        if len(branches) == 1 and opening.kind == 'ifndef' and any(
+            opening.span.start_byte < d.span.start_byte < opening.span.end_byte
+            for d in cs.preproc_defs.where('name', opening.name)
+        ):
+            continue
+        guards.append(describe_guard(branches))
+    return guards
+
+
 def prepare_symbol_reference(
     symbol_name: str,
-    csource_dict: Mapping[Path, CSource],
+    csource_dict: Optional[Mapping[Path, CSource]],
     *,
     use_fingerprint: bool = True,
     use_code_placeholder: bool = True,
+    with_guards: bool = False,
+    index: Optional[RepoSymbolIndex] = None,
+    database: Optional[SymbolDatabase] = None,
+    repo: Optional[str] = None,
 ) -> SymbolImplReference:
+    """
+    Gather the definitions of ``symbol_name`` across ``csource_dict``. With
+    ``with_guards``, the preprocessor conditionals enclosing each definition
+    are attached as ``metadata['guards']`` (see `guard_context`). ``index``
+    replaces the scan of every source; it is built from ``csource_dict`` or
+    from a superset of it, e.g. the whole repo for an include-scoped lookup.
+
+    With ``database``, the definitions are read from a `SymbolDatabase`
+    instead and no source is needed: ``csource_dict`` then only restricts
+    and orders the files searched (any iterable of paths will do), or is
+    None to search the whole database. ``repo`` limits the database lookup
+    to the files added under that name.
+    """
     func_defs: list[ReferenceItem] = []
     func_decls: list[ReferenceItem] = []
     glob_vars: list[ReferenceItem] = []
@@ -114,17 +152,32 @@ def prepare_symbol_reference(
 
     seen_fingerprints: set[str] = set()
 
+    def _with_guards(metadata: Dict[str, Any], span: SourceSpan, cs: CSource) -> Dict[str, Any]:
+        if with_guards:
+            guards = guard_context(cs, span)
+            if guards:
+                metadata['guards'] = guards
+        return metadata
+
     def _item(item: HasSourceSpan, cp: Path, cs: CSource) -> ReferenceItem:
-        snippet = item.span.bytes_of(cs.as_bytes).decode("utf-8", errors="ignore").strip()
-        return ReferenceItem(location=cp, source_snippet=snippet)
+        snippet = cs.text_of(item.span, errors="ignore").strip()
+        return ReferenceItem(location=cp, source_snippet=snippet,
+                             metadata=_with_guards({}, item.span, cs))
+
+    def _item_enumerator(item: EnumeratorInfo, cp: Path, cs: CSource) -> ReferenceItem:
+        # An enum constant is resolved by the whole enum defining it
+        span = item.definition_span
+        snippet = cs.text_of(span, errors="ignore").strip()
+        return ReferenceItem(location=cp, source_snippet=snippet,
+                             metadata=_with_guards({}, span, cs))
 
     def _item_glob_var(
         item: GlobalVariableInfo, cp: Path, cs: CSource
     ) -> ReferenceItem:
-        metadata = {
+        metadata = _with_guards({
             'is_extern': item.is_extern,
             'has_initialize': item.has_initialize,
-        }
+        }, item.span, cs)
 
         just_return = not use_code_placeholder
         if not just_return:
@@ -132,8 +185,7 @@ def prepare_symbol_reference(
             just_return = ph_info is None
 
         if just_return:
-            s = item.span.bytes_of(cs.as_bytes).decode(
-                "utf-8", errors="ignore").strip()
+            s = cs.text_of(item.span, errors="ignore").strip()
             return ReferenceItem(
                 location=cp,
                 source_snippet=s,
@@ -142,64 +194,102 @@ def prepare_symbol_reference(
 
         else:
             repl_range, token = ph_info
-            replaced_bytes = span_replace(cs.as_bytes, repl_range, token)
             s, e = repl_range
+            # Only the variable's own span, with the initializer replaced
+            snippet = (
+                cs.text_of((item.span.start_byte, s), errors="ignore")
+                + token
+                + cs.text_of((e, item.span.end_byte), errors="ignore")
+            ).strip()
             placeholder = CodePlaceholder(
                 token=token,
-                original_code=cs.as_bytes[s:e].decode("utf-8", errors="ignore")
+                original_code=cs.text_of(repl_range, errors="ignore")
             )
             return ReferenceItem(
                 location=cp,
-                source_snippet=replaced_bytes.decode("utf-8", errors="ignore"),
+                source_snippet=snippet,
                 placeholder=placeholder,
                 metadata=metadata,
             )
 
     def extend_if_new(
-        candidates: Iterable[ReferenceItem],
+        candidates: Iterable[Tuple[ReferenceItem, Optional[str]]],
         target_list: list[ReferenceItem],
     ) -> None:
-        if not use_fingerprint:
-            target_list.extend(candidates)
-            return
-
-        for candidate in candidates:
-            snippet = candidate.source_snippet
-            fingerprint = fingerprint_c(snippet)
-            if fingerprint in seen_fingerprints:
-                continue
-            seen_fingerprints.add(fingerprint)
+        # Candidates come with their fingerprint when it is already known
+        for candidate, fingerprint in candidates:
+            if use_fingerprint:
+                if fingerprint is None:
+                    fingerprint = fingerprint_c(candidate.source_snippet)
+                if fingerprint in seen_fingerprints:
+                    continue
+                seen_fingerprints.add(fingerprint)
             target_list.append(candidate)
 
-    for cp, cs in csource_dict.items():
-        sr = cs.search_by_name(symbol_name)
+    def _record_item(record: SymbolRecord) -> Tuple[ReferenceItem, Optional[str]]:
+        metadata: Dict[str, Any] = {}
+        if record.kind == 'global_variables':
+            metadata = {
+                'is_extern': record.is_extern,
+                'has_initialize': record.has_initialize,
+            }
+        if with_guards and record.guards:
+            metadata['guards'] = record.guards
+        if use_code_placeholder and record.init_range is not None:
+            s, e = record.init_range
+            token = global_variable_token(record.name)
+            snippet = (record.snippet[:s] + token + record.snippet[e:]).strip()
+            placeholder = CodePlaceholder(token=token, original_code=record.snippet[s:e])
+            return ReferenceItem(location=record.path, source_snippet=snippet,
+                                 placeholder=placeholder, metadata=metadata), None
+        return ReferenceItem(location=record.path, source_snippet=record.snippet.strip(),
+                             metadata=metadata), record.fingerprint
 
-        # Function
-        extend_if_new((_item(func, cp, cs) for func in sr.functions), 
-                      func_defs)
-        # Global Variable
-        extend_if_new(
-            (_item_glob_var(gvar, cp, cs) for gvar in sr.global_variables),
-            glob_vars,
+    # Per source: functions, global variables, function declarators,
+    # preprocessor definitions, composite types, type aliases and the enums
+    # defining an enumerator of that name
+    found: Iterator[Tuple[Iterable[Tuple[ReferenceItem, Optional[str]]], ...]]
+    if database is not None:
+        found = (
+            (
+                map(_record_item, groups['functions']),
+                map(_record_item, groups['global_variables']),
+                map(_record_item, groups['function_declerators']),
+                map(_record_item, groups['preproc_defs']),
+                map(_record_item, (r for r in groups['composite_types'] if not r.is_forward)),
+                map(_record_item, groups['type_aliases']),
+                map(_record_item, groups['enumerators']),
+            )
+            for _, groups in database.search(symbol_name, within=csource_dict, repo=repo)
         )
-        # Function Declerator
-        extend_if_new((_item(decl, cp, cs) for decl in sr.function_declerators), 
-                      func_decls)
-        # Preprocessor Definition
-        extend_if_new((_item(pp, cp, cs) for pp in sr.preproc_defs), 
-                      preproc_defs)
-        # Composite Types
-        extend_if_new(
+    else:
+        if index is not None:
+            results = index.search(symbol_name, within=csource_dict)
+        else:
+            results = ((cp, cs, cs.search_by_name(symbol_name))
+                       for cp, cs in csource_dict.items())
+        found = (
             (
-                _item(comp, cp, cs)
-                for comp in sr.composite_types
-                if not comp.is_forward_declaration()
-            ),
-            composite_types,
+                ((_item(func, cp, cs), None) for func in sr.functions),
+                ((_item_glob_var(gvar, cp, cs), None) for gvar in sr.global_variables),
+                ((_item(decl, cp, cs), None) for decl in sr.function_declerators),
+                ((_item(pp, cp, cs), None) for pp in sr.preproc_defs),
+                ((_item(comp, cp, cs), None) for comp in sr.composite_types
+                 if not comp.is_forward_declaration()),
+                ((_item(alias, cp, cs), None) for alias in sr.type_aliases),
+                ((_item_enumerator(enum, cp, cs), None) for enum in sr.enumerators),
+            )
+            for cp, cs, sr in results
         )
-        # Type Aliases
-        extend_if_new((_item(alias, cp, cs) for alias in sr.type_aliases), 
-                      type_aliases)
+
+    for functions, variables, declarators, defines, composites, aliases, enums in found:
+        extend_if_new(functions, func_defs)
+        extend_if_new(variables, glob_vars)
+        extend_if_new(declarators, func_decls)
+        extend_if_new(defines, preproc_defs)
+        extend_if_new(composites, composite_types)
+        extend_if_new(aliases, type_aliases)
+        extend_if_new(enums, composite_types)
 
     return SymbolImplReference(
         functions=func_defs,
@@ -0,0 +1,102 @@
+from pathlib import Path
+
+from ..csource import CSource
+from .deterministic_splice import SpliceCandidate, splice_candidate, splice_definitions
+from .symbol_reference import prepare_symbol_reference
+
+
+LIB_H = b"""\
+#define BASE 4
+#define DOUBLE_BASE (BASE * 2)
+typedef enum { RED, GREEN } color_t;
+enum mode { MODE_A, MODE_B };
+struct point { int x; int y; }
+"""
+
+
+def _lines(cs: CSource) -> list[str]:
+    return [line for line in cs.as_str.splitlines() if line.strip()]
+
+
+def _index_of(lines: list[str], prefix: str) -> int:
+    return next(i for i, line in enumerate(lines) if line.startswith(prefix))
+
+
+def test_macro_chain_spliced_out_of_order():
+    design_c = CSource('#include "design.h"\nint f(void) { return A; }\n')
+    design_h = CSource('')
+    # Users come before what they use, as gcc reports them
+    candidates = {
+        'A': SpliceCandidate('preproc_def', '#define A (B + 1)'),
+        'B': SpliceCandidate('preproc_def', '#define B (C * 2)'),
+        'C': SpliceCandidate('preproc_def', '#define C 3'),
+    }
+    c, h, spliced = splice_definitions(design_c, design_h, candidates)
+
+    assert spliced == ['A', 'B', 'C']
+    assert c.as_str == design_c.as_str
+    assert _lines(h) == ['#define C 3', '#define B (C * 2)', '#define A (B + 1)']
+
+
+def test_struct_spliced_after_its_typedef():
+    design_c = CSource('#include "design.h"\n')
+    design_h = CSource('int get(S *s);\n')
+    candidates = {
+        'S': SpliceCandidate('type_alias', 'typedef struct S_s S;'),
+        'struct S_s': SpliceCandidate('composite_type', 'struct S_s { int x; };'),
+    }
+    _, h, spliced = splice_definitions(design_c, design_h, candidates)
+
+    assert spliced == ['S', 'struct S_s']
+    lines = _lines(h)
+    assert (_index_of(lines, 'struct S_s {')
+            < _index_of(lines, 'typedef struct S_s S;')
+            < _index_of(lines, 'int get('))
+
+
+def test_symbol_already_defined_is_left_out():
+    design_c = CSource('#include "design.h"\nint f(void) { return LIMIT + helper(); }\n'
+                       'static int helper(void) { return 0; }\n')
+    design_h = CSource('#define LIMIT 8\n')
+    candidates = {
+        'LIMIT': SpliceCandidate('preproc_def', '#define LIMIT 16'),
+        'helper': SpliceCandidate('function', 'static int helper(void) { return 1; }'),
+        'unused': SpliceCandidate('global_variable', 'static int unused = 2;'),
+    }
+    c, h, spliced = splice_definitions(design_c, design_h, candidates)
+
+    assert spliced == ['unused']
+    assert h.as_str == design_h.as_str
+    # Nothing uses it, so it goes at the end
+    assert c.as_str.rstrip().endswith('static int unused = 2;')
+
+
+def test_enumerators_and_composites_are_rehomed():
+    sources = {Path('lib.h'): CSource(LIB_H)}
+
+    def candidate(name: str) -> SpliceCandidate:
+        ref = prepare_symbol_reference(name, sources, use_code_placeholder=False)
+        found = splice_candidate(ref)
+        assert found is not None
+        return found
+
+    # An enum constant brings its whole enum, typedef included
+    assert candidate('GREEN') == SpliceCandidate(
+        'composite_type', 'typedef enum { RED, GREEN } color_t;')
+    assert candidate('MODE_B') == SpliceCandidate(
+        'composite_type', 'enum mode { MODE_A, MODE_B };')
+    # A specifier's span ends at its brace
+    assert candidate('point') == SpliceCandidate(
+        'composite_type', 'struct point { int x; int y; };')
+
+    design_c = CSource('#include "design.h"\n'
+                       'int f(void) { return DOUBLE_BASE + GREEN; }\n')
+    _, h, spliced = splice_definitions(
+        design_c, CSource('int g(color_t c);\n'),
+        {name: candidate(name) for name in ('DOUBLE_BASE', 'BASE', 'GREEN', 'RED')},
+    )
+    # RED comes with GREEN's enum and is not spliced again
+    assert spliced == ['DOUBLE_BASE', 'BASE', 'GREEN']
+    lines = _lines(h)
+    assert _index_of(lines, '#define BASE') < _index_of(lines, '#define DOUBLE_BASE')
+    assert _index_of(lines, 'typedef enum') < _index_of(lines, 'int g(')
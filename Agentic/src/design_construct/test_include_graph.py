@@ -0,0 +1,103 @@
+import random
+from pathlib import Path
+
+from ..csource import CSource, ParseCache
+from .include_dependency import collect_include_dependencies, include_distances
+from .include_graph import IncludeGraph, graph_key
+
+
+def _reachable(edges: list[list[int]], start: int) -> set[int]:
+    seen = {start}
+    stack = [start]
+    while stack:
+        for w in edges[stack.pop()]:
+            if w not in seen:
+                seen.add(w)
+                stack.append(w)
+    return seen
+
+
+def test_random_graphs_match_plain_search():
+    for seed in range(200):
+        rnd = random.Random(seed)
+        n = rnd.randint(1, 60)
+        edges = [[rnd.randrange(n) for _ in range(rnd.randint(0, 4))] for _ in range(n)]
+        files = [Path(f'f{i}.h') for i in range(n)]
+        graph = IncludeGraph(files, edges)
+
+        reach = [_reachable(edges, v) for v in range(n)]
+        for v in range(n):
+            expected = [files[w] for w in sorted(reach[v])]
+            assert graph.reachable(files[v]) == expected, seed
+            assert all(graph.reaches(files[v], files[w]) == (w in reach[v])
+                       for w in range(n)), seed
+            cycle = [files[w] for w in range(n) if w in reach[v] and v in reach[w]]
+            assert graph.component(files[v]) == cycle, seed
+
+
+def test_long_cycle_without_recursion():
+    n = 50_000
+    files = [Path(f'{i}.h') for i in range(n)]
+    graph = IncludeGraph(files, [[(i + 1) % n] for i in range(n)])
+    assert len(graph.component(files[0])) == n
+    assert graph.reaches(files[n - 1], files[n - 2])
+
+
+def test_distances_match_include_walk():
+    sources = {
+        Path('a.c'): CSource('#include "b.h"\n#include "c.h"\n#include <stdio.h>\n'),
+        Path('b.h'): CSource('#include "c.h"\n'),
+        Path('c.h'): CSource('#include "b.h"\n#include "sub/d.h"\n'),
+        Path('sub/d.h'): CSource(''),
+        Path('sub/d.c'): CSource('#include "d.h"\n'),
+    }
+    graph = IncludeGraph.build(sources)
+    for root in sources:
+        walked = include_distances(root, list(sources), sources)
+        assert list(include_distances(root, list(sources), sources, graph=graph).items()) \
+            == list(walked.items())
+    assert graph.component(Path('b.h')) == [Path('b.h'), Path('c.h')]
+    assert graph.reachable(Path('a.c')) == [
+        Path('a.c'), Path('b.h'), Path('c.h'), Path('sub/d.h')]
+
+
+def test_cached_graph_round_trip(tmp_path):
+    sources = {
+        Path('a.c'): CSource('#include "b.h"\n'),
+        Path('b.h'): CSource('#include "a.c"\n'),
+    }
+    cache = ParseCache(tmp_path)
+    built = IncludeGraph.cached(sources, cache)
+    loaded = IncludeGraph.cached(sources, cache)
+    assert len(list((tmp_path / 'include_graph').glob('*.graph'))) == 1
+    assert loaded is not built
+    assert loaded.files == built.files
+    assert loaded.reachable(Path('a.c')) == built.reachable(Path('a.c'))
+    # Graph files are not parse cache entries
+    assert cache.size == 0
+
+
+def test_closure_matches_include_walk():
+    sources = {
+        Path('a.c'): CSource('#include "b.h"\n#include <stdio.h>\n'),
+        Path('b.h'): CSource('#include "c.h"\n#include <string.h>\n'),
+        Path('c.h'): CSource('#include "b.h"\n'),
+        Path('d.c'): CSource('#include "c.h"\n#include <stdlib.h>\n'),
+    }
+    graph = IncludeGraph.build(sources)
+    for root in sources:
+        walked_std, walked = collect_include_dependencies(root, list(sources), sources)
+        std, reached = collect_include_dependencies(root, list(sources), sources, graph=graph)
+        assert std == walked_std
+        assert set(reached) == set(walked)
+
+
+def test_graph_key_depends_on_working_directory(tmp_path, monkeypatch):
+    relative = {Path('a.c'): CSource('#include "b.h"\n')}
+    absolute = {tmp_path / 'a.c': CSource('#include "b.h"\n')}
+    monkeypatch.chdir(tmp_path)
+    keys = graph_key(relative), graph_key(absolute)
+    (tmp_path / 'sub').mkdir()
+    monkeypatch.chdir(tmp_path / 'sub')
+    assert graph_key(relative) != keys[0]
+    assert graph_key(absolute) == keys[1]
@@ -0,0 +1,121 @@
+import re
+from pathlib import Path
+
+import pytest
+
+from ..csource import CSource, RepoSymbolIndex
+from .symbol_db import SymbolDatabase
+from .symbol_reference import prepare_symbol_reference
+
+
+FIXTURES = Path(__file__).resolve().parents[1] / 'parser' / 'tests'
+
+# Sources sharing names, so that ranking and fingerprint dedup matter
+EXTRA = {
+    Path('repo/common.h'): b"""\
+#ifndef COMMON_H
+#define COMMON_H
+#define LIMIT 16
+typedef enum { MODE_A, MODE_B = 4 } mode_t;
+struct point { int x; int y; };
+typedef struct point point_t;
+extern int counter;
+int helper(int a);
+#endif
+""",
+    Path('repo/impl.c'): b"""\
+#include "common.h"
+int counter = LIMIT * 2;
+static const char *names[] = { "a", "b" };
+#ifdef FAST
+int helper(int a) { return a; }
+#else
+int helper(int a) { return a + LIMIT; }
+#endif
+""",
+    Path('repo/other.c'): b"""\
+#define LIMIT 16
+int counter;
+static int helper(int a) { return -a; }
+""",
+}
+
+CONFIGS = [
+    dict(use_code_placeholder=False),
+    dict(use_code_placeholder=False, with_guards=True),
+    dict(),
+    dict(use_fingerprint=False),
+]
+
+_TOKEN_RE = re.compile(r'_PH_\w+?_INIT_[0-9A-F]{2}_')
+
+
+def _normalized(ref) -> str:
+    # Placeholder tokens are random
+    return _TOKEN_RE.sub('TOKEN', repr(ref))
+
+
+def _sources() -> dict:
+    sources = {Path('fixtures') / p.name: CSource.from_file(p)
+               for p in sorted(FIXTURES.glob('*.c'))}
+    sources.update((path, CSource(text)) for path, text in EXTRA.items())
+    return sources
+
+
+def _names(sources) -> list:
+    names = set()
+    for cs in sources.values():
+        for group in ('functions', 'function_declerators', 'global_variables',
+                      'preproc_defs', 'type_aliases', 'enumerators'):
+            names.update(item.name for item in getattr(cs, group) if item.name)
+        for comp in cs.composite_types:
+            if comp.name:
+                names.update((comp.name, f'struct {comp.name}'))
+    return sorted(names) + ['no_such_symbol']
+
+
+def _assert_equivalent(sources, db):
+    index = RepoSymbolIndex(sources)
+    # Reversed, so that the order of `within` differs from the index's own
+    ranked = dict(reversed(list(sources.items())))
+    names = _names(sources)
+    assert len(names) > 50
+    for kwargs in CONFIGS:
+        for name in names:
+            expected = prepare_symbol_reference(name, ranked, index=index, **kwargs)
+            found = prepare_symbol_reference(name, ranked, database=db, **kwargs)
+            assert _normalized(found) == _normalized(expected), (name, kwargs)
+
+
+@pytest.fixture
+def db(tmp_path):
+    with SymbolDatabase(tmp_path / 'symbols.sqlite') as db:
+        yield db
+
+
+def test_database_matches_in_memory_lookup(db):
+    sources = _sources()
+    db.add_repo('fixtures', sources)
+    _assert_equivalent(sources, db)
+
+
+def test_database_matches_after_incremental_update(db):
+    sources = _sources()
+    db.add_repo('fixtures', sources)
+    sources[Path('repo/other.c')] = CSource(b'#define LIMIT 32\nint counter = 1;\n')
+    del sources[Path('repo/impl.c')]
+    assert db.add_repo('fixtures', sources) == (1, 1)
+    _assert_equivalent(sources, db)
+
+
+def test_database_lookup_limited_to_repo(db):
+    sources = _sources()
+    db.add_repo('fixtures', sources)
+    db.add_repo('other', {Path('other/x.c'): CSource(b'int helper(int a) { return 0; }\n')})
+    everywhere = prepare_symbol_reference('helper', None, database=db,
+                                          use_code_placeholder=False)
+    in_repo = prepare_symbol_reference('helper', None, database=db, repo='fixtures',
+                                       use_code_placeholder=False)
+    assert Path('other/x.c') in [item.location for item in everywhere.functions]
+    assert _normalized(in_repo) == _normalized(prepare_symbol_reference(
+        'helper', sources, index=RepoSymbolIndex(sources), use_code_placeholder=False))
@@ -1,5 +1,5 @@
 from pathlib import Path
-from typing import Iterable, List, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 from src.csource.w_components import CSourceIncludes
 
@@ -17,8 +17,165 @@ C17_HEADERS = set([
 UNIX_SYS_HEADERS = set([
     "sys/types.h", "sys/stat.h", "sys/time.h",
     "sys/file.h", "syslog.h", "unistd.h",
+    "strings.h", "fcntl.h", "pthread.h", "dirent.h",
+    "sys/mman.h", "sys/wait.h", "dlfcn.h", "sched.h",
+    "semaphore.h", "utime.h", "libgen.h",
 ])
 
+# Symbols and types of the headers above, for designs that use them without
+# the include. A name listed under several headers maps to the first one.
+_HEADER_SYMBOLS = {
+    "stddef.h": "size_t ptrdiff_t NULL offsetof max_align_t wchar_t",
+    "stdint.h": (
+        "int8_t int16_t int32_t int64_t uint8_t uint16_t uint32_t uint64_t "
+        "int_least8_t int_least16_t int_least32_t int_least64_t "
+        "uint_least8_t uint_least16_t uint_least32_t uint_least64_t "
+        "int_fast8_t int_fast16_t int_fast32_t int_fast64_t "
+        "uint_fast8_t uint_fast16_t uint_fast32_t uint_fast64_t "
+        "intptr_t uintptr_t intmax_t uintmax_t "
+        "INT8_MIN INT16_MIN INT32_MIN INT64_MIN INT8_MAX INT16_MAX INT32_MAX INT64_MAX "
+        "UINT8_MAX UINT16_MAX UINT32_MAX UINT64_MAX INTPTR_MIN INTPTR_MAX UINTPTR_MAX "
+        "INTMAX_MIN INTMAX_MAX UINTMAX_MAX SIZE_MAX PTRDIFF_MIN PTRDIFF_MAX "
+        "INT8_C INT16_C INT32_C INT64_C UINT8_C UINT16_C UINT32_C UINT64_C"
+    ),
+    "stdbool.h": "bool true false",
+    "stdio.h": (
+        "FILE fpos_t EOF BUFSIZ FILENAME_MAX SEEK_SET SEEK_CUR SEEK_END stdin stdout stderr "
+        "printf fprintf sprintf snprintf vprintf vfprintf vsprintf vsnprintf "
+        "scanf fscanf sscanf fopen freopen fclose fflush fread fwrite fgets fputs "
+        "fgetc fputc getc putc getchar putchar puts fseek ftell rewind fgetpos fsetpos "
+        "feof ferror clearerr perror remove rename tmpfile setvbuf setbuf ungetc "
+        "fileno fdopen popen pclose getline fseeko ftello"
+    ),
+    "stdlib.h": (
+        "malloc calloc realloc free aligned_alloc posix_memalign abort exit atexit _Exit "
+        "getenv setenv unsetenv system atoi atol atoll atof strtol strtoul strtoll "
+        "strtoull strtod strtof strtold qsort bsearch abs labs llabs div ldiv lldiv "
+        "div_t ldiv_t rand srand mkstemp realpath EXIT_SUCCESS EXIT_FAILURE RAND_MAX"
+    ),
+    "string.h": (
+        "memcpy memmove memset memcmp memchr strlen strnlen strcpy strncpy strcat "
+        "strncat strcmp strncmp strcoll strxfrm strchr strrchr strstr strtok strtok_r "
+        "strspn strcspn strpbrk strerror strdup strndup"
+    ),
+    "strings.h": "strcasecmp strncasecmp bzero bcmp ffs",
+    "ctype.h": (
+        "isalpha isdigit isalnum isspace isupper islower isxdigit ispunct isprint "
+        "iscntrl isgraph isblank toupper tolower"
+    ),
+    "math.h": (
+        "sqrt sqrtf pow powf exp expf exp2 log logf log2 log10 log1p floor floorf "
+        "ceil ceilf fabs fabsf fmod round roundf lround llround trunc rint lrint "
+        "sin cos tan asin acos atan atan2 sinh cosh tanh hypot frexp ldexp modf cbrt "
+        "fmin fmax nan isnan isinf isfinite signbit NAN INFINITY HUGE_VAL M_PI M_E"
+    ),
+    "limits.h": (
+        "CHAR_BIT CHAR_MIN CHAR_MAX SCHAR_MIN SCHAR_MAX UCHAR_MAX SHRT_MIN SHRT_MAX "
+        "USHRT_MAX INT_MIN INT_MAX UINT_MAX LONG_MIN LONG_MAX ULONG_MAX LLONG_MIN "
+        "LLONG_MAX ULLONG_MAX PATH_MAX"
+    ),
+    "float.h": (
+        "FLT_MAX FLT_MIN FLT_EPSILON FLT_DIG DBL_MAX DBL_MIN DBL_EPSILON DBL_DIG "
+        "LDBL_MAX LDBL_MIN LDBL_EPSILON"
+    ),
+    "inttypes.h": (
+        "PRId8 PRId16 PRId32 PRId64 PRIu8 PRIu16 PRIu32 PRIu64 PRIx8 PRIx16 PRIx32 "
+        "PRIx64 PRIX32 PRIX64 PRIdPTR PRIuPTR PRIxPTR PRIdMAX PRIuMAX SCNd32 SCNd64 "
+        "SCNu32 SCNu64 imaxabs strtoimax strtoumax"
+    ),
+    "assert.h": "assert static_assert",
+    "errno.h": (
+        "errno EPERM ENOENT EINTR EIO EBADF EAGAIN EWOULDBLOCK ENOMEM EACCES EEXIST "
+        "EINVAL ENOSPC EPIPE EDOM ERANGE ENOTSUP EOVERFLOW"
+    ),
+    "stdarg.h": "va_list va_start va_end va_arg va_copy",
+    "setjmp.h": "jmp_buf setjmp longjmp",
+    "signal.h": (
+        "signal raise kill sigaction sig_atomic_t SIGINT SIGTERM SIGSEGV SIGABRT "
+        "SIGKILL SIGPIPE SIG_DFL SIG_IGN"
+    ),
+    "time.h": (
+        "time_t clock_t CLOCKS_PER_SEC time clock difftime mktime localtime gmtime "
+        "localtime_r gmtime_r strftime asctime ctime nanosleep clock_gettime "
+        "CLOCK_REALTIME CLOCK_MONOTONIC"
+    ),
+    "locale.h": "setlocale localeconv LC_ALL LC_NUMERIC LC_CTYPE",
+    "wchar.h": "wint_t mbstate_t wcslen wcscpy wcscmp wcsncmp wmemcpy wmemset",
+    "stdatomic.h": (
+        "atomic_int atomic_uint atomic_size_t atomic_bool atomic_flag atomic_init "
+        "atomic_load atomic_store atomic_exchange atomic_fetch_add atomic_fetch_sub "
+        "atomic_compare_exchange_strong atomic_compare_exchange_weak "
+        "memory_order_relaxed memory_order_acquire memory_order_release "
+        "memory_order_acq_rel memory_order_seq_cst"
+    ),
+    "sys/types.h": "ssize_t off_t pid_t mode_t uid_t gid_t dev_t ino_t",
+    "unistd.h": (
+        "read write close lseek pread pwrite unlink access sleep usleep getpid getppid "
+        "isatty sysconf fsync dup dup2 pipe fork execv execvp _exit getcwd chdir rmdir "
+        "ftruncate getopt optarg optind STDIN_FILENO STDOUT_FILENO STDERR_FILENO "
+        "R_OK W_OK X_OK F_OK _SC_NPROCESSORS_ONLN"
+    ),
+    "sys/stat.h": (
+        "stat fstat lstat mkdir chmod fchmod umask S_ISDIR S_ISREG S_ISLNK "
+        "S_IRUSR S_IWUSR S_IXUSR S_IRWXU"
+    ),
+    "fcntl.h": (
+        "open fcntl O_RDONLY O_WRONLY O_RDWR O_CREAT O_TRUNC O_APPEND O_EXCL "
+        "O_NONBLOCK F_GETFL F_SETFL"
+    ),
+    "sys/time.h": "gettimeofday",
+    "pthread.h": (
+        "pthread_t pthread_attr_t pthread_create pthread_join pthread_detach "
+        "pthread_self pthread_once pthread_once_t pthread_mutex_t pthread_mutex_init "
+        "pthread_mutex_lock pthread_mutex_trylock pthread_mutex_unlock "
+        "pthread_mutex_destroy pthread_cond_t pthread_cond_init pthread_cond_wait "
+        "pthread_cond_timedwait pthread_cond_signal pthread_cond_broadcast "
+        "pthread_cond_destroy PTHREAD_MUTEX_INITIALIZER PTHREAD_COND_INITIALIZER "
+        "PTHREAD_ONCE_INIT"
+    ),
+    "dirent.h": "DIR opendir readdir closedir",
+    "sys/mman.h": "mmap munmap PROT_READ PROT_WRITE MAP_SHARED MAP_PRIVATE MAP_FAILED",
+    "sys/wait.h": "wait waitpid WIFEXITED WEXITSTATUS",
+    "dlfcn.h": "dlopen dlsym dlclose dlerror RTLD_NOW RTLD_LAZY",
+    "sched.h": "sched_yield",
+    "libgen.h": "basename dirname",
+}
+# gcc names an undefined struct with its tag, e.g. 'struct tm'
+_HEADER_STRUCTS = {
+    "time.h": "tm timespec",
+    "sys/time.h": "timeval",
+    "sys/stat.h": "stat",
+    "dirent.h": "dirent",
+    "utime.h": "utimbuf",
+}
+
+STD_SYMBOL_HEADERS: Dict[str, str] = {}
+for _header, _names in _HEADER_SYMBOLS.items():
+    for _name in _names.split():
+        STD_SYMBOL_HEADERS.setdefault(_name, _header)
+for _header, _names in _HEADER_STRUCTS.items():
+    for _name in _names.split():
+        STD_SYMBOL_HEADERS.setdefault(f"struct {_name}", _header)
+
+# Libraries to link when a header is included with angle brackets; -lz and
+# friends are only added for designs including the library header
+# themselves. Libraries that are benchmark repos (zstd, lz4) are left out:
+# linking the installed one would hide the definitions the design misses.
+HEADER_LINK_FLAGS = {
+    "math.h": "-lm",
+    "complex.h": "-lm",
+    "tgmath.h": "-lm",
+    "pthread.h": "-lpthread",
+    "threads.h": "-lpthread",
+    "semaphore.h": "-lpthread",
+    "dlfcn.h": "-ldl",
+    "aio.h": "-lrt",
+    "mqueue.h": "-lrt",
+    "zlib.h": "-lz",
+    "lzma.h": "-llzma",
+    "bzlib.h": "-lbz2",
+}
+
 
 def is_standard_header(include_name: str) -> bool:
     """Check if the include name is a standard C header."""
@@ -26,6 +183,132 @@ def is_standard_header(include_name: str) -> bool:
     return (normalized in C17_HEADERS) or (normalized in UNIX_SYS_HEADERS)
 
 
+def header_of_symbol(symbol: str) -> Optional[str]:
+    """The standard header declaring ``symbol``, None if it is not a known one."""
+    return STD_SYMBOL_HEADERS.get(symbol)
+
+
+def link_flags_for(include_targets: Iterable[str]) -> List[str]:
+    """
+    Linker flags for the libraries behind ``include_targets``, as written
+    (e.g. ``<zlib.h>``), without duplicates. Quoted includes name repo
+    headers, which never add a library.
+    """
+    flags: Dict[str, None] = {}
+    for target in include_targets:
+        target = target.strip()
+        if not (target.startswith('<') and target.endswith('>')):
+            continue
+        flag = HEADER_LINK_FLAGS.get(target[1:-1].strip())
+        if flag is not None:
+            flags.setdefault(flag)
+    return list(flags)
+
+
+def _strip_include(target_include: str) -> str:
+    """The include name without its brackets or quotes."""
+    target_include = target_include.strip()
+    if (target_include.startswith('<') and target_include.endswith('>')) or \
+       (target_include.startswith('"') and target_include.endswith('"')):
+        target_include = target_include[1:-1].strip()
+    return target_include
+
+
+def _suffix_parts(include_name: str) -> List[str]:
+    """Path components of an include, '.' removed and '..' applied."""
+    suffix_parts: List[str] = []
+    for part in Path(include_name).parts:
+        if part in ("", "."):
+            continue
+        if part == "..":
+            if suffix_parts:
+                suffix_parts.pop()
+            continue
+        suffix_parts.append(part)
+    return suffix_parts
+
+
+class _TrieNode:
+    __slots__ = ("children", "files")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, _TrieNode] = {}
+        # Files whose path ends with the components leading here
+        self.files: List[Path] = []
+
+
+class IncludeResolver:
+    """
+    Resolves include directives against a fixed set of repository files,
+    as `determine_include_sources` does, but with the files indexed once:
+    a trie of their lowercased path components, file name first, answers
+    `find_include_candidates` in time proportional to the include's depth
+    instead of the number of files. Build one per repo and reuse it for
+    every include of every file.
+    """
+
+    def __init__(self, all_files: Iterable[Path | str]) -> None:
+        self._files: List[Path] = []
+        self._known: Set[Path] = set()
+        self._root = _TrieNode()
+        self._local_cache: Dict[Tuple[Path, str], Optional[Path]] = {}
+        self._dir_cache: Dict[Path | str, Path] = {}
+        for file in all_files:
+            path = Path(file)
+            if path in self._known:
+                continue
+            self._known.add(path)
+            self._files.append(path)
+            node = self._root
+            for part in reversed(path.parts):
+                node = node.children.setdefault(part.lower(), _TrieNode())
+                node.files.append(path)
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def __iter__(self) -> Iterator[Path]:
+        return iter(self._files)
+
+    def __contains__(self, path: object) -> bool:
+        return path in self._known
+
+    def in_current_dir(self, include_name: str, from_file: Path | str) -> Optional[Path]:
+        """See `find_include_in_current_dir`."""
+        directory = self._dir_cache.get(from_file)
+        if directory is None:
+            directory = self._dir_cache[from_file] = Path(from_file).resolve().parent
+        key = (directory, include_name)
+        if key not in self._local_cache:
+            local_candidate = (directory / Path(include_name)).resolve()
+            self._local_cache[key] = local_candidate if local_candidate in self._known else None
+        return self._local_cache[key]
+
+    def candidates(self, include_name: str) -> List[Path]:
+        """See `find_include_candidates`; candidates come in the order of the files given."""
+        suffix_parts = _suffix_parts(include_name)
+        if not suffix_parts:
+            return []
+        node = self._root
+        for part in reversed(suffix_parts):
+            node = node.children.get(part.lower())
+            if node is None:
+                return []
+        return list(node.files)
+
+    def determine(
+            self,
+            target_include: str,
+            from_file: Path | str,
+    ) -> Tuple[bool, Optional[Path], List[Path]]:
+        """See `determine_include_sources`."""
+        target_include = _strip_include(target_include)
+        if is_standard_header(target_include):
+            return True, None, []
+        local_path = self.in_current_dir(target_include, from_file)
+        return False, local_path, self.candidates(target_include)
+
+
 def find_include_in_current_dir(
     include_name: str,
     from_file: Path | str,
@@ -49,45 +332,16 @@ def find_include_candidates(
     Resolve candidate absolute paths for a (local) include directive.
     Try to match by normalized suffix components against `all_files`.
     Matching is case-insensitive, and the include string is normalized to remove
-    '.' and resolve '..' segments.
+    '.' and resolve '..' segments. For more than one include, query an
+    `IncludeResolver` instead.
     """
-    known_files = {Path(p) for p in all_files}
-
-    # Build normalized suffix parts
-
-    suffix_parts: List[str] = []
-    for part in Path(include_name).parts:
-        if part in ("", "."):
-            continue
-        if part == "..":
-            if suffix_parts:
-                suffix_parts.pop()
-            continue
-        suffix_parts.append(part)
-
-    if not suffix_parts:
-        return []
-
-    suffix_len = len(suffix_parts)
-    suffix_lower = [part.lower() for part in suffix_parts]
-
-    # Search for candidates
-
-    candidates: List[Path] = []
-    for candidate in known_files:
-        if len(candidate.parts) < suffix_len:
-            continue
-        tail = candidate.parts[-suffix_len:]
-        if [part.lower() for part in tail] == suffix_lower:
-            candidates.append(candidate)
-
-    return candidates
+    return IncludeResolver(all_files).candidates(include_name)
 
 
 def determine_include_sources(
         target_include: str,
         from_file: Path | str,
-        all_files: Iterable[Path | str]
+        all_files: Iterable[Path | str] | IncludeResolver
 ) -> Tuple[bool, Optional[Path], List[Path]]:
     """
     Attempt to resolve an include directive to a specific file.
@@ -99,7 +353,8 @@ def determine_include_sources(
     from_file:
         The file (absolute or relative path) that contains the include directive.
     all_files:
-        An iterable of all known files (absolute or relative paths).
+        An iterable of all known files (absolute or relative paths), or an
+        `IncludeResolver` built from them.
 
     Returns
     -------
@@ -110,16 +365,45 @@ def determine_include_sources(
     candidates: List[Path]
         A list of candidate paths that match the include name.
     """
-    # If header has brackets or quotes, strip them
-    target_include = target_include.strip()
-    if (target_include.startswith('<') and target_include.endswith('>')) or \
-       (target_include.startswith('"') and target_include.endswith('"')):
-        target_include = target_include[1:-1].strip()
+    if not isinstance(all_files, IncludeResolver):
+        all_files = IncludeResolver(all_files)
+    return all_files.determine(target_include, from_file)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from src.crepo import CRepo
+    from src.csource import load_csources
+
+    parser = argparse.ArgumentParser(
+        description="Resolve every include of a repo, file scan vs. IncludeResolver."
+    )
+    parser.add_argument("repo", type=str, help="Repository root.")
+    args = parser.parse_args()
+
+    repo_root = Path(args.repo).resolve()
+    csource_dict, _ = load_csources(CRepo(repo_root).files(), base=repo_root)
+    all_files = list(csource_dict)
+    includes = [(path, inc.include_target)
+                for path, cs in csource_dict.items() for inc in cs.includes]
 
-    if is_standard_header(target_include):
-        return True, None, []
+    stime = time.perf_counter()
+    resolver = IncludeResolver(all_files)
+    build = time.perf_counter() - stime
+    stime = time.perf_counter()
+    for path, target in includes:
+        resolver.determine(target, path)
+    indexed = time.perf_counter() - stime
 
-    local_path = find_include_in_current_dir(target_include, from_file, all_files)
-    candidates = find_include_candidates(target_include, all_files)
+    sample = includes[:200]
+    stime = time.perf_counter()
+    for path, target in sample:
+        find_include_in_current_dir(_strip_include(target), path, all_files)
+        find_include_candidates(_strip_include(target), all_files)
+    scanned = (time.perf_counter() - stime) / max(len(sample), 1) * len(includes)
 
-    return False, local_path, candidates
+    print(f"{len(all_files)} files, {len(includes)} includes")
+    print(f"  file scan (estimated): {scanned * 1e3:9.1f} ms")
+    print(f"  resolver: {build * 1e3:.1f} ms to build, {indexed * 1e3:.1f} ms to resolve")
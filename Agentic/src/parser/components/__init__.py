@@ -10,9 +10,17 @@ class HasSourceSpan(Protocol):
 
 from .comment import extract_comments, CommentInfo
 from .conditional import extract_conditionals, ConditionalMacroInfo
+from .conditional_index import ConditionalIndex, describe_guard
 from .function import extract_functions, FunctionInfo
 from .include import extract_includes, IncludeInfo
 from .glob_declerator import extract_global_declerators, GlobalVariableInfo, FunctionDecleratorInfo
 from .type_alias import extract_type_aliases, TypeAlias
 from .composite_type import extract_composite_types, CompositeTypeInfo
 from .preproc_def import extract_preproc_defs, PreprocDefInfo
+from .member import extract_enumerators, extract_fields, EnumeratorInfo, FieldInfo
+from .extractor import (
+    extract_components, update_components,
+    ExtractedComponents, COMPONENT_GROUPS, COMPONENT_KINDS, EXTRACTOR_VERSION,
+)
+from .table import ComponentTable
+from .query_backend import extract_components_by_query, EXTRACTION_BACKENDS
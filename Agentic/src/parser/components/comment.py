@@ -35,19 +35,23 @@ class CommentInfo:
                 f"span={self.span!r})")
 
 
+def _comment_info(n: Node, source: bytes) -> CommentInfo:
+    txt = str_of(n, source)
+    style: Literal["line", "block", "doc", "unknown"]
+    if txt.startswith("///") or txt.startswith("//!") or txt.startswith("/**"):
+        style = "doc"
+    elif txt.startswith("//"):
+        style = "line"
+    elif txt.startswith("/*"):
+        style = "block"
+    else:
+        style = "unknown"
+    return CommentInfo(style=style, span=SourceSpan.from_node(n))
+
+
 def extract_comments(root: Node, source: bytes) -> List[CommentInfo]:
     out: List[CommentInfo] = []
     for n in iter_tree(root, named_only=False):
         if n.type == "comment":
-            txt = str_of(n, source)
-            style: Literal["line", "block", "doc", "unknown"]
-            if txt.startswith("///") or txt.startswith("//!") or txt.startswith("/**"):
-                style = "doc"
-            elif txt.startswith("//"):
-                style = "line"
-            elif txt.startswith("/*"):
-                style = "block"
-            else:
-                style = "unknown"
-            out.append(CommentInfo(style=style, span=SourceSpan.from_node(n)))
+            out.append(_comment_info(n, source))
     return out
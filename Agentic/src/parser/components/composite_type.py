@@ -5,7 +5,7 @@ from typing import Dict, List, Literal, Optional, Set
 
 from tree_sitter import Node
 
-from ..utils import descendants_of_type, is_under, iter_tree, str_of
+from ..utils import find_nodes_outside_types, first_descendant_of_type, is_under, str_of
 from ..source_span import SourceSpan
 
 
@@ -64,6 +64,13 @@ _DEFINITION_NODE_KINDS: Set[str] = {
     "enumerator_list",
 }
 
+# Specifiers under these are part of a function parameter/body or
+# a variable declarator, not a standalone type definition.
+_EXCLUDING_ANCESTOR_KINDS: Set[str] = {
+    "function_definition",
+    "declaration",
+}
+
 def extract_composite_types(
         root: Node, source: bytes,
         *,
@@ -72,46 +79,60 @@ def extract_composite_types(
 ) -> List[CompositeTypeInfo]:
     out: List[CompositeTypeInfo] = []
 
-    for n in iter_tree(root, named_only=True):
-        if n.type in _SPECIFIER_NODE_KINDS:
-            kind = _SPECIFIER_NODE_KINDS[n.type]
-
-            # Remove if under function parameter/body, variable declarator
-            if is_under(n, {
-                "function_definition", 
-                "declaration",
-            }):
-                continue
-
-            name = _extract_type_name_from_specifier(n, source)
-            if name is None and ignore_anonymous:
-                continue
-
-            definition_node = _search_definition(n)
-            if definition_node is None and ignore_forward_declarations:
-                continue
-            field_decl_span = (SourceSpan.from_node(definition_node) 
-                               if definition_node else None)
-            
-            # If the node is under `field_declaration`
-            # and the definition_node is None, it means it's a forward declaration
-            # inside another struct/union used as a type of a field.
-            # This should be ignored.
-            # NOTE: This is not affected by the `ignore_forward_declarations` flag
-            if is_under(n, {"field_declaration", }) and definition_node is None:
-                continue
-            
-            out.append(CompositeTypeInfo(
-                kind=kind,
-                name=name,
-                span=SourceSpan.from_node(n),
-                definition_span=field_decl_span
-            ))
+    # Skip anything under function parameter/body, variable declarator;
+    # those subtrees are pruned rather than filtered node by node.
+    candidates = find_nodes_outside_types(
+        root, _SPECIFIER_NODE_KINDS, _EXCLUDING_ANCESTOR_KINDS,
+    )
+    for n in candidates:
+        info = _composite_type_info(
+            n, source,
+            under_field_declaration=is_under(n, {"field_declaration", }),
+            ignore_forward_declarations=ignore_forward_declarations,
+            ignore_anonymous=ignore_anonymous,
+        )
+        if info is not None:
+            out.append(info)
 
     out.sort(key=lambda t: t.span.start_byte)
     return out
 
 
+def _composite_type_info(
+        n: Node, source: bytes,
+        *,
+        under_field_declaration: bool,
+        ignore_forward_declarations: bool = False,
+        ignore_anonymous: bool = False
+) -> Optional[CompositeTypeInfo]:
+    kind = _SPECIFIER_NODE_KINDS[n.type]
+
+    name = _extract_type_name_from_specifier(n, source)
+    if name is None and ignore_anonymous:
+        return None
+
+    definition_node = _search_definition(n)
+    if definition_node is None and ignore_forward_declarations:
+        return None
+    field_decl_span = (SourceSpan.from_node(definition_node) 
+                       if definition_node else None)
+    
+    # If the node is under `field_declaration`
+    # and the definition_node is None, it means it's a forward declaration
+    # inside another struct/union used as a type of a field.
+    # This should be ignored.
+    # NOTE: This is not affected by the `ignore_forward_declarations` flag
+    if under_field_declaration and definition_node is None:
+        return None
+    
+    return CompositeTypeInfo(
+        kind=kind,
+        name=name,
+        span=SourceSpan.from_node(n),
+        definition_span=field_decl_span
+    )
+
+
 def _search_definition(spec: Node) -> Optional[Node]:
     for ch in spec.children:
         if ch.type in _DEFINITION_NODE_KINDS:
@@ -124,11 +145,13 @@ def _extract_type_name_from_specifier(spec: Node, source: bytes) -> Optional[str
     for ch in spec.children:
         if ch.type == 'type_identifier':
             return str_of(ch, source).strip()
-    # Some specs put name deeper; search
-    for n in descendants_of_type(spec, {"type_identifier", }):
-        # Avoid names that are part of base classes or fields
-        if is_under(n, _DEFINITION_NODE_KINDS):
-            continue
-        return str_of(n, source).strip()
+    # Some specs put name deeper; search, skipping names that are part of
+    # base classes or fields
+    if is_under(spec, _DEFINITION_NODE_KINDS):
+        return None
+    n = first_descendant_of_type(
+        spec, {"type_identifier", },
+        prune=lambda d: d.type in _DEFINITION_NODE_KINDS,
+    )
     # Could be anonymous
-    return None
+    return str_of(n, source).strip() if n is not None else None
@@ -58,45 +58,48 @@ _SIGNIFICANT_PREPROC_TYPES = {
     "preproc_else",
 }
 
+def _conditional_info(node: Node, source: bytes) -> Optional[ConditionalMacroInfo]:
+    # Get the full directive header text when line continuations are used
+    header_text = directive_header_text(node, source)
+    if not header_text:
+        return None
+
+    if node.type == "preproc_else":
+        return ConditionalMacroInfo(kind='else', span=SourceSpan.from_node(node))
+    
+    elif node.type == 'preproc_ifdef':
+        # `preproc_ifdef` is used for both `#ifdef` and `#ifndef`
+        ifdef_match = _CONDITION_REGEX['ifdef'].match(header_text)
+        ifndef_match = _CONDITION_REGEX['ifndef'].match(header_text)
+
+        if ifdef_match or ifndef_match:
+            return ConditionalMacroInfo(
+                kind='ifdef' if ifdef_match else 'ifndef',
+                span=SourceSpan.from_node(node),
+                name=(ifdef_match or ifndef_match).group("name"),
+            )
+    
+    elif node.type == 'preproc_if' or node.type == 'preproc_elif':
+        kind = 'if' if node.type == 'preproc_if' else 'elif'
+        match = _CONDITION_REGEX[kind].match(header_text)
+        if match:
+            return ConditionalMacroInfo(
+                kind=kind,
+                span=SourceSpan.from_node(node),
+                condition=match.group("expr").strip(),
+            )
+
+    return None
+
+
 def extract_conditionals(root: Node, source: bytes) -> List[ConditionalMacroInfo]:
     results: List[ConditionalMacroInfo] = []
     for node in iter_tree(root, named_only=False):
         if node.type not in _SIGNIFICANT_PREPROC_TYPES:
             continue
-
-        # Get the full directive header text when line continuations are used
-        header_text = directive_header_text(node, source)
-        if not header_text:
-            continue
-
-        if node.type == "preproc_else":
-            results.append(ConditionalMacroInfo(kind='else', span=SourceSpan.from_node(node)))
-        
-        elif node.type == 'preproc_ifdef':
-            # `preproc_ifdef` is used for both `#ifdef` and `#ifndef`
-            ifdef_match = _CONDITION_REGEX['ifdef'].match(header_text)
-            ifndef_match = _CONDITION_REGEX['ifndef'].match(header_text)
-
-            if ifdef_match or ifndef_match:
-                results.append(
-                    ConditionalMacroInfo(
-                        kind='ifdef' if ifdef_match else 'ifndef',
-                        span=SourceSpan.from_node(node),
-                        name=(ifdef_match or ifndef_match).group("name"),
-                    )
-                )
-        
-        elif node.type == 'preproc_if' or node.type == 'preproc_elif':
-            kind = 'if' if node.type == 'preproc_if' else 'elif'
-            match = _CONDITION_REGEX['if'].match(header_text)
-            if match:
-                results.append(
-                    ConditionalMacroInfo(
-                        kind=kind,
-                        span=SourceSpan.from_node(node),
-                        condition=match.group("expr").strip(),
-                    )
-                )
+        info = _conditional_info(node, source)
+        if info is not None:
+            results.append(info)
 
     results.sort(key=lambda info: info.span.start_byte)
     return results
@@ -0,0 +1,167 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Iterable, Iterator, List, Tuple, Union
+
+from ..source_span import SourceSpan
+from .conditional import ConditionalMacroInfo
+
+
+# A byte offset, a `SourceSpan` or a ``(start_byte, end_byte)`` range
+Target = Union[int, SourceSpan, Tuple[int, int]]
+
+_ALTERNATIVE_KINDS = ('elif', 'else')
+
+
+def _range_of(target: Target) -> Tuple[int, int]:
+    if isinstance(target, int):
+        return target, target
+    if isinstance(target, SourceSpan):
+        return target.start_byte, target.end_byte
+    return target
+
+
+class ConditionalIndex:
+    """
+    Sorted-endpoint index over the regions of preprocessor conditionals.
+
+    The regions of one source are laminar, as tree-sitter nests them: an
+    ``#if`` spans up to its ``#endif`` and holds its ``#elif``/``#else``
+    alternatives, which hold theirs. Regions are sorted by start, with the
+    parent of each one recorded, so the regions enclosing a target are the
+    ancestors of the last region starting before it: found with a bisection
+    and a walk up the (shallow) nesting instead of a scan of every region.
+    """
+
+    __slots__ = ("_items", "_starts", "_ends", "_parents")
+
+    def __init__(self, conditionals: Iterable[ConditionalMacroInfo]) -> None:
+        items = sorted(conditionals, key=lambda c: (c.span.start_byte, -c.span.end_byte))
+        starts = array('i')
+        ends = array('i')
+        parents = array('i')
+        stack: List[int] = []
+        for i, info in enumerate(items):
+            start, end = info.span.start_byte, info.span.end_byte
+            while stack and ends[stack[-1]] <= start:
+                stack.pop()
+            parents.append(stack[-1] if stack else -1)
+            starts.append(start)
+            ends.append(end)
+            stack.append(i)
+        self._items: Tuple[ConditionalMacroInfo, ...] = tuple(items)
+        self._starts = starts
+        self._ends = ends
+        self._parents = parents
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[ConditionalMacroInfo]:
+        return iter(self._items)
+
+    def _enclosing(self, start: int, end: int) -> List[int]:
+        """Indices of the regions containing ``[start, end)``, innermost first."""
+        i = bisect_right(self._starts, start) - 1
+        ends, parents = self._ends, self._parents
+        while i != -1 and not (end <= ends[i] and start < ends[i]):
+            i = parents[i]
+        chain: List[int] = []
+        while i != -1:
+            chain.append(i)
+            i = parents[i]
+        return chain
+
+    def enclosing(self, target: Target) -> List[ConditionalMacroInfo]:
+        """Regions containing ``target``, outermost first."""
+        chain = self._enclosing(*_range_of(target))
+        return [self._items[i] for i in reversed(chain)]
+
+    def guards(self, target: Target) -> List[Tuple[ConditionalMacroInfo, ...]]:
+        """
+        The conditionals ``target`` is compiled under, outermost first. Each
+        one is given as the chain of its branches from the opening ``#if``,
+        ``#ifdef`` or ``#ifndef`` up to the branch holding ``target``; e.g.
+        code in the ``#else`` of an ``#ifdef A`` gets ``(ifdef A, else)``.
+        """
+        items, parents = self._items, self._parents
+        guards: List[Tuple[ConditionalMacroInfo, ...]] = []
+        chain = self._enclosing(*_range_of(target))
+        k = 0
+        while k < len(chain):
+            # From the innermost branch up to the directive opening it
+            branches = [items[chain[k]]]
+            while (branches[-1].kind in _ALTERNATIVE_KINDS and k + 1 < len(chain)
+                   and parents[chain[k]] == chain[k + 1]):
+                k += 1
+                branches.append(items[chain[k]])
+            guards.append(tuple(reversed(branches)))
+            k += 1
+        guards.reverse()
+        return guards
+
+    def overlapping(self, start_byte: int, end_byte: int) -> List[ConditionalMacroInfo]:
+        """Regions sharing at least one byte with ``[start_byte, end_byte)``, in source order."""
+        chain = self._enclosing(start_byte, start_byte)
+        lo = bisect_right(self._starts, start_byte)
+        hi = bisect_left(self._starts, end_byte, lo)
+        return ([self._items[i] for i in reversed(chain)]
+                + list(self._items[lo:hi]))
+
+
+def describe_guard(branches: Tuple[ConditionalMacroInfo, ...]) -> List[str]:
+    """Directive lines of a guard from `ConditionalIndex.guards`, e.g. ``["#ifdef A", "#else"]``."""
+    lines: List[str] = []
+    for branch in branches:
+        operand = branch.name if branch.name is not None else branch.condition
+        lines.append(f"#{branch.kind} {operand}" if operand else f"#{branch.kind}")
+    return lines
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+    from pathlib import Path
+
+    from ...csource import CSource
+
+    parser = argparse.ArgumentParser(
+        description="Enclosing-guard lookups: linear scans vs `ConditionalIndex`."
+    )
+    parser.add_argument("paths", type=str, nargs="+",
+                        help="C files or directories.")
+    args = parser.parse_args()
+
+    files: List[Path] = []
+    for p in map(Path, args.paths):
+        files.extend(sorted(p.rglob("*.[ch]")) if p.is_dir() else [p])
+    csources = [CSource.from_file(fp, detached=True) for fp in files]
+
+    def _targets(cs: CSource) -> List[SourceSpan]:
+        return ([f.span for f in cs.functions] + [g.span for g in cs.global_variables]
+                + [d.span for d in cs.preproc_defs])
+
+    # Materialized up front, both sides then only pay for the lookups
+    work = [(tuple(cs.conditionals), _targets(cs)) for cs in csources]
+    count = sum(len(targets) for _, targets in work)
+
+    stime = time.perf_counter()
+    scanned = []
+    for conditionals, targets in work:
+        for span in targets:
+            scanned.append([c for c in conditionals
+                            if c.span.start_byte <= span.start_byte
+                            and span.end_byte <= c.span.end_byte])
+    t_scan = time.perf_counter() - stime
+
+    stime = time.perf_counter()
+    indexed = []
+    for conditionals, targets in work:
+        index = ConditionalIndex(conditionals)
+        for span in targets:
+            indexed.append(index.enclosing(span))
+    t_index = time.perf_counter() - stime
+
+    print(f"{len(files)} files, {count} definitions, "
+          f"{sum(len(conditionals) for conditionals, _ in work)} conditionals")
+    print(f"linear scan  {t_scan * 1e3:8.1f} ms")
+    print(f"index        {t_index * 1e3:8.1f} ms  (build included, identical: {scanned == indexed})")
@@ -0,0 +1,399 @@
+
+import time
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from tree_sitter import Node, Range
+
+from .comment import CommentInfo, _comment_info
+from .conditional import (
+    ConditionalMacroInfo, _conditional_info,
+    _SIGNIFICANT_PREPROC_TYPES as _CONDITIONAL_TYPES,
+)
+from .include import (
+    IncludeInfo, _include_info,
+    _SIGNIFICANT_PREPROC_TYPES as _INCLUDE_TYPES,
+)
+from .function import FunctionInfo, _try_function_info
+from .glob_declerator import (
+    FunctionDecleratorInfo, GlobalVariableInfo,
+    _global_declerator_info, _split_global_declerators,
+    _DISQUALIFYING_TYPES as _GLOBAL_DISQUALIFYING_TYPES,
+)
+from .type_alias import TypeAlias, _extract_typedef
+from .composite_type import (
+    CompositeTypeInfo, _composite_type_info,
+    _SPECIFIER_NODE_KINDS, _EXCLUDING_ANCESTOR_KINDS,
+)
+from .preproc_def import (
+    PreprocDefInfo, _preproc_def_info,
+    _SIGNIFICANT_PREPROC_TYPES as _PREPROC_DEF_TYPES,
+)
+from .member import EnumeratorInfo, FieldInfo, _enumerator_info, _field_infos
+from ..source_edit import SourceEdit, shift_spans
+from ..tslang import ParseTimeout
+
+
+class ExtractedComponents(NamedTuple):
+    """
+    All component kinds of one translation unit, in extractor order.
+    Groups that were not requested from `extract_components` are None.
+    """
+    comments: Optional[List[CommentInfo]]
+    conditionals: Optional[List[ConditionalMacroInfo]]
+    includes: Optional[List[IncludeInfo]]
+    functions: Optional[List[FunctionInfo]]
+    function_declerators: Optional[List[FunctionDecleratorInfo]]
+    global_variables: Optional[List[GlobalVariableInfo]]
+    type_aliases: Optional[List[TypeAlias]]
+    composite_types: Optional[List[CompositeTypeInfo]]
+    preproc_defs: Optional[List[PreprocDefInfo]]
+    enumerators: Optional[List[EnumeratorInfo]]
+    fields: Optional[List[FieldInfo]]
+
+
+COMPONENT_GROUPS = ExtractedComponents._fields
+
+# Bump whenever extraction results change, it keys persisted components.
+EXTRACTOR_VERSION = 3
+
+# group -> component dataclass
+COMPONENT_KINDS: Dict[str, type] = {
+    "comments": CommentInfo,
+    "conditionals": ConditionalMacroInfo,
+    "includes": IncludeInfo,
+    "functions": FunctionInfo,
+    "function_declerators": FunctionDecleratorInfo,
+    "global_variables": GlobalVariableInfo,
+    "type_aliases": TypeAlias,
+    "composite_types": CompositeTypeInfo,
+    "preproc_defs": PreprocDefInfo,
+    "enumerators": EnumeratorInfo,
+    "fields": FieldInfo,
+}
+
+
+# Ancestor context, tracked as bit flags while walking so that no collector
+# has to climb the parent chain (`is_under`) for every candidate node.
+_CTX_GLOBAL_DISQUALIFIED = 1 << 0   # see `glob_declerator._DISQUALIFYING_TYPES`
+_CTX_COMPOSITE_EXCLUDED = 1 << 1    # see `composite_type._EXCLUDING_ANCESTOR_KINDS`
+_CTX_FIELD_DECLARATION = 1 << 2     # under `field_declaration`
+
+_CONTEXT_BITS: Dict[str, int] = {}
+for _types, _bit in (
+    (_GLOBAL_DISQUALIFYING_TYPES, _CTX_GLOBAL_DISQUALIFIED),
+    (_EXCLUDING_ANCESTOR_KINDS, _CTX_COMPOSITE_EXCLUDED),
+    ({"field_declaration", }, _CTX_FIELD_DECLARATION),
+):
+    for _t in _types:
+        _CONTEXT_BITS[_t] = _CONTEXT_BITS.get(_t, 0) | _bit
+
+
+class _Collector:
+    """Per-walk output buffers plus the `node.type` dispatch handlers."""
+
+    def __init__(self, source: bytes) -> None:
+        self.source = source
+        self.comments: List[CommentInfo] = []
+        self.conditionals: List[ConditionalMacroInfo] = []
+        self.includes: List[IncludeInfo] = []
+        self.functions: List[FunctionInfo] = []
+        self.global_declerators: List[FunctionDecleratorInfo | GlobalVariableInfo] = []
+        self.type_aliases: List[TypeAlias] = []
+        self.composite_types: List[CompositeTypeInfo] = []
+        self.preproc_defs: List[PreprocDefInfo] = []
+        self.enumerators: List[EnumeratorInfo] = []
+        self.fields: List[FieldInfo] = []
+
+    def on_comment(self, node: Node, ctx: int) -> None:
+        self.comments.append(_comment_info(node, self.source))
+
+    def on_conditional(self, node: Node, ctx: int) -> None:
+        info = _conditional_info(node, self.source)
+        if info is not None:
+            self.conditionals.append(info)
+
+    def on_include(self, node: Node, ctx: int) -> None:
+        info = _include_info(node, self.source)
+        if info is not None:
+            self.includes.append(info)
+
+    def on_function(self, node: Node, ctx: int) -> None:
+        info = _try_function_info(node, self.source)
+        if info:
+            self.functions.append(info)
+
+    def on_declaration(self, node: Node, ctx: int) -> None:
+        if ctx & _CTX_GLOBAL_DISQUALIFIED:
+            return
+        info = _global_declerator_info(node, self.source)
+        if info is not None:
+            self.global_declerators.append(info)
+
+    def on_typedef(self, node: Node, ctx: int) -> None:
+        self.type_aliases.append(_extract_typedef(node, self.source))
+
+    def on_composite(self, node: Node, ctx: int) -> None:
+        if ctx & _CTX_COMPOSITE_EXCLUDED:
+            return
+        info = _composite_type_info(
+            node, self.source,
+            under_field_declaration=bool(ctx & _CTX_FIELD_DECLARATION),
+        )
+        if info is not None:
+            self.composite_types.append(info)
+
+    def on_preproc_def(self, node: Node, ctx: int) -> None:
+        self.preproc_defs.append(_preproc_def_info(node, self.source))
+
+    def on_enumerator(self, node: Node, ctx: int) -> None:
+        info = _enumerator_info(node, self.source)
+        if info is not None:
+            self.enumerators.append(info)
+
+    def on_field(self, node: Node, ctx: int) -> None:
+        self.fields.extend(_field_infos(node, self.source))
+
+    def finish(self, groups: frozenset[str]) -> ExtractedComponents:
+        # Mirror the ordering guarantees of the individual extractors.
+        by_start = lambda c: c.span.start_byte
+        self.conditionals.sort(key=by_start)
+        self.includes.sort(key=by_start)
+        self.functions.sort(key=by_start)
+        self.type_aliases.sort(key=by_start)
+        self.composite_types.sort(key=by_start)
+        func_decls, glob_vars = _split_global_declerators(self.global_declerators)
+        components = ExtractedComponents(
+            comments=self.comments,
+            conditionals=self.conditionals,
+            includes=self.includes,
+            functions=self.functions,
+            function_declerators=func_decls,
+            global_variables=glob_vars,
+            type_aliases=self.type_aliases,
+            composite_types=self.composite_types,
+            preproc_defs=self.preproc_defs,
+            enumerators=self.enumerators,
+            fields=self.fields,
+        )
+        return components._replace(**{
+            group: None for group in COMPONENT_GROUPS if group not in groups
+        })
+
+
+_Handler = Callable[[_Collector, Node, int], None]
+
+# group -> {node.type: handler}
+_GROUP_DISPATCH: Dict[str, Dict[str, _Handler]] = {
+    "comments": {"comment": _Collector.on_comment},
+    "conditionals": dict.fromkeys(_CONDITIONAL_TYPES, _Collector.on_conditional),
+    "includes": dict.fromkeys(_INCLUDE_TYPES, _Collector.on_include),
+    "functions": {"function_definition": _Collector.on_function},
+    # Function declarators and global variables come from the same nodes.
+    "function_declerators": {"declaration": _Collector.on_declaration},
+    "global_variables": {"declaration": _Collector.on_declaration},
+    "type_aliases": {"type_definition": _Collector.on_typedef},
+    "composite_types": dict.fromkeys(_SPECIFIER_NODE_KINDS, _Collector.on_composite),
+    "preproc_defs": dict.fromkeys(_PREPROC_DEF_TYPES, _Collector.on_preproc_def),
+    "enumerators": {"enumerator": _Collector.on_enumerator},
+    "fields": {"field_declaration": _Collector.on_field},
+}
+
+_SIBLING_GROUPS: Dict[str, str] = {
+    "function_declerators": "global_variables",
+    "global_variables": "function_declerators",
+}
+
+
+def _normalize_groups(groups: Optional[Iterable[str]]) -> frozenset[str]:
+    if groups is None:
+        return frozenset(COMPONENT_GROUPS)
+    selected = set(groups)
+    unknown = selected.difference(COMPONENT_GROUPS)
+    if unknown:
+        raise ValueError(f"Unknown component groups: {sorted(unknown)}. "
+                         f"Expected any of {COMPONENT_GROUPS}.")
+    # Siblings are produced by the same collector at no extra cost.
+    selected.update(_SIBLING_GROUPS[g] for g in list(selected) if g in _SIBLING_GROUPS)
+    return frozenset(selected)
+
+
+# Nodes descended into between two checks of an extraction deadline
+_DEADLINE_CHECK_INTERVAL = 4096
+
+
+def _check_deadline(deadline: Optional[float]) -> None:
+    if deadline is not None and time.perf_counter() > deadline:
+        raise ParseTimeout("Extraction ran past its deadline")
+
+
+def extract_components(
+        root: Node, source: bytes,
+        groups: Optional[Iterable[str]] = None,
+        *,
+        deadline: Optional[float] = None,
+) -> ExtractedComponents:
+    """
+    Walk the tree once and dispatch every node by ``node.type`` into the
+    component collectors. The result is identical to running each of the
+    ``extract_*`` functions separately.
+
+    ``groups`` restricts the walk to a subset of `COMPONENT_GROUPS`; the
+    other fields of the result are None. Requesting either of
+    ``function_declerators``/``global_variables`` yields both.
+
+    With ``deadline`` (a `time.perf_counter` value), `ParseTimeout` is
+    raised once the walk runs past it.
+    """
+    selected = _normalize_groups(groups)
+    collector = _Collector(source)
+    context_bits = _CONTEXT_BITS
+    dispatch: Dict[str, _Handler] = {}
+    for group in selected:
+        dispatch.update(_GROUP_DISPATCH[group])
+
+    # Pre-order walk with a TreeCursor; ``ctx_stack[-1]`` is the ancestor
+    # context of the nodes at the cursor's current depth.
+    cursor = root.walk()
+    ctx_stack: List[int] = [0]
+    steps = _DEADLINE_CHECK_INTERVAL
+    while True:
+        node = cursor.node
+        node_type = node.type
+        ctx = ctx_stack[-1]
+
+        handler = dispatch.get(node_type)
+        if handler is not None:
+            handler(collector, node, ctx)
+
+        if cursor.goto_first_child():
+            ctx_stack.append(ctx | context_bits.get(node_type, 0))
+            if deadline is not None:
+                steps -= 1
+                if not steps:
+                    steps = _DEADLINE_CHECK_INTERVAL
+                    _check_deadline(deadline)
+            continue
+        while not cursor.goto_next_sibling():
+            if not cursor.goto_parent():
+                return collector.finish(selected)
+            ctx_stack.pop()
+
+
+def update_components(
+        components: ExtractedComponents,
+        edit: SourceEdit,
+        root: Node, source: bytes,
+        changed_ranges: Iterable[Range] = (),
+        *,
+        extract: Callable[..., ExtractedComponents] = extract_components,
+) -> ExtractedComponents:
+    """
+    Bring ``components`` of the source before ``edit`` up to date with the
+    reparsed tree ``root`` of the new ``source``, re-extracting only the
+    top-level nodes touched by the edit or by ``changed_ranges`` (see
+    `tree_sitter.Tree.changed_ranges`). Components before the edit are
+    kept, the ones after it are shifted. Groups that are None stay None.
+    """
+    groups = [g for g in COMPONENT_GROUPS if getattr(components, g) is not None]
+    if not groups:
+        return components
+
+    lo, hi = edit.start_byte, edit.new_end_byte
+    for r in changed_ranges:
+        lo, hi = min(lo, r.start_byte), max(hi, r.end_byte)
+
+    # Every component lies within one top-level node, so widening the dirty
+    # window to whole top-level nodes makes it safe to re-extract.
+    dirty: List[Node] = [
+        n for n in root.children if n.end_byte >= lo and n.start_byte <= hi
+    ]
+    if dirty:
+        lo, hi = min(lo, dirty[0].start_byte), max(hi, dirty[-1].end_byte)
+    old_hi = hi - (edit.new_end_byte - edit.old_end_byte)
+
+    fresh: Dict[str, List] = {g: [] for g in groups}
+    for node in dirty:
+        extracted = extract(node, source, groups=groups)
+        for g in groups:
+            fresh[g].extend(getattr(extracted, g))
+
+    updated = {}
+    for g in groups:
+        before, after = [], []
+        for c in getattr(components, g):
+            if c.span.end_byte <= lo:
+                before.append(c)
+            elif c.span.start_byte >= old_hi:
+                after.append(shift_spans(c, edit))
+        updated[g] = before + fresh[g] + after
+    return components._replace(**updated)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+    from pathlib import Path
+
+    from . import (
+        extract_comments, extract_conditionals, extract_includes,
+        extract_functions, extract_type_aliases, extract_composite_types,
+        extract_global_declerators, extract_preproc_defs,
+        extract_enumerators, extract_fields,
+    )
+    from ..tslang import parse_c_source
+
+    def _legacy(root: Node, source: bytes) -> ExtractedComponents:
+        func_decls, glob_vars = extract_global_declerators(root, source)
+        return ExtractedComponents(
+            comments=extract_comments(root, source),
+            conditionals=extract_conditionals(root, source),
+            includes=extract_includes(root, source),
+            functions=extract_functions(root, source),
+            function_declerators=func_decls,
+            global_variables=glob_vars,
+            type_aliases=extract_type_aliases(root, source),
+            composite_types=extract_composite_types(root, source),
+            preproc_defs=extract_preproc_defs(root, source),
+            enumerators=extract_enumerators(root, source),
+            fields=extract_fields(root, source),
+        )
+
+    parser = argparse.ArgumentParser(
+        description="Compare per-component extractors with the single-pass engine."
+    )
+    parser.add_argument(
+        "paths", type=str, nargs="*",
+        default=[str(Path(__file__).parents[1] / "tests")],
+        help="C files or directories (default: the parser test fixtures)."
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    files: List[Path] = []
+    for p in map(Path, args.paths):
+        files.extend(sorted(p.rglob("*.[ch]")) if p.is_dir() else [p])
+
+    total_legacy = total_single = 0.0
+    for fp in files:
+        source = fp.read_bytes()
+        root = parse_c_source(source).root_node
+
+        stime = time.perf_counter()
+        for _ in range(args.repeat):
+            expected = _legacy(root, source)
+        t_legacy = (time.perf_counter() - stime) / args.repeat
+
+        stime = time.perf_counter()
+        for _ in range(args.repeat):
+            actual = extract_components(root, source)
+        t_single = (time.perf_counter() - stime) / args.repeat
+
+        total_legacy += t_legacy
+        total_single += t_single
+        same = "ok" if actual == expected else "MISMATCH"
+        print(f"{fp.name:<32} legacy {t_legacy * 1e3:8.2f} ms  "
+              f"single-pass {t_single * 1e3:8.2f} ms  [{same}]")
+
+    print(f"{'TOTAL':<32} legacy {total_legacy * 1e3:8.2f} ms  "
+          f"single-pass {total_single * 1e3:8.2f} ms  "
+          f"(x{total_legacy / max(total_single, 1e-9):.1f})")
@@ -0,0 +1,199 @@
+import re
+import time
+from bisect import bisect_right
+from typing import Iterator, List, Optional, Pattern, Tuple
+
+from tree_sitter import Point
+
+from ..source_span import SourceSpan
+from .extractor import ExtractedComponents
+from .function import FunctionInfo
+from .include import IncludeInfo, _INCLUDE_RE
+from .preproc_def import PreprocDefInfo
+
+
+# Preprocessor lines, comments and literals are skipped whole; the braces
+# and semicolons left over delimit top-level statements. An unterminated
+# comment runs to the end, rather than being rescanned from every ``/*``.
+_TOKEN_RE = re.compile(
+    rb'^[ \t]*#(?:\\\r?\n|[^\n])*'
+    rb'|//[^\n]*'
+    rb'|/\*.*?(?:\*/|\Z)'
+    rb'|"(?:\\.|[^"\\\n])*"'
+    rb"|'(?:\\.|[^'\\\n])*'"
+    rb'|[{};]',
+    flags=re.M | re.S,
+)
+
+_DEFINE_RE = re.compile(
+    rb'^[ \t]*#[ \t]*define[ \t]+(?P<name>[A-Za-z_]\w*)'
+    rb'(?P<params>\([^)\n]*\))?'
+    rb'(?:[ \t]|\\\r?\n)*(?P<arg>(?:\\\r?\n|[^\n])*)\n?',
+    flags=re.M,
+)
+
+_INCLUDE_LINE_RE = re.compile(rb'^[ \t]*#[ \t]*include\b[^\n]*\n?', flags=re.M)
+
+_CALL_RE = re.compile(rb'([A-Za-z_]\w*)\s*\(')
+
+_LINKAGE_RE = re.compile(rb'extern\s*"C(?:\+\+)?"$')
+
+_COMMENT_START_RE = re.compile(rb'//|/\*')
+
+_NOT_FUNCTION_NAMES = frozenset((
+    b'__attribute__', b'__declspec', b'__asm__', b'asm', b'sizeof',
+    b'if', b'for', b'while', b'switch', b'return',
+))
+
+
+# Matches between two checks of the deadline
+_DEADLINE_CHECK_INTERVAL = 256
+
+
+def _matches(pattern: Pattern[bytes], source: bytes,
+             deadline: Optional[float]) -> Iterator["re.Match[bytes]"]:
+    """``pattern.finditer(source)``, ending early once ``deadline`` passed."""
+    for i, m in enumerate(pattern.finditer(source)):
+        if (deadline is not None and not i % _DEADLINE_CHECK_INTERVAL
+                and time.perf_counter() > deadline):
+            return
+        yield m
+
+
+class _Points:
+    """Byte offset -> `Point`, from the offsets of every newline."""
+
+    def __init__(self, source: bytes) -> None:
+        self._newlines = [m.start() for m in re.finditer(rb'\n', source)]
+
+    def __call__(self, byte: int) -> Point:
+        row = bisect_right(self._newlines, byte - 1)
+        line_start = self._newlines[row - 1] + 1 if row else 0
+        return Point(row, byte - line_start)
+
+    def span(self, start_byte: int, end_byte: int) -> SourceSpan:
+        return SourceSpan(start_byte, end_byte, self(start_byte), self(end_byte))
+
+
+def _preproc_defs(source: bytes, points: _Points,
+                  deadline: Optional[float]) -> List[PreprocDefInfo]:
+    results: List[PreprocDefInfo] = []
+    for m in _matches(_DEFINE_RE, source, deadline):
+        arg_start, arg_end = m.span('arg')
+        arg = source[arg_start:arg_end]
+        # As tree-sitter: up to a trailing comment, spaces before it included
+        comment = _COMMENT_START_RE.search(arg)
+        arg = arg[:comment.start()] if comment else arg.rstrip()
+        if not arg.strip():
+            arg = b''
+        arg_end = arg_start + len(arg)
+        results.append(PreprocDefInfo(
+            span=points.span(m.start() + len(m.group()) - len(m.group().lstrip()), m.end()),
+            name=m.group('name').decode('utf-8', errors='replace'),
+            params_span=points.span(*m.span('params')) if m.group('params') else None,
+            arg_span=points.span(arg_start, arg_end) if arg else None,
+        ))
+    return results
+
+
+def _includes(source: bytes, points: _Points,
+              deadline: Optional[float]) -> List[IncludeInfo]:
+    results: List[IncludeInfo] = []
+    for m in _matches(_INCLUDE_LINE_RE, source, deadline):
+        text = m.group().decode('utf-8', errors='replace').strip()
+        match = _INCLUDE_RE.match(text)
+        if match:
+            start = m.start() + len(m.group()) - len(m.group().lstrip())
+            results.append(IncludeInfo(
+                span=points.span(start, m.end()),
+                include_target=match.group('path'),
+            ))
+    return results
+
+
+def _function_name(header: bytes) -> Optional[str]:
+    for m in _CALL_RE.finditer(header):
+        if m.group(1) not in _NOT_FUNCTION_NAMES:
+            return m.group(1).decode('utf-8', errors='replace')
+    return None
+
+
+def _functions(source: bytes, points: _Points,
+               deadline: Optional[float]) -> List[FunctionInfo]:
+    results: List[FunctionInfo] = []
+    depth = 0
+    statement_start = 0
+    body_start: Optional[Tuple[int, bytes]] = None
+    for m in _matches(_TOKEN_RE, source, deadline):
+        token = m.group()
+        if token == b'{':
+            if depth == 0:
+                header = source[statement_start:m.start()].strip()
+                body_start = None
+                if _LINKAGE_RE.search(header):
+                    # Declarations in ``extern "C" { ... }`` stay at file scope
+                    statement_start = m.end()
+                    continue
+                if header.endswith(b')') and b'=' not in header:
+                    body_start = (m.start(), header)
+            depth += 1
+        elif token == b'}':
+            depth = max(0, depth - 1)
+            if depth and (m.start() == 0 or source[m.start() - 1] == 0x0A):
+                # Braces unbalanced by conditional code: a closing brace in
+                # the first column conventionally ends a definition.
+                depth = 0
+            if depth == 0:
+                if body_start is not None:
+                    start, header = body_start
+                    name = _function_name(header)
+                    if name is not None:
+                        def_start = statement_start + (
+                            len(source[statement_start:start])
+                            - len(source[statement_start:start].lstrip()))
+                        results.append(FunctionInfo(
+                            name=name,
+                            span=points.span(def_start, m.end()),
+                            signature=re.sub(r'\s+', ' ', header.decode(
+                                'utf-8', errors='ignore')).strip(),
+                            compound_span=points.span(start, m.end()),
+                        ))
+                    body_start = None
+                statement_start = m.end()
+        elif depth == 0:
+            if token == b';' or token.lstrip()[:1] == b'#':
+                statement_start = m.end()
+            elif not source[statement_start:m.start()].strip():
+                # A comment ahead of the statement is not part of it
+                statement_start = m.end()
+    return results
+
+
+def extract_components_by_regex(
+        source: bytes,
+        *,
+        deadline: Optional[float] = None,
+) -> ExtractedComponents:
+    """
+    Degraded extraction without a syntax tree, for sources that cannot be
+    parsed within their time budget: only macro definitions, includes and
+    function definitions (found by matching braces at file scope) are
+    recovered; every other group is empty.
+
+    With ``deadline`` (a `time.perf_counter` value), each group stops being
+    collected once it is past, keeping what was found up to then.
+    """
+    points = _Points(source)
+    return ExtractedComponents(
+        comments=[],
+        conditionals=[],
+        includes=_includes(source, points, deadline),
+        functions=_functions(source, points, deadline),
+        function_declerators=[],
+        global_variables=[],
+        type_aliases=[],
+        composite_types=[],
+        preproc_defs=_preproc_defs(source, points, deadline),
+        enumerators=[],
+        fields=[],
+    )
@@ -5,7 +5,7 @@ from typing import List, Optional, Tuple
 from tree_sitter import Node
 
 from ..source_span import SourceSpan
-from ..utils import children_of_type, descendants_of_type, find_nodes_outside_types
+from ..utils import children_of_type, first_descendant_of_type, find_nodes_outside_types
 
 
 @dataclass(frozen=True)
@@ -92,6 +92,90 @@ class GlobalVariableInfo:
                 f"span={self.span!r}, init_list={self.init_list_span!r})")
 
 
+# A `declaration` nested in any of these is not a global declaration.
+_DISQUALIFYING_TYPES = {
+    "function_definition",
+    "compound_statement",
+    "field_declaration_list",
+}
+
+
+def _extract_function_declerator(
+        n: Node, source: bytes
+) -> FunctionDecleratorInfo | None:
+    function_declerator = first_descendant_of_type(n, {"function_declarator", })
+    if function_declerator is None:
+        return None
+    identifier = children_of_type(function_declerator, {"identifier", })
+    identifier = identifier[0] if identifier else None
+    if identifier:
+        name = source[identifier.start_byte:identifier.end_byte].decode("utf-8")
+    else:
+        name = None
+    return FunctionDecleratorInfo(
+        name=name,
+        span=SourceSpan.from_node(n),
+    )
+
+
+def _extract_global_variable(
+        n: Node, source: bytes
+) -> GlobalVariableInfo | None:
+    storage_class_specifiers = children_of_type(n, {
+        "storage_class_specifier",
+    })
+    is_extern = any(
+        source[scs.start_byte:scs.end_byte] == b"extern"
+        for scs in storage_class_specifiers
+    )
+    is_static = any(
+        source[scs.start_byte:scs.end_byte] == b"static"
+        for scs in storage_class_specifiers
+    )
+
+    init_declerator = children_of_type(n, {"init_declarator", })
+    init_declerator = init_declerator[0] if init_declerator else None
+    
+    identifier_under: Node = n
+    if init_declerator:
+        identifier_under = init_declerator
+
+    identifier = first_descendant_of_type(identifier_under, {"identifier", })
+
+    if identifier:
+        name = source[identifier.start_byte:identifier.end_byte].decode("utf-8")
+    else:
+        name = None
+    
+    init_list_node = None
+    if init_declerator:
+        init_list_node = children_of_type(
+            init_declerator,
+            {"initializer_list", },
+        )
+        if init_list_node:
+            init_list_node = init_list_node[0]
+
+    return GlobalVariableInfo(
+        name=name,
+        span=SourceSpan.from_node(n),
+        is_extern=is_extern,
+        is_static=is_static,
+        has_initialize=bool(init_declerator),
+        init_list_span=SourceSpan.from_node(init_list_node) if init_list_node else None,
+    )
+
+
+def _global_declerator_info(
+        declaration: Node, source: bytes
+) -> FunctionDecleratorInfo | GlobalVariableInfo | None:
+    return (
+        # Only if function declerator failed then try global variable
+        _extract_function_declerator(declaration, source) or
+        _extract_global_variable(declaration, source)
+    )
+
+
 def _extract_global_declerators(
         root: Node,
         source: bytes,
@@ -100,95 +184,22 @@ def _extract_global_declerators(
     declerators = find_nodes_outside_types(
         root,
         target_types="declaration",
-        disqualifying_types={
-            "function_definition",
-            "compound_statement",
-            "field_declaration_list",
-        }
+        disqualifying_types=_DISQUALIFYING_TYPES,
     )
 
     results: List[FunctionDecleratorInfo | GlobalVariableInfo] = []
 
-    def _extract_function_declerator(n: Node) -> FunctionDecleratorInfo | None:
-        function_declerator = descendants_of_type(n, {"function_declarator", })
-        if not function_declerator: 
-            return None
-        function_declerator = function_declerator[0]
-        identifier = children_of_type(function_declerator, {"identifier", })
-        identifier = identifier[0] if identifier else None
-        if identifier:
-            name = source[identifier.start_byte:identifier.end_byte].decode("utf-8")
-        else:
-            name = None
-        return FunctionDecleratorInfo(
-            name=name,
-            span=SourceSpan.from_node(n),
-        )
-
-    def _extract_global_variable(n: Node) -> GlobalVariableInfo | None:
-        storage_class_specifiers = children_of_type(n, {
-            "storage_class_specifier",
-        })
-        is_extern = any(
-            source[scs.start_byte:scs.end_byte] == b"extern"
-            for scs in storage_class_specifiers
-        )
-        is_static = any(
-            source[scs.start_byte:scs.end_byte] == b"static"
-            for scs in storage_class_specifiers
-        )
-
-        init_declerator = children_of_type(n, {"init_declarator", })
-        init_declerator = init_declerator[0] if init_declerator else None
-        
-        identifier_under: Node = n
-        if init_declerator:
-            identifier_under = init_declerator
-
-        identifier = descendants_of_type(identifier_under, {"identifier", })
-        identifier = identifier[0] if identifier else None
-
-        if identifier:
-            name = source[identifier.start_byte:identifier.end_byte].decode("utf-8")
-        else:
-            name = None
-        
-        init_list_node = None
-        if init_declerator:
-            init_list_node = children_of_type(
-                init_declerator,
-                {"initializer_list", },
-            )
-            if init_list_node:
-                init_list_node = init_list_node[0]
-
-        return GlobalVariableInfo(
-            name=name,
-            span=SourceSpan.from_node(n),
-            is_extern=is_extern,
-            is_static=is_static,
-            has_initialize=bool(init_declerator),
-            init_list_span=SourceSpan.from_node(init_list_node) if init_list_node else None,
-        )
-
     for declaration in declerators:
-        
-        result = (
-            # Only if function declerator failed then try global variable
-            _extract_function_declerator(declaration) or
-            _extract_global_variable(declaration)
-        )
+        result = _global_declerator_info(declaration, source)
         if result is not None:
             results.append(result)
 
     return results
 
 
-def extract_global_declerators(
-        root: Node,
-        source: bytes,
+def _split_global_declerators(
+        declerators: List[FunctionDecleratorInfo | GlobalVariableInfo],
 ) -> Tuple[List[FunctionDecleratorInfo], List[GlobalVariableInfo]]:
-    declerators = _extract_global_declerators(root, source)
     functions: List[FunctionDecleratorInfo] = []
     global_vars: List[GlobalVariableInfo] = []
 
@@ -199,3 +210,11 @@ def extract_global_declerators(
             global_vars.append(d)
 
     return functions, global_vars
+
+
+def extract_global_declerators(
+        root: Node,
+        source: bytes,
+) -> Tuple[List[FunctionDecleratorInfo], List[GlobalVariableInfo]]:
+    declerators = _extract_global_declerators(root, source)
+    return _split_global_declerators(declerators)
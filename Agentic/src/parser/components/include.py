@@ -42,20 +42,24 @@ _INCLUDE_RE = re.compile(r'#\s*include\s*(?P<path><[^>]+>|"[^"]+")')
 _SIGNIFICANT_PREPROC_TYPES = {"preproc_include"}
 
 
+def _include_info(node: Node, source: bytes) -> Optional[IncludeInfo]:
+    text = str_of(node, source).strip()
+    match = _INCLUDE_RE.match(text)
+    if not match:
+        return None
+    return IncludeInfo(
+        span=SourceSpan.from_node(node),
+        include_target=match.group("path"),
+    )
+
+
 def extract_includes(root: Node, source: bytes) -> List[IncludeInfo]:
     results: List[IncludeInfo] = []
     for node in iter_tree(root, named_only=False):
         if node.type not in _SIGNIFICANT_PREPROC_TYPES:
             continue
-        text = str_of(node, source).strip()
-        match = _INCLUDE_RE.match(text)
-        if not match:
-            continue
-        results.append(
-            IncludeInfo(
-                span=SourceSpan.from_node(node),
-                include_target=match.group("path"),
-            )
-        )
+        info = _include_info(node, source)
+        if info is not None:
+            results.append(info)
     results.sort(key=lambda info: info.span.start_byte)
     return results
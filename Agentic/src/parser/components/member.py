@@ -0,0 +1,158 @@
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from tree_sitter import Node
+
+from ..source_span import SourceSpan
+from ..utils import first_descendant_of_type, is_under, iter_tree, nearest_ancestor, str_of
+
+
+@dataclass(frozen=True)
+class EnumeratorInfo:
+    name: Optional[str]
+    span: SourceSpan                # the enumerator, with its value if any
+    enum_name: Optional[str]        # tag of the enum, else its typedef name
+    definition_span: SourceSpan     # the enum definition, typedef included
+
+    def to_json(self) -> dict:
+        return {
+            'name': self.name,
+            'span': self.span.to_json(),
+            'enum_name': self.enum_name,
+            'definition_span': self.definition_span.to_json(),
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> 'EnumeratorInfo':
+        return cls(
+            name=data.get('name'),
+            span=SourceSpan.from_json(data['span']),
+            enum_name=data.get('enum_name'),
+            definition_span=SourceSpan.from_json(data['definition_span']),
+        )
+
+    def __str__(self) -> str:
+        return (f"EnumeratorInfo(name={self.name}, enum_name={self.enum_name}, "
+                f"span={self.span})")
+
+    def __repr__(self) -> str:
+        return (f"EnumeratorInfo(name={self.name!r}, span={self.span!r}, "
+                f"enum_name={self.enum_name!r}, "
+                f"definition_span={self.definition_span!r})")
+
+
+@dataclass(frozen=True)
+class FieldInfo:
+    name: Optional[str]
+    span: SourceSpan                # the field declaration
+    owner: Optional[str]            # tag of the struct/union, else its typedef name
+    owner_span: SourceSpan          # the struct/union definition, typedef included
+
+    def to_json(self) -> dict:
+        return {
+            'name': self.name,
+            'span': self.span.to_json(),
+            'owner': self.owner,
+            'owner_span': self.owner_span.to_json(),
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> 'FieldInfo':
+        return cls(
+            name=data.get('name'),
+            span=SourceSpan.from_json(data['span']),
+            owner=data.get('owner'),
+            owner_span=SourceSpan.from_json(data['owner_span']),
+        )
+
+    def __str__(self) -> str:
+        return f"FieldInfo(name={self.name}, owner={self.owner}, span={self.span})"
+
+    def __repr__(self) -> str:
+        return (f"FieldInfo(name={self.name!r}, span={self.span!r}, "
+                f"owner={self.owner!r}, owner_span={self.owner_span!r})")
+
+
+_SPECIFIER_TYPES = {"struct_specifier", "union_specifier", "enum_specifier"}
+
+# Local types of a function body are not visible to other code.
+_EXCLUDING_ANCESTOR_KINDS = {"function_definition", }
+
+
+def _specifier_name(spec: Node, source: bytes) -> Tuple[Optional[str], Node]:
+    """Tag or typedef name of a specifier, with the node defining it."""
+    parent = spec.parent
+    definition = parent if parent is not None and parent.type == "type_definition" else spec
+    tag = spec.child_by_field_name("name")
+    if tag is not None:
+        return str_of(tag, source).strip(), definition
+    if definition is not spec:
+        for declarator in definition.children_by_field_name("declarator"):
+            alias = (declarator if declarator.type == "type_identifier"
+                     else first_descendant_of_type(declarator, {"type_identifier", }))
+            if alias is not None:
+                return str_of(alias, source).strip(), definition
+    return None, definition
+
+
+def _enumerator_info(n: Node, source: bytes) -> Optional[EnumeratorInfo]:
+    spec = nearest_ancestor(n, _SPECIFIER_TYPES)
+    if spec is None or is_under(spec, _EXCLUDING_ANCESTOR_KINDS):
+        return None
+    name_node = n.child_by_field_name("name")
+    enum_name, definition = _specifier_name(spec, source)
+    return EnumeratorInfo(
+        name=str_of(name_node, source).strip() if name_node is not None else None,
+        span=SourceSpan.from_node(n),
+        enum_name=enum_name,
+        definition_span=SourceSpan.from_node(definition),
+    )
+
+
+def _field_infos(n: Node, source: bytes) -> List[FieldInfo]:
+    spec = nearest_ancestor(n, _SPECIFIER_TYPES)
+    if spec is None or is_under(spec, _EXCLUDING_ANCESTOR_KINDS):
+        return []
+    # Fields of anonymous members belong to the nearest named struct/union
+    owner, definition = _specifier_name(spec, source)
+    while owner is None:
+        outer = nearest_ancestor(spec, _SPECIFIER_TYPES)
+        if outer is None:
+            break
+        spec = outer
+        owner, definition = _specifier_name(spec, source)
+
+    out: List[FieldInfo] = []
+    for declarator in n.children_by_field_name("declarator"):
+        name_node = (declarator if declarator.type == "field_identifier"
+                     else first_descendant_of_type(
+                         declarator, {"field_identifier", },
+                         prune=lambda d: d.type == "parameter_list",
+                     ))
+        if name_node is None:
+            continue
+        out.append(FieldInfo(
+            name=str_of(name_node, source).strip(),
+            span=SourceSpan.from_node(n),
+            owner=owner,
+            owner_span=SourceSpan.from_node(definition),
+        ))
+    return out
+
+
+def extract_enumerators(root: Node, source: bytes) -> List[EnumeratorInfo]:
+    out: List[EnumeratorInfo] = []
+    for n in iter_tree(root, named_only=True):
+        if n.type == "enumerator":
+            info = _enumerator_info(n, source)
+            if info is not None:
+                out.append(info)
+    return out
+
+
+def extract_fields(root: Node, source: bytes) -> List[FieldInfo]:
+    out: List[FieldInfo] = []
+    for n in iter_tree(root, named_only=True):
+        if n.type == "field_declaration":
+            out.extend(_field_infos(n, source))
+    return out
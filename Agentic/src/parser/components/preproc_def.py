@@ -41,35 +41,41 @@ class PreprocDefInfo:
 
 
 
+_SIGNIFICANT_PREPROC_TYPES = {'preproc_def', 'preproc_function_def'}
+
+
+def _preproc_def_info(node: 'Node', source: bytes) -> PreprocDefInfo:
+    identifier = children_of_type(node, {'identifier'})
+    identifier = identifier[0] if identifier else None
+    if identifier:
+        name = identifier.text.decode('utf-8', errors='replace')
+    else:
+        name = None
+    
+    arg = children_of_type(node, {'preproc_arg', })
+    arg_span = None
+    if arg:
+        arg_span = SourceSpan.from_node(arg[0])
+    
+    params = children_of_type(node, {'preproc_params', })
+    params_span = None
+    if params:
+        params_span = SourceSpan.from_node(params[0])
+
+    return PreprocDefInfo(
+        span=SourceSpan.from_node(node),
+        name=name,
+        params_span=params_span,
+        arg_span=arg_span
+    )
+
+
 def extract_preproc_defs(root: 'Node', source: bytes) -> list[PreprocDefInfo]:
 
     results: list[PreprocDefInfo] = []
 
     for node in iter_tree(root):
-        if node.type in {'preproc_def', 'preproc_function_def'}:
-            
-            identifier = children_of_type(node, {'identifier'})
-            identifier = identifier[0] if identifier else None
-            if identifier:
-                name = identifier.text.decode('utf-8', errors='replace')
-            else:
-                name = None
-            
-            arg = children_of_type(node, {'preproc_arg', })
-            arg_span = None
-            if arg:
-                arg_span = SourceSpan.from_node(arg[0])
-            
-            params = children_of_type(node, {'preproc_params', })
-            params_span = None
-            if params:
-                params_span = SourceSpan.from_node(params[0])
-
-            results.append(PreprocDefInfo(
-                span=SourceSpan.from_node(node),
-                name=name,
-                params_span=params_span,
-                arg_span=arg_span
-            ))
+        if node.type in _SIGNIFICANT_PREPROC_TYPES:
+            results.append(_preproc_def_info(node, source))
 
     return results
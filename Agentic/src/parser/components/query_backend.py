@@ -0,0 +1,175 @@
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from tree_sitter import Node
+
+from ..tslang import C_LANGUAGE, compile_query, get_qcursor
+from .extractor import (
+    ExtractedComponents, extract_components, _Collector, _GROUP_DISPATCH, _CONTEXT_BITS,
+    _normalize_groups, _check_deadline,
+)
+
+
+# Query pattern per component group, matching the nodes the walk-based
+# engine dispatches on. Function declarators and global variables come
+# from the same `declaration` nodes, so they share one capture.
+_GROUP_PATTERNS: Dict[str, str] = {
+    "comments": "(comment)",
+    "conditionals": "[(preproc_if) (preproc_ifdef) (preproc_elif) (preproc_else)]",
+    "includes": "(preproc_include)",
+    "functions": "(function_definition)",
+    "function_declerators": "(declaration)",
+    "type_aliases": "(type_definition)",
+    "composite_types": "[(struct_specifier) (union_specifier) (enum_specifier)]",
+    "preproc_defs": "[(preproc_def) (preproc_function_def)]",
+    "enumerators": "(enumerator)",
+    "fields": "(field_declaration)",
+}
+_CAPTURE_OF_GROUP: Dict[str, str] = {g: g for g in _GROUP_PATTERNS}
+_CAPTURE_OF_GROUP["global_variables"] = "function_declerators"
+
+# Ancestors that change how a candidate is collected (see `_CONTEXT_BITS`).
+_CONTEXT_CAPTURE = "context"
+_CONTEXT_PATTERN = "[{}]".format(" ".join(f"({t})" for t in sorted(_CONTEXT_BITS)))
+
+# Captures whose handlers read the ancestor context.
+_CONTEXT_CAPTURES = {"function_declerators", "composite_types"}
+
+
+def _query_source(captures: Iterable[str]) -> str:
+    captures = set(captures)
+    lines = [f"{_GROUP_PATTERNS[c]} @{c}" for c in sorted(captures)]
+    if captures & _CONTEXT_CAPTURES:
+        lines.append(f"{_CONTEXT_PATTERN} @{_CONTEXT_CAPTURE}")
+    return "\n".join(lines)
+
+
+# Compiled once at import; other group subsets are compiled on first use
+# and cached by `compile_query`.
+ALL_COMPONENTS_QUERY = compile_query(_query_source(_GROUP_PATTERNS), C_LANGUAGE)
+
+
+def _pre_order(nodes: List[Node]) -> List[Node]:
+    # By start, outer nodes first.
+    nodes.sort(key=lambda n: (n.start_byte, -n.end_byte))
+    return nodes
+
+
+def _ancestor_contexts(
+        candidates: List[Node],
+        context_nodes: List[Node],
+) -> List[int]:
+    """
+    Sweep candidates and context nodes in pre-order, keeping a stack of the
+    open context ranges, so each candidate gets the context bits of its
+    ancestors without climbing parent chains.
+    """
+    events: List[Tuple[int, int, int, Node | int]] = []
+    for n in context_nodes:
+        events.append((n.start_byte, -n.end_byte, 1, n))
+    for idx, n in enumerate(candidates):
+        # A candidate sorts before a context node with the same range,
+        # so a node never counts as its own ancestor.
+        events.append((n.start_byte, -n.end_byte, 0, idx))
+    events.sort(key=lambda e: e[:3])
+
+    contexts = [0] * len(candidates)
+    stack: List[Tuple[int, int]] = []  # (end_byte, cumulative bits)
+    for start, neg_end, is_context, payload in events:
+        while stack and stack[-1][0] <= start:
+            stack.pop()
+        inherited = stack[-1][1] if stack else 0
+        if is_context:
+            stack.append((-neg_end, inherited | _CONTEXT_BITS[payload.type]))
+        else:
+            contexts[payload] = inherited
+    return contexts
+
+
+def extract_components_by_query(
+        root: Node, source: bytes,
+        groups: Optional[Iterable[str]] = None,
+        *,
+        byte_range: Optional[Tuple[int, int]] = None,
+        deadline: Optional[float] = None,
+) -> ExtractedComponents:
+    """
+    Query-driven counterpart of `extract_components`: node matching runs in
+    a single `QueryCursor` pass in C and only the matches reach Python.
+    With ``byte_range``, only nodes intersecting that range are collected.
+    ``deadline`` is checked between the query pass and each capture group.
+    """
+    selected = _normalize_groups(groups)
+    captures = {_CAPTURE_OF_GROUP[g] for g in selected}
+    query = compile_query(_query_source(captures), C_LANGUAGE)
+    cursor = get_qcursor(query, source_byte_range=byte_range)
+    captured = cursor.captures(root)
+    _check_deadline(deadline)
+
+    context_nodes = _pre_order(captured.get(_CONTEXT_CAPTURE, []))
+    collector = _Collector(source)
+    for capture in sorted(captures):
+        candidates = _pre_order(captured.get(capture, []))
+        if capture in _CONTEXT_CAPTURES:
+            contexts = _ancestor_contexts(candidates, context_nodes)
+        else:
+            contexts = [0] * len(candidates)
+
+        dispatch = _GROUP_DISPATCH[capture]
+        for node, ctx in zip(candidates, contexts):
+            dispatch[node.type](collector, node, ctx)
+        _check_deadline(deadline)
+
+    return collector.finish(selected)
+
+
+# Interchangeable implementations of `extract_components`.
+EXTRACTION_BACKENDS = {
+    "walk": extract_components,
+    "query": extract_components_by_query,
+}
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+    from pathlib import Path
+
+    from ..tslang import parse_c_source
+
+    parser = argparse.ArgumentParser(
+        description="Compare the walk-based and the query-based extraction backends."
+    )
+    parser.add_argument("paths", type=str, nargs="+",
+                        help="C files or directories.")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    files: List[Path] = []
+    for p in map(Path, args.paths):
+        files.extend(sorted(p.rglob("*.[ch]")) if p.is_dir() else [p])
+
+    total_walk = total_query = 0.0
+    for fp in files:
+        source = fp.read_bytes()
+        root = parse_c_source(source).root_node
+
+        stime = time.perf_counter()
+        for _ in range(args.repeat):
+            expected = extract_components(root, source)
+        t_walk = (time.perf_counter() - stime) / args.repeat
+
+        stime = time.perf_counter()
+        for _ in range(args.repeat):
+            actual = extract_components_by_query(root, source)
+        t_query = (time.perf_counter() - stime) / args.repeat
+
+        total_walk += t_walk
+        total_query += t_query
+        same = "ok" if actual == expected else "MISMATCH"
+        print(f"{fp.name:<32} {len(source) / 1024:8.0f} KiB  walk {t_walk * 1e3:8.2f} ms  "
+              f"query {t_query * 1e3:8.2f} ms  [{same}]")
+
+    print(f"{'TOTAL':<32} {'':13}walk {total_walk * 1e3:8.2f} ms  "
+          f"query {total_query * 1e3:8.2f} ms  "
+          f"(x{total_walk / max(total_query, 1e-9):.1f})")
@@ -0,0 +1,268 @@
+import sys
+from array import array
+from dataclasses import fields
+from functools import lru_cache
+from typing import (
+    Any, Dict, Generic, Iterable, Iterator, List, Optional, Sequence,
+    Tuple, TypeVar, Union, get_type_hints, overload,
+)
+
+from tree_sitter import Point
+
+from ..source_span import SourceSpan
+
+
+_C = TypeVar("_C")
+
+# start_byte, end_byte, start_row, start_column, end_row, end_column
+_SPAN_WIDTH = 6
+_NONE = -1
+
+
+class _Layout:
+    """Which columns a component dataclass is stored in, by field kind."""
+
+    def __init__(self, kind: type) -> None:
+        hints = get_type_hints(kind)
+        self.names: Tuple[str, ...] = tuple(f.name for f in fields(kind))
+        self.spans: List[str] = []
+        self.flags: List[str] = []
+        self.strs: List[str] = []
+        for name in self.names:
+            hint = hints[name]
+            if hint in (SourceSpan, Optional[SourceSpan]):
+                self.spans.append(name)
+            elif hint is bool:
+                self.flags.append(name)
+            else:
+                # `str`, `Optional[str]` and `Literal[...]` kinds
+                self.strs.append(name)
+
+
+@lru_cache(maxsize=None)
+def _layout_of(kind: type) -> _Layout:
+    return _Layout(kind)
+
+
+class ComponentTable(Sequence[_C], Generic[_C]):
+    """
+    An immutable, columnar sequence of one component dataclass (``kind``).
+    Spans are kept in typed arrays and strings as indices into a table of
+    interned strings, so a parsed source holds a handful of arrays per
+    component group instead of several objects per component.
+
+    Items are materialized as ``kind`` instances on first access and then
+    reused, the dataclasses being frozen; `where` looks up rows by a string
+    field without materializing the others. Neither the materialized items
+    nor the string lookup are pickled.
+    """
+
+    __slots__ = ("kind", "_len", "_spans", "_flags", "_strs", "_strings",
+                 "_string_index", "_rows")
+
+    def __init__(self, kind: type, items: Iterable[_C] = ()) -> None:
+        layout = _layout_of(kind)
+        spans: Dict[str, array] = {name: array('i') for name in layout.spans}
+        flags: Dict[str, array] = {name: array('b') for name in layout.flags}
+        strs: Dict[str, array] = {name: array('i') for name in layout.strs}
+        strings: Dict[str, int] = {}
+
+        count = 0
+        for item in items:
+            count += 1
+            for name, column in spans.items():
+                span = getattr(item, name)
+                if span is None:
+                    column.extend((_NONE, ) * _SPAN_WIDTH)
+                else:
+                    column.extend((
+                        span.start_byte, span.end_byte,
+                        span.start_point[0], span.start_point[1],
+                        span.end_point[0], span.end_point[1],
+                    ))
+            for name, column in flags.items():
+                column.append(bool(getattr(item, name)))
+            for name, column in strs.items():
+                value = getattr(item, name)
+                if value is None:
+                    column.append(_NONE)
+                    continue
+                index = strings.get(value)
+                if index is None:
+                    index = strings[value] = len(strings)
+                column.append(index)
+
+        self.kind = kind
+        self._len = count
+        self._spans = spans
+        self._flags = flags
+        self._strs = strs
+        # Shared with equal strings of other tables, e.g. across a repository.
+        self._strings: Tuple[str, ...] = tuple(sys.intern(s) for s in strings)
+        self._string_index: Optional[Dict[str, int]] = None
+        self._rows: Optional[List[Optional[_C]]] = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in
+                ("kind", "_len", "_spans", "_flags", "_strs", "_strings")}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        # Also restores tables pickled as ``(None, slots)`` by default
+        if isinstance(state, tuple):
+            state = state[1]
+        for name, value in state.items():
+            setattr(self, name, value)
+        self._string_index = None
+        self._rows = None
+
+    def _span(self, name: str, row: int) -> Optional[SourceSpan]:
+        column = self._spans[name]
+        base = row * _SPAN_WIDTH
+        start_byte = column[base]
+        if start_byte == _NONE:
+            return None
+        return SourceSpan(
+            start_byte=start_byte,
+            end_byte=column[base + 1],
+            start_point=Point(column[base + 2], column[base + 3]),
+            end_point=Point(column[base + 4], column[base + 5]),
+        )
+
+    def _str(self, name: str, row: int) -> Optional[str]:
+        index = self._strs[name][row]
+        return None if index == _NONE else self._strings[index]
+
+    def _item(self, row: int) -> _C:
+        rows = self._rows
+        if rows is None:
+            rows = self._rows = [None] * self._len
+        item = rows[row]
+        if item is None:
+            item = rows[row] = self._materialize(row)
+        return item
+
+    def _materialize(self, row: int) -> _C:
+        values: Dict[str, Any] = {}
+        for name in self._spans:
+            values[name] = self._span(name, row)
+        for name, column in self._flags.items():
+            values[name] = bool(column[row])
+        for name in self._strs:
+            values[name] = self._str(name, row)
+        return self.kind(**values)
+
+    def __len__(self) -> int:
+        return self._len
+
+    @overload
+    def __getitem__(self, index: int) -> _C: ...
+    @overload
+    def __getitem__(self, index: slice) -> Tuple[_C, ...]: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[_C, Tuple[_C, ...]]:
+        if isinstance(index, slice):
+            return tuple(self._item(row) for row in range(self._len)[index])
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("ComponentTable index out of range")
+        return self._item(index)
+
+    def __iter__(self) -> Iterator[_C]:
+        for row in range(self._len):
+            yield self._item(row)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (ComponentTable, tuple, list)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __add__(self, other: Sequence[_C]) -> List[_C]:
+        if not isinstance(other, (ComponentTable, tuple, list)):
+            return NotImplemented
+        return [*self, *other]
+
+    def __radd__(self, other: Sequence[_C]) -> List[_C]:
+        if not isinstance(other, (tuple, list)):
+            return NotImplemented
+        return [*other, *self]
+
+    def __repr__(self) -> str:
+        return f"ComponentTable({self.kind.__name__}, {len(self)} items)"
+
+    def values(self, field: str) -> List[Optional[str]]:
+        """The string field ``field`` of every row, without materializing items."""
+        strings = self._strings
+        return [None if index == _NONE else strings[index] for index in self._strs[field]]
+
+    def where(self, field: str, value: Optional[str]) -> List[_C]:
+        """Items whose string field ``field`` equals ``value``."""
+        column = self._strs[field]
+        if value is None:
+            index = _NONE
+        else:
+            string_index = self._string_index
+            if string_index is None:
+                string_index = self._string_index = {
+                    s: i for i, s in enumerate(self._strings)}
+            index = string_index.get(value)
+            if index is None:
+                return []
+        return [self._item(row) for row, v in enumerate(column) if v == index]
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the table, interned strings excluded."""
+        size = sys.getsizeof(self._strings)
+        for columns in (self._spans, self._flags, self._strs):
+            size += sum(sys.getsizeof(c) for c in columns.values())
+        return size
+
+
+if __name__ == "__main__":
+    import argparse
+    import gc
+    import time
+    import tracemalloc
+    from pathlib import Path
+
+    from .extractor import COMPONENT_KINDS, extract_components
+    from ..tslang import parse_c_source
+
+    parser = argparse.ArgumentParser(
+        description="Memory held by component tuples vs component tables."
+    )
+    parser.add_argument("paths", type=str, nargs="+",
+                        help="C files or directories.")
+    args = parser.parse_args()
+
+    files: List[Path] = []
+    for p in map(Path, args.paths):
+        files.extend(sorted(p.rglob("*.[ch]")) if p.is_dir() else [p])
+
+    def _load(as_table: bool) -> Tuple[list, int, float]:
+        gc.collect()
+        tracemalloc.start()
+        stime = time.perf_counter()
+        held = []
+        for fp in files:
+            source = fp.read_bytes()
+            components = extract_components(parse_c_source(source).root_node, source)
+            for group, items in components._asdict().items():
+                held.append(ComponentTable(COMPONENT_KINDS[group], items)
+                            if as_table else tuple(items))
+            del components
+        elapsed = time.perf_counter() - stime
+        gc.collect()
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return held, size, elapsed
+
+    held, tuple_size, tuple_time = _load(as_table=False)
+    count = sum(map(len, held))
+    del held
+    held, table_size, table_time = _load(as_table=True)
+    print(f"{len(files)} files, {count} components")
+    print(f"tuples  {tuple_size / 2**20:8.2f} MiB  {tuple_time:6.2f} s")
+    print(f"tables  {table_size / 2**20:8.2f} MiB  {table_time:6.2f} s  "
+          f"(x{tuple_size / max(table_size, 1):.1f} smaller)")
@@ -0,0 +1,28 @@
+import time
+
+from .fallback import extract_components_by_regex
+
+
+SOURCE = b'#include "a.h"\n#define N 4\nint f(void) { return N; }\n'
+
+
+def test_regex_extraction():
+    components = extract_components_by_regex(SOURCE)
+    assert [i.include_target for i in components.includes] == ['"a.h"']
+    assert [d.name for d in components.preproc_defs] == ['N']
+    assert [f.name for f in components.functions] == ['f']
+
+
+def test_unterminated_comment_is_scanned_once():
+    source = SOURCE + b'/*' + b'x/*\n' * 20_000 + b'int g(void) { return 0; }\n'
+    stime = time.perf_counter()
+    components = extract_components_by_regex(source)
+    assert time.perf_counter() - stime < 1.0
+    assert [f.name for f in components.functions] == ['f']
+
+
+def test_regex_extraction_stops_at_deadline():
+    source = SOURCE * 2_000
+    assert len(extract_components_by_regex(source).functions) == 2_000
+    components = extract_components_by_regex(source, deadline=time.perf_counter())
+    assert len(components.functions) < 2_000
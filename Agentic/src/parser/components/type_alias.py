@@ -1,12 +1,11 @@
 
 from dataclasses import dataclass
-from typing import List, Literal
+from typing import List, Literal, Optional
 
-from requests_cache import Optional
 from tree_sitter import Node
 
 from ..source_span import SourceSpan
-from ..utils import descendants_of_type, iter_tree, str_of
+from ..utils import iter_descendants_of_type, iter_tree, str_of
 
 
 @dataclass(frozen=True)
@@ -59,7 +58,7 @@ def _extract_typedef(n: Node, source: bytes) -> TypeAlias:
     # TODO: Improve alias name extraction
     # Heuristic: name is the last identifier, 
     # pick the last type_identifier(s) before ';'
-    alias_names_nodes = descendants_of_type(n, {"type_identifier", })
+    alias_names_nodes = iter_descendants_of_type(n, {"type_identifier", })
 
     last_node: Optional[Node] = None
     last_start_byte = -1
@@ -0,0 +1,139 @@
+from dataclasses import fields, is_dataclass, replace
+from typing import Iterable, NamedTuple, Optional, Tuple, TypeVar, Union
+
+from tree_sitter import Point, Tree
+
+from .source_span import SourceSpan
+
+
+Replacement = Tuple[Tuple[int, int], Union[str, bytes]]  # ((start_byte, end_byte), text)
+
+
+def point_at(source: bytes, byte: int) -> Point:
+    """The (row, column) point of a byte offset, as tree-sitter counts it."""
+    row = source.count(b'\n', 0, byte)
+    return Point(row, byte - (source.rfind(b'\n', 0, byte) + 1))
+
+
+class SourceEdit(NamedTuple):
+    """
+    One contiguous edit in the `tree_sitter.Tree.edit` sense:
+    ``[start_byte, old_end_byte)`` of the old source became
+    ``[start_byte, new_end_byte)`` of the new one.
+    """
+    start_byte: int
+    old_end_byte: int
+    new_end_byte: int
+    start_point: Point
+    old_end_point: Point
+    new_end_point: Point
+
+    @classmethod
+    def between(cls, old: bytes, new: bytes) -> Optional["SourceEdit"]:
+        """
+        The edit spanning everything between the common prefix and the common
+        suffix of ``old`` and ``new``; None if they are equal.
+        """
+        if old == new:
+            return None
+        limit = min(len(old), len(new))
+        start = 0
+        # Compare in chunks first, the common prefix is usually long.
+        step = 4096
+        while start + step <= limit and old[start:start + step] == new[start:start + step]:
+            start += step
+        while start < limit and old[start] == new[start]:
+            start += 1
+        suffix = 0
+        limit -= start
+        while suffix + step <= limit and old[len(old) - suffix - step:len(old) - suffix] \
+                == new[len(new) - suffix - step:len(new) - suffix]:
+            suffix += step
+        while suffix < limit and old[len(old) - suffix - 1] == new[len(new) - suffix - 1]:
+            suffix += 1
+        return cls.of(old, new, start, len(old) - suffix, len(new) - suffix)
+
+    @classmethod
+    def of(cls, old: bytes, new: bytes,
+           start_byte: int, old_end_byte: int, new_end_byte: int) -> "SourceEdit":
+        return cls(
+            start_byte=start_byte,
+            old_end_byte=old_end_byte,
+            new_end_byte=new_end_byte,
+            start_point=point_at(old, start_byte),
+            old_end_point=point_at(old, old_end_byte),
+            new_end_point=point_at(new, new_end_byte),
+        )
+
+    def apply_to(self, tree: Tree) -> Tree:
+        """An edited copy of ``tree``, ready to be passed as ``old_tree``."""
+        tree = tree.copy()
+        tree.edit(**self._asdict())
+        return tree
+
+    def shift_point(self, point: Point) -> Point:
+        """Move a point at or after ``old_end_point`` to the new source."""
+        if point.row == self.old_end_point.row:
+            return Point(self.new_end_point.row,
+                         point.column - self.old_end_point.column + self.new_end_point.column)
+        return Point(point.row + self.new_end_point.row - self.old_end_point.row, point.column)
+
+    def shift_span(self, span: SourceSpan) -> SourceSpan:
+        """Move a span lying after ``old_end_byte`` to the new source."""
+        delta = self.new_end_byte - self.old_end_byte
+        return SourceSpan(
+            start_byte=span.start_byte + delta,
+            end_byte=span.end_byte + delta,
+            start_point=self.shift_point(span.start_point),
+            end_point=self.shift_point(span.end_point),
+        )
+
+
+def apply_replacements(
+        source: bytes,
+        replacements: Iterable[Replacement],
+) -> Tuple[bytes, Optional[SourceEdit]]:
+    """
+    Apply non-overlapping replacements and return the new source together
+    with the single `SourceEdit` enclosing all of them (None if there are
+    no replacements).
+    """
+    normalized: list[Tuple[int, int, bytes]] = []
+    for (start_byte, end_byte), text in replacements:
+        if isinstance(text, str):
+            text = text.encode('utf-8')
+        start_byte = max(0, min(len(source), start_byte))
+        end_byte = max(start_byte, min(len(source), end_byte))
+        normalized.append((start_byte, end_byte, text))
+    if not normalized:
+        return source, None
+    normalized.sort(key=lambda item: item[0])
+
+    chunks: list[bytes] = []
+    last_index = 0
+    for start_byte, end_byte, text in normalized:
+        chunks.append(source[last_index:start_byte])
+        chunks.append(text)
+        last_index = end_byte
+    chunks.append(source[last_index:])
+    new_source = b"".join(chunks)
+
+    start_byte = normalized[0][0]
+    old_end_byte = max(end for _, end, _ in normalized)
+    new_end_byte = old_end_byte + len(new_source) - len(source)
+    return new_source, SourceEdit.of(source, new_source, start_byte, old_end_byte, new_end_byte)
+
+
+_T = TypeVar("_T")
+
+
+def shift_spans(obj: _T, edit: SourceEdit) -> _T:
+    """Shift every `SourceSpan` field of a frozen dataclass with ``edit``."""
+    if not is_dataclass(obj):
+        return obj
+    changes = {}
+    for f in fields(obj):
+        value = getattr(obj, f.name)
+        if isinstance(value, SourceSpan):
+            changes[f.name] = edit.shift_span(value)
+    return replace(obj, **changes) if changes else obj
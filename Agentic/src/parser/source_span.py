@@ -12,17 +12,18 @@ class SourceSpan:
     start_point: Point
     end_point: Point
 
-    def bytes_of(self, source_bytes: bytes | str) -> bytes:
-        """Extract the text corresponding to this span from the source bytes."""
+    def bytes_of(self, source_bytes: bytes | memoryview | str) -> bytes | memoryview:
+        """Extract the text corresponding to this span from the source bytes.
+        A `memoryview` source gives a zero-copy view."""
         if isinstance(source_bytes, str):
             source_bytes = source_bytes.encode('utf-8', errors='ignore')
         return source_bytes[self.start_byte:self.end_byte]
 
-    def str_of(self, source_str: bytes | str) -> str:
+    def str_of(self, source_str: bytes | memoryview | str) -> str:
         """Extract the text corresponding to this span from the source string."""
         if isinstance(source_str, str):
             source_str = source_str.encode('utf-8', errors='ignore')
-        return source_str[self.start_byte:self.end_byte].decode('utf-8', errors='ignore')
+        return str(memoryview(source_str)[self.start_byte:self.end_byte], 'utf-8', 'ignore')
 
     def to_json(self) -> dict:
         return {
@@ -1,5 +1,5 @@
 
-from typing import Iterable, List, Optional, Union
+from typing import Callable, Iterable, Iterator, List, Optional, Union
 
 from tree_sitter import Node
 
@@ -12,16 +12,32 @@ def str_of(node: Node, source: bytes) -> str:
     return byte_of(node, source).decode('utf-8', errors='replace')
 
 
+def walk_tree(
+        root: Node,
+        prune: Optional[Callable[[Node], bool]] = None,
+) -> Iterator[Node]:
+    """
+    Pre-order DFS over ``root`` and its descendants driven by a `TreeCursor`,
+    so no child lists are materialized. If ``prune`` returns True for a node,
+    the node is still yielded but its subtree is not entered.
+    """
+    cursor = root.walk()
+    while True:
+        node = cursor.node
+        yield node
+        if (prune is None or not prune(node)) and cursor.goto_first_child():
+            continue
+        while not cursor.goto_next_sibling():
+            if not cursor.goto_parent():
+                return
+
+
 def iter_tree(root: Node, named_only: bool = False) -> Iterable[Node]:
     """Pre-order DFS over the whole tree."""
-    stack = [root]
-    while stack:
-        n = stack.pop()
-        yield n
-        children = n.named_children if named_only else n.children
-        # Reverse for stable pre-order
-        for c in reversed(children):
-            stack.append(c)
+    if not named_only:
+        return walk_tree(root)
+    # Anonymous nodes are leaves, so filtering equals walking named children.
+    return (n for n in walk_tree(root) if n.is_named)
 
 
 def is_under(node: Node, ancestor_types: set[str]) -> bool:
@@ -42,8 +58,26 @@ def nearest_ancestor(node: Node, types: set[str]) -> Optional[Node]:
     return None
 
 
+def iter_descendants_of_type(
+        node: Node, types: set[str],
+        prune: Optional[Callable[[Node], bool]] = None,
+) -> Iterator[Node]:
+    """Lazy `descendants_of_type`; ``prune`` as in `walk_tree`."""
+    walk = walk_tree(node, prune)
+    next(walk)  # skip ``node`` itself
+    return (n for n in walk if n.type in types)
+
+
+def first_descendant_of_type(
+        node: Node, types: set[str],
+        prune: Optional[Callable[[Node], bool]] = None,
+) -> Optional[Node]:
+    """First descendant of ``node`` (pre-order) whose type is in ``types``."""
+    return next(iter_descendants_of_type(node, types, prune), None)
+
+
 def descendants_of_type(node: Node, types: set[str]) -> List[Node]:
-    return [n for n in iter_tree(node, named_only=False) if (n is not node and n.type in types)]
+    return list(iter_descendants_of_type(node, types))
 
 
 def children_of_type(node: Node, types: set[str]) -> List[Node]:
@@ -124,24 +158,12 @@ def find_nodes_outside_types(
     else:
         disqualifying_types = set(disqualifying_types)
 
-    def has_disqualifying_ancestor(node: Node) -> bool:
-        ancestor = node.parent
-        while ancestor is not None:
-            if ancestor.type in disqualifying_types:
-                return True
-            ancestor = ancestor.parent
-        return False
-
-    results: List[Node] = []
-    stack: List[Node] = [root]
-
-    while stack:
-        current = stack.pop()
-
-        if current.type in target_types and not has_disqualifying_ancestor(current):
-            results.append(current)
-
-        # Maintain source order by pushing children in reverse.
-        stack.extend(reversed(current.children))
-
-    return results
+    # Disqualifying subtrees are never entered; only the ancestors above
+    # ``root`` need an explicit check.
+    if is_under(root, disqualifying_types):
+        return []
+    prune = (lambda n: n.type in disqualifying_types) if disqualifying_types else None
+    return [
+        current for current in walk_tree(root, prune)
+        if current.type in target_types
+    ]
@@ -1,15 +1,13 @@
 
-from functools import lru_cache, wraps
+from functools import wraps
 
-import tree_sitter_c as tsc
-from tree_sitter import Language, Parser
+from tree_sitter import Parser
+
+from ..parser.tslang import C_LANGUAGE, shared_parser
 
 
-@lru_cache
 def tree_sitter_c_parser() -> Parser:
-    lang = Language(tsc.language())
-    parser = Parser(lang)
-    return parser
+    return shared_parser(C_LANGUAGE)
 
 
 def byte2string(data: bytes) -> str: